@@ -0,0 +1,112 @@
+"""
+Hot/cold tiering of finished tickets.
+
+Resolved and closed tickets untouched for a while, with their notes, move from
+``tickets``/``ticket_notes`` to archive collections of the same shape, so the
+queries and indexes behind day-to-day work only cover live data. Archived
+tickets keep their id and gain ``archived_at``.
+
+A batch is copied before it is deleted, and only tickets that still qualify
+are deleted: one reopened or edited meanwhile stays hot and its copy is
+dropped. Notes are copied again after the delete to catch any written in
+between, and only notes with an archived copy are ever deleted. Every step
+is idempotent, so an interrupted run is finished by the next one.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ReplaceOne
+
+ARCHIVED_STATUSES = ('resolved', 'closed')
+
+
+class TicketArchiver:
+    def __init__(self, tickets, notes, tickets_archive, notes_archive, batch_size: int = 500,
+                 pause_seconds: float = 0.1):
+        self.tickets = tickets
+        self.notes = notes
+        self.tickets_archive = tickets_archive
+        self.notes_archive = notes_archive
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.counters = {'runs': 0, 'tickets': 0, 'ticket_notes': 0}
+        self.last_run_at: Optional[str] = None
+
+    async def ensure_indexes(self):
+        await self.tickets.create_index([("status", 1), ("updated_at", 1)])
+        await self.tickets_archive.create_index("id", unique=True)
+        await self.tickets_archive.create_index("created_at")
+        await self.tickets_archive.create_index("updated_at")
+        await self.notes_archive.create_index("id", unique=True)
+        await self.notes_archive.create_index([("ticket_id", 1), ("created_at", 1)])
+
+    @staticmethod
+    def eligible(cutoff: str) -> dict:
+        return {"status": {"$in": list(ARCHIVED_STATUSES)}, "updated_at": {"$lt": cutoff}}
+
+    async def _copy_notes(self, ticket_ids: List[str]) -> List[str]:
+        notes = await self.notes.find({"ticket_id": {"$in": ticket_ids}}, {"_id": 0}).to_list(None)
+        if notes:
+            await self.notes_archive.bulk_write([
+                ReplaceOne({"id": note['id']}, note, upsert=True) for note in notes
+            ], ordered=False)
+        return [note['id'] for note in notes]
+
+    async def _move_notes(self, ticket_ids: List[str]) -> int:
+        # Repeats until a copy finds nothing, for notes added while the previous pass ran
+        moved = 0
+        while True:
+            copied = await self._copy_notes(ticket_ids)
+            if not copied:
+                return moved
+            deleted = await self.notes.delete_many({"id": {"$in": copied}})
+            moved += deleted.deleted_count
+
+    async def archive_batch(self, cutoff: str) -> Dict[str, int]:
+        query = self.eligible(cutoff)
+        batch = await self.tickets.find(query, {"_id": 0}).limit(self.batch_size).to_list(self.batch_size)
+        if not batch:
+            return {'tickets': 0, 'ticket_notes': 0}
+        ids = [doc['id'] for doc in batch]
+        archived_at = datetime.now(timezone.utc).isoformat()
+        await self.tickets_archive.bulk_write([
+            ReplaceOne({"id": doc['id']}, {**doc, 'archived_at': archived_at}, upsert=True) for doc in batch
+        ], ordered=False)
+        await self._copy_notes(ids)
+
+        await self.tickets.delete_many({**query, "id": {"$in": ids}})
+        remaining = set(await self.tickets.distinct("id", {"id": {"$in": ids}}))
+        if remaining:
+            await self.tickets_archive.delete_many({"id": {"$in": list(remaining)}})
+            await self.notes_archive.delete_many({"ticket_id": {"$in": list(remaining)}})
+        moved = [ticket_id for ticket_id in ids if ticket_id not in remaining]
+        if not moved:
+            return {'tickets': 0, 'ticket_notes': 0}
+        return {'tickets': len(moved), 'ticket_notes': await self._move_notes(moved)}
+
+    async def archive(self, cutoff: str) -> Dict[str, int]:
+        """Archive every ticket finished and last updated before ``cutoff`` (ISO timestamp)."""
+        totals = {'tickets': 0, 'ticket_notes': 0}
+        while True:
+            moved = await self.archive_batch(cutoff)
+            for key, count in moved.items():
+                totals[key] += count
+                self.counters[key] += count
+            # A batch that moved nothing is either the last one or entirely reopened tickets
+            if not moved['tickets']:
+                break
+            # Throttle so foreground requests keep their share of the database
+            await asyncio.sleep(self.pause_seconds)
+        self.counters['runs'] += 1
+        self.last_run_at = datetime.now(timezone.utc).isoformat()
+        return totals
+
+    async def horizon(self) -> Optional[str]:
+        """Newest ``updated_at`` in the archive: tickets after it are all still hot."""
+        newest = await self.tickets_archive.find_one({}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+        return newest['updated_at'] if newest else None
+
+    def stats(self) -> dict:
+        return {**self.counters, 'last_run_at': self.last_run_at}
@@ -0,0 +1,136 @@
+"""
+Automatic ticket assignment.
+
+``AssignmentEngine`` keeps every technician's open workload in memory, so
+choosing a technician for a new ticket costs a heap peek plus a look at the
+few technicians who already work with that company, instead of a query.
+
+Workload is the sum of priority weights of the technician's open tickets.
+A technician's score is their workload minus an affinity bonus proportional
+to their share of the company's recent tickets; the lowest score wins.
+
+The state is updated by ``track`` as tickets are created, updated and
+deleted, and rebuilt from the database by ``rebuild`` (on startup and
+periodically) to absorb writes made by other processes.
+"""
+
+import heapq
+import itertools
+from typing import Dict, Iterable, Optional, Tuple
+
+OPEN_STATUSES = ('open', 'in_progress')
+PRIORITY_WEIGHTS = {'Crítica': 4.0, 'Alta': 2.0, 'Media': 1.0, 'Baja': 0.5}
+DEFAULT_WEIGHT = 1.0
+
+
+def ticket_weight(priority: Optional[str]) -> float:
+    return PRIORITY_WEIGHTS.get(priority, DEFAULT_WEIGHT)
+
+
+def workload_contribution(ticket: Optional[dict]) -> Optional[Tuple[str, float]]:
+    """(technician, weight) a ticket adds to someone's workload, or None if it adds nothing."""
+    if not ticket or not ticket.get('assigned_to') or ticket.get('status') not in OPEN_STATUSES:
+        return None
+    return ticket['assigned_to'], ticket_weight(ticket.get('priority'))
+
+
+class AssignmentEngine:
+    def __init__(self, affinity_weight: float = 2.0):
+        self.affinity_weight = affinity_weight
+        self.load: Dict[str, float] = {}
+        self.open_tickets: Dict[str, int] = {}
+        # company_id -> technician -> tickets handled recently
+        self.affinity: Dict[str, Dict[str, int]] = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self.counters = {'picks': 0, 'no_technician': 0, 'rebuilds': 0}
+
+    def rebuild(self, technicians: Iterable[str], open_rows: Iterable[dict], affinity_rows: Iterable[dict]):
+        """Replace the state: ``open_rows`` are {assigned_to, priority, count} groups of open
+        tickets and ``affinity_rows`` {assigned_to, company_id, count} groups of recent ones."""
+        load = {tech: 0.0 for tech in technicians}
+        open_tickets = {tech: 0 for tech in load}
+        for row in open_rows:
+            if row['assigned_to'] in load:
+                load[row['assigned_to']] += ticket_weight(row.get('priority')) * row['count']
+                open_tickets[row['assigned_to']] += row['count']
+        affinity: Dict[str, Dict[str, int]] = {}
+        for row in affinity_rows:
+            if row['assigned_to'] in load:
+                affinity.setdefault(row['company_id'], {})[row['assigned_to']] = row['count']
+
+        self.load, self.open_tickets, self.affinity = load, open_tickets, affinity
+        self._heap = [(value, next(self._sequence), tech) for tech, value in load.items()]
+        heapq.heapify(self._heap)
+        self.counters['rebuilds'] += 1
+
+    def add_technician(self, tech: str):
+        if tech not in self.load:
+            self.load[tech] = 0.0
+            self.open_tickets[tech] = 0
+            heapq.heappush(self._heap, (0.0, next(self._sequence), tech))
+
+    def remove_technician(self, tech: str):
+        # Heap entries for a removed technician are discarded lazily
+        self.load.pop(tech, None)
+        self.open_tickets.pop(tech, None)
+        for techs in self.affinity.values():
+            techs.pop(tech, None)
+
+    def _least_loaded(self) -> Optional[str]:
+        while self._heap:
+            value, _, tech = self._heap[0]
+            if self.load.get(tech) == value:
+                return tech
+            heapq.heappop(self._heap)
+        return None
+
+    def _adjust(self, tech: str, delta_load: float, delta_open: int):
+        if tech not in self.load:
+            return
+        self.load[tech] += delta_load
+        self.open_tickets[tech] += delta_open
+        heapq.heappush(self._heap, (self.load[tech], next(self._sequence), tech))
+        if len(self._heap) > 4 * len(self.load) + 64:
+            self._heap = [(value, next(self._sequence), t) for t, value in self.load.items()]
+            heapq.heapify(self._heap)
+
+    def pick(self, company_id: Optional[str]) -> Optional[str]:
+        """Technician with the lowest workload minus company affinity bonus."""
+        best = self._least_loaded()
+        if best is None:
+            self.counters['no_technician'] += 1
+            return None
+        best_score = self.load[best]
+        techs = self.affinity.get(company_id) or {}
+        total = sum(techs.values())
+        for tech, count in techs.items():
+            if tech not in self.load:
+                continue
+            score = self.load[tech] - self.affinity_weight * count / total
+            if score < best_score:
+                best, best_score = tech, score
+        self.counters['picks'] += 1
+        return best
+
+    def track(self, before: Optional[dict], after: Optional[dict]):
+        """Apply a ticket change (``before``/``after`` are None on create/delete)."""
+        removed, added = workload_contribution(before), workload_contribution(after)
+        if removed == added:
+            return
+        if removed:
+            self._adjust(removed[0], -removed[1], -1)
+        if added:
+            self._adjust(added[0], added[1], 1)
+        if after and after.get('assigned_to') and (not before or before.get('assigned_to') != after['assigned_to']):
+            techs = self.affinity.setdefault(after.get('company_id'), {})
+            techs[after['assigned_to']] = techs.get(after['assigned_to'], 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            'technicians': [
+                {'technician_id': tech, 'workload': round(self.load[tech], 2), 'open_tickets': self.open_tickets[tech]}
+                for tech in sorted(self.load, key=self.load.get)
+            ],
+            'counters': dict(self.counters),
+        }
@@ -0,0 +1,177 @@
+"""
+Attachment storage.
+
+Two interchangeable stores keep file bodies: ``GridFSAttachmentStore`` (default,
+lives in the same MongoDB) and ``LocalAttachmentStore`` (a directory, for
+deployments that back it with a volume). Both write uploads chunk by chunk as
+they arrive and stop as soon as ``max_bytes`` is exceeded, and both read byte
+ranges without loading the whole file. ``put_bytes`` may race with another
+write of the same key (thumbnails rendered by two requests at once); either
+copy is kept and neither caller fails.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from io import BytesIO
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+from gridfs.errors import FileExists
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class AttachmentTooLarge(Exception):
+    pass
+
+
+class LocalAttachmentStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        # Keys are generated uuids; spread them over subdirectories to keep listings small
+        return self.root / key[:2] / key
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[int, str]:
+        path = self._path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        # One partial file per writer, so concurrent writes of a key never interleave; the last rename wins
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        digest, size = hashlib.sha256(), 0
+        handle = await asyncio.to_thread(open, partial, 'wb')
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge()
+                digest.update(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(partial.unlink, True)
+            raise
+        await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(os.replace, partial, path)
+        return size, digest.hexdigest()
+
+    async def put_bytes(self, key: str, data: bytes):
+        async def single():
+            yield data
+        await self.save(key, single(), len(data))
+
+    async def read_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start`` to ``end`` inclusive."""
+        handle = await asyncio.to_thread(open, self._path(key), 'rb')
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(handle.read, min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(handle.close)
+
+    async def read(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._path(key).unlink, True)
+
+
+class GridFSAttachmentStore:
+    def __init__(self, bucket):
+        """``bucket`` is an ``AsyncIOMotorGridFSBucket``; files are stored with the key as their id."""
+        self.bucket = bucket
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[int, str]:
+        grid_in = self.bucket.open_upload_stream_with_id(key, key)
+        digest, size = hashlib.sha256(), 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge()
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        return size, digest.hexdigest()
+
+    async def put_bytes(self, key: str, data: bytes):
+        try:
+            await self.bucket.upload_from_stream_with_id(key, key, data)
+        except FileExists:
+            # Another writer stored this key first; the upload is not aborted, so its file stays
+            pass
+
+    async def read_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream(key)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def read(self, key: str) -> bytes:
+        grid_out = await self.bucket.open_download_stream(key)
+        return await grid_out.read()
+
+    async def delete(self, key: str):
+        try:
+            await self.bucket.delete(key)
+        except Exception:  # gridfs.errors.NoFile: already gone
+            pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single ``Range: bytes=...`` header to an inclusive (start, end).
+
+    Returns None when there is no usable header (serve the whole file) and
+    raises ValueError when the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Multiple ranges or another unit: ignore the header, as RFC 9110 allows
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """JPEG thumbnail fitting in ``size`` x ``size``; runs in a worker thread."""
+    # Pillow is only needed once someone asks for a thumbnail, not at API startup
+    from PIL import Image
+
+    image = Image.open(BytesIO(data))
+    # Let the JPEG decoder downscale while decoding instead of decoding full resolution
+    image.draft('RGB', (size, size))
+    image.thumbnail((size, size))
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=80, optimize=True)
+    return output.getvalue()
@@ -0,0 +1,116 @@
+"""
+Append-only audit trail.
+
+Handlers call ``AuditLog.record`` (no I/O) with field-level diffs; events wait
+in an in-memory queue and a background task writes them with ``insert_many``
+once ``batch_size`` events are queued or ``flush_interval`` seconds have
+passed. Call ``flush`` on shutdown so buffered events aren't lost.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Values of these fields are never written to the log, only the fact that they changed
+MASKED_FIELDS = {'windows_password', 'email_accounts', 'panel_access_data', 'password_hash'}
+MASK = '***'
+DUPLICATE_KEY = 11000
+
+
+def field_diff(before: dict, after: dict, fields: Iterable[str]) -> dict:
+    changes = {}
+    for field in fields:
+        old, new = before.get(field), after.get(field)
+        if old == new:
+            continue
+        if field in MASKED_FIELDS:
+            old, new = (MASK if old else None), (MASK if new else None)
+        changes[field] = {'from': old, 'to': new}
+    return changes
+
+
+class AuditLog:
+    def __init__(self, collection, batch_size: int = 500, flush_interval: float = 2.0, max_queue: int = 100_000):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self.counters = {'recorded': 0, 'written': 0, 'batches': 0, 'dropped': 0, 'failed_batches': 0}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("entity_type", 1), ("entity_id", 1), ("created_at", -1)])
+        await self.collection.create_index([("actor_id", 1), ("created_at", -1)])
+
+    def record(self, entity_type: str, entity_id: str, action: str, actor_id: Optional[str],
+               changes: Optional[dict] = None, company_id: Optional[str] = None):
+        if action == 'update' and not changes:
+            return
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.counters['dropped'] += 1
+        self._queue.append({
+            'id': str(uuid.uuid4()),
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'company_id': company_id,
+            'action': action,
+            'actor_id': actor_id,
+            'changes': changes or {},
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        })
+        self.counters['recorded'] += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                # insert_many sets _id on every event, so a retried event that was already
+                # written comes back as a duplicate key error and counts as written
+                try:
+                    await self.collection.insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    failed = [batch[error['index']] for error in e.details['writeErrors']
+                              if error['code'] != DUPLICATE_KEY]
+                    if failed:
+                        self.counters['written'] += len(batch) - len(failed)
+                        self.counters['failed_batches'] += 1
+                        self._queue.extendleft(reversed(failed))
+                        logger.error("Audit flush failed for %d events; %d kept in memory: %s",
+                                     len(failed), len(self._queue), e.details['writeErrors'][0].get('errmsg'))
+                        return
+                except Exception:
+                    # Keep the events for the next flush
+                    self.counters['failed_batches'] += 1
+                    self._queue.extendleft(reversed(batch))
+                    logger.exception("Audit flush failed; %d events kept in memory", len(self._queue))
+                    return
+                except BaseException:
+                    # Cancelled mid-insert at shutdown: the final flush writes the batch
+                    self._queue.extendleft(reversed(batch))
+                    raise
+                self.counters['written'] += len(batch)
+                self.counters['batches'] += 1
+
+    def stats(self) -> dict:
+        return {**self.counters, 'queued': len(self._queue)}
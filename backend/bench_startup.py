@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Import time and memory of an API worker before it serves its first request.
+
+Each run imports ``server`` in a fresh interpreter (as uvicorn does) and
+reports the seconds spent importing, the resident set size afterwards and
+which heavy libraries were pulled in. ``--record`` appends the median to a
+JSON-lines file so numbers can be compared across revisions.
+
+Usage:
+    python bench_startup.py                    # 5 runs
+    python bench_startup.py --runs 10 --top 15 # plus the slowest imports
+    python bench_startup.py --record startup_history.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+HEAVY_MODULES = ('reportlab', 'PIL', 'numpy')
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+rss_kb = 0
+with open('/proc/self/status') as status:
+    for line in status:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{
+    'import_seconds': elapsed,
+    'rss_mb': rss_kb / 1024,
+    'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe_env():
+    env = dict(os.environ)
+    # Importing the app only builds the client; nothing connects until the first query
+    env.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    env.setdefault('DB_NAME', 'bench_startup')
+    return env
+
+
+def run_probe():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=probe_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """Top-level imports of ``server`` by cumulative time, from ``python -X importtime``."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import server'],
+        cwd=BACKEND_DIR, env=probe_env(), capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Direct dependencies of server are indented by exactly three spaces
+        if name.startswith('   ') and not name.startswith('    '):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure API worker import time and memory")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help="Also list the N slowest imports of server")
+    parser.add_argument('--record', help="Append the median run to this JSON-lines file")
+    args = parser.parse_args(argv)
+
+    results = [run_probe() for _ in range(args.runs)]
+    import_seconds = statistics.median(r['import_seconds'] for r in results)
+    rss_mb = statistics.median(r['rss_mb'] for r in results)
+    loaded = results[-1]['loaded']
+    print(f"import server: {import_seconds:.3f} s (median of {args.runs}), RSS {rss_mb:.1f} MB")
+    print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    if args.top:
+        print(f"\n{'seconds':>8}  module")
+        for seconds, name in slowest_imports(args.top):
+            print(f"{seconds:>8.3f}  {name}")
+
+    if args.record:
+        record = {
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'runs': args.runs,
+            'import_seconds': round(import_seconds, 4),
+            'rss_mb': round(rss_mb, 1),
+            'loaded': loaded,
+        }
+        with open(args.record, 'a') as handle:
+            handle.write(json.dumps(record) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Bytes-on-the-wire and CPU cost of each response format for the main list endpoints.
+
+Builds asset and ticket list payloads with the synthetic data generator and
+runs them through the same encoders WireFormatMiddleware uses.
+
+Usage:
+    python bench_wire.py                 # 1000-item lists
+    python bench_wire.py --items 5000 --repeat 20
+"""
+
+import argparse
+import itertools
+import json
+import time
+
+from generate_data import DataGenerator
+from wire import brotli, compress, msgpack
+
+
+def build_payloads(items):
+    generator = DataGenerator(seed=1, scale=0.01)
+    collections = dict(generator.collections())
+    # Collections must be consumed in order; later ones draw ids from earlier ones
+    for name in ('companies', 'users'):
+        list(collections[name])
+    assets = list(itertools.islice(collections['assets'], items))
+    list(collections['services'])
+    list(collections['contracts'])
+    tickets = list(itertools.islice(collections['tickets'], items))
+    return {
+        'GET /api/assets': json.dumps(assets).encode('utf-8'),
+        'GET /api/tickets': json.dumps(tickets).encode('utf-8'),
+    }
+
+
+def encoders():
+    formats = {
+        'json': lambda body: body,
+        'json+gzip': lambda body: compress(body, 'gzip'),
+    }
+    if brotli is not None:
+        formats['json+br'] = lambda body: compress(body, 'br')
+    if msgpack is not None:
+        to_msgpack = lambda body: msgpack.packb(json.loads(body), use_bin_type=True)
+        formats['msgpack'] = to_msgpack
+        formats['msgpack+gzip'] = lambda body: compress(to_msgpack(body), 'gzip')
+        if brotli is not None:
+            formats['msgpack+br'] = lambda body: compress(to_msgpack(body), 'br')
+    return formats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare response wire formats")
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    payloads = build_payloads(args.items)
+    print(f"{'endpoint':<18} {'format':<14} {'bytes':>10} {'ratio':>7} {'encode ms':>10}")
+    for endpoint, body in payloads.items():
+        for name, encode in encoders().items():
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                encoded = encode(body)
+            elapsed_ms = (time.perf_counter() - started) / args.repeat * 1000
+            print(f"{endpoint:<18} {name:<14} {len(encoded):>10,} {len(encoded) / len(body):>7.2f} {elapsed_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from fastapi import HTTPException, Response
+from typing import Optional
+
+from core import db, backfill_derived_fields, logger
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    if not if_match or if_match.strip() == '*':
+        return None
+    value = if_match.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by this API")
+
+def versioned_update(doc_id: str, expected: Optional[int], update: dict) -> tuple:
+    """Build the filter and update for a write that must match `expected` (from If-Match)."""
+    if expected is None:
+        # A pipeline, so a document without a version (served as 1) moves to 2 like any other;
+        # $literal keeps user text starting with "$" from being read as an expression
+        fields = {key: {"$literal": value} for key, value in update["$set"].items()}
+        return {"id": doc_id}, [{"$set": {**fields, "version": {"$add": [{"$ifNull": ["$version", 1]}, 1]}}}]
+    # Documents written before versioning have no field yet and are served as version 1
+    version_match = {"$in": [1, None]} if expected == 1 else expected
+    return {"id": doc_id, "version": version_match}, {**update, "$set": {**update.get("$set", {}), "version": expected + 1}}
+
+def bumped_version(previous: dict, expected: Optional[int]) -> int:
+    # Version the document was left at, for handlers that read the pre-update document
+    return expected + 1 if expected is not None else (previous.get('version') or 1) + 1
+
+async def raise_update_failed(collection, doc_id: str, expected: Optional[int], label: str):
+    if expected is not None and await collection.find_one({"id": doc_id}, {"_id": 1}):
+        raise HTTPException(status_code=409, detail=f"{label} was modified by another user; reload it and try again")
+    raise HTTPException(status_code=404, detail=f"{label} not found")
+
+def set_etag(response: Response, version: int):
+    response.headers['ETag'] = f'"{version}"'
+
+async def backfill_versions():
+    for collection_name in ('companies', 'assets', 'tickets', 'services', 'contracts', 'system_config'):
+        count = await backfill_derived_fields(db[collection_name], 'version', [], lambda doc: {'version': 1})
+        if count:
+            logger.info("Backfilled version on %d %s", count, collection_name)
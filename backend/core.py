@@ -0,0 +1,154 @@
+"""
+Shared state of the API: configuration, the database handle, data loaders and
+the helpers every router uses. Routers live in ``routers/`` and ``server.py``
+assembles them into the app.
+"""
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List
+from loader import BatchLoader
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+db = client[os.environ['DB_NAME']]
+
+# JWT Configuration
+JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
+JWT_ALGORITHM = 'HS256'
+# Only trust X-Real-IP when running behind the nginx proxy that sets it
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'false').lower() == 'true'
+
+# Background job configuration
+CASCADE_DELETE_BATCH_SIZE = int(os.environ.get('CASCADE_DELETE_BATCH_SIZE', '1000'))
+CASCADE_DELETE_PAUSE_SECONDS = float(os.environ.get('CASCADE_DELETE_PAUSE_SECONDS', '0.05'))
+JOB_LEASE_SECONDS = 60
+STATS_RECONCILE_INTERVAL_SECONDS = int(os.environ.get('STATS_RECONCILE_INTERVAL_SECONDS', '3600'))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYTICS_CACHE_MAX_ENTRIES', '20000'))
+
+# Report job configuration
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '2'))
+REPORT_POLL_SECONDS = 5
+REPORT_JOB_TIMEOUT_SECONDS = 600
+REPORTS_DIR = Path(os.environ.get('REPORTS_DIR', str(ROOT_DIR / 'reports_cache')))
+# Rendered files are deleted after this many days, or once no completed job points at them
+REPORT_RETENTION_DAYS = float(os.environ.get('REPORT_RETENTION_DAYS', '7'))
+REPORT_PRUNE_SECONDS = 3600
+
+# Audit trail: events are buffered and written in batches of this size, or after this many seconds
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '2'))
+
+# Automatic assignment of new tickets to the least loaded technician
+AUTO_ASSIGN_TICKETS = os.environ.get('AUTO_ASSIGN_TICKETS', 'true').lower() == 'true'
+ASSIGNMENT_AFFINITY_DAYS = int(os.environ.get('ASSIGNMENT_AFFINITY_DAYS', '90'))
+ASSIGNMENT_RECONCILE_SECONDS = int(os.environ.get('ASSIGNMENT_RECONCILE_SECONDS', '300'))
+
+# Near-duplicate detection: new tickets at least this similar to an open one are linked to it
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', '0.6'))
+DUPLICATE_INDEX_REBUILD_SECONDS = int(os.environ.get('DUPLICATE_INDEX_REBUILD_SECONDS', '900'))
+
+# Resolution suggestions: TF-IDF index of resolved tickets, rebuilt daily or once the delta grows too large
+RESOLUTION_INDEX_PATH = Path(os.environ.get('RESOLUTION_INDEX_PATH', str(ROOT_DIR / 'resolution_index.npz')))
+RESOLUTION_INDEX_REBUILD_SECONDS = int(os.environ.get('RESOLUTION_INDEX_REBUILD_SECONDS', '86400'))
+RESOLUTION_INDEX_MAX_DELTA = int(os.environ.get('RESOLUTION_INDEX_MAX_DELTA', '20000'))
+RESOLUTION_INDEX_SYNC_SECONDS = 300
+
+# Attachments: stored in GridFS unless ATTACHMENT_STORE=local
+ATTACHMENT_MAX_BYTES = int(os.environ.get('ATTACHMENT_MAX_BYTES', str(25 * 1024 * 1024)))
+ATTACHMENT_DIR = Path(os.environ.get('ATTACHMENT_DIR', str(ROOT_DIR / 'attachments')))
+THUMBNAIL_SIZES = (128, 256, 512)
+THUMBNAIL_MAX_SOURCE_BYTES = 20 * 1024 * 1024
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '2'))
+
+# Depreciation forecast
+DEPRECIATION_DEFAULT_LIFE_MONTHS = int(os.environ.get('DEPRECIATION_DEFAULT_LIFE_MONTHS', '48'))
+FORECAST_CACHE_MAX_ENTRIES = 64
+
+# Ticket archive: resolved/closed tickets untouched for this many days move to tickets_archive (0 disables)
+TICKET_ARCHIVE_AFTER_DAYS = int(os.environ.get('TICKET_ARCHIVE_AFTER_DAYS', '365'))
+TICKET_ARCHIVE_BATCH_SIZE = int(os.environ.get('TICKET_ARCHIVE_BATCH_SIZE', '500'))
+TICKET_ARCHIVE_PAUSE_SECONDS = float(os.environ.get('TICKET_ARCHIVE_PAUSE_SECONDS', '0.1'))
+TICKET_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('TICKET_ARCHIVE_INTERVAL_SECONDS', '3600'))
+
+# Change sync: pages stop this many seconds in the past so writes still in flight aren't skipped,
+# and deletions are remembered this long (older sync tokens must start over)
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '500'))
+SYNC_MAX_PAGE_SIZE = 5000
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '5'))
+SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', '90'))
+
+# Outbound webhooks: delivered from the webhook_outbox collection by a pool of sender tasks
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', '4'))
+WEBHOOK_MAX_PER_TARGET = int(os.environ.get('WEBHOOK_MAX_PER_TARGET', '2'))
+WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_TIMEOUT_SECONDS', '10'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_BACKOFF_SECONDS = float(os.environ.get('WEBHOOK_BACKOFF_SECONDS', '5'))
+WEBHOOK_BACKOFF_MAX_SECONDS = float(os.environ.get('WEBHOOK_BACKOFF_MAX_SECONDS', '3600'))
+WEBHOOK_POLL_SECONDS = float(os.environ.get('WEBHOOK_POLL_SECONDS', '2'))
+WEBHOOK_RETENTION_DAYS = int(os.environ.get('WEBHOOK_RETENTION_DAYS', '14'))
+WEBHOOK_MAX_BATCH_SIZE = 100
+SLA_MONITOR_SECONDS = int(os.environ.get('SLA_MONITOR_SECONDS', '300'))
+
+# Batched backfills of derived fields run in the background at startup
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_PAUSE_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+# By-key lookups made in the same event-loop tick, by any request, share one $in query
+loaders = {
+    'users': BatchLoader(db.users),
+    'companies': BatchLoader(db.companies),
+    'assets': BatchLoader(db.assets),
+    'active_contracts_by_company': BatchLoader(db.contracts, field='company_id', query={'status': 'active'}, many=True),
+    'sla_calendars': BatchLoader(db.sla_calendars),
+}
+
+async def backfill_derived_fields(collection, marker: str, source_fields: List[str], derive, version=None) -> int:
+    # `derive` must always set `marker` (even to None) so unparseable documents aren't revisited.
+    # With `version`, the marker holds the parser version and older documents are derived again.
+    # Pages by _id, so each batch resumes where the last one stopped instead of rescanning
+    # the collection for a marker that has no index. Each update repeats the page predicate and
+    # the source values it read, so a write that lands between the read and the update wins
+    total = 0
+    projection = {"_id": 1, **{field: 1 for field in source_fields}}
+    query = {marker: {"$exists": False}} if version is None else {marker: {"$ne": version}}
+    last_id = None
+    while True:
+        page_query = query if last_id is None else {**query, "_id": {"$gt": last_id}}
+        batch = await collection.find(page_query, projection).sort("_id", 1).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)
+        if not batch:
+            return total
+        last_id = batch[-1]['_id']
+        await collection.bulk_write([
+            UpdateOne({"_id": doc['_id'], **query, **{field: doc.get(field) for field in source_fields}},
+                      {"$set": derive(doc)})
+            for doc in batch
+        ], ordered=False)
+        total += len(batch)
+        await asyncio.sleep(BACKFILL_PAUSE_SECONDS)
+
+async def bump_data_version(*names: str):
+    await db.data_versions.bulk_write([
+        UpdateOne({"id": name}, {"$inc": {"version": 1}}, upsert=True) for name in names
+    ], ordered=False)
+
+background_tasks: Dict[str, asyncio.Task] = {}
+
+def spawn_background_task(name: str, coro):
+    if name in background_tasks:
+        coro.close()
+        return
+    task = asyncio.create_task(coro)
+    background_tasks[name] = task
+    task.add_done_callback(lambda _: background_tasks.pop(name, None))
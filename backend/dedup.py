@@ -0,0 +1,139 @@
+"""
+Near-duplicate ticket detection.
+
+A ticket's title and description are reduced to character shingles and
+summarised by a MinHash signature. ``DuplicateIndex`` files every signature
+under its LSH band keys, per company, so a lookup only compares the query with
+tickets sharing at least one band instead of scanning every open ticket.
+
+With 16 bands of 4 rows two tickets become candidates with probability
+1 - (1 - s^4)^16: about 0.64 at similarity 0.5, 0.89 at 0.6 and 0.99 at 0.7.
+
+Buckets hold at most ``MAX_BUCKET_SIZE`` tickets. Identical texts share every
+band, so without the cap a flood of them would make each add and each lookup
+scan all the others; the first ones filed are enough to report the duplicate.
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+MAX_TEXT_CHARS = 4000
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+PRIME = (1 << 31) - 1
+MAX_BUCKET_SIZE = 64
+
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_text(text: str) -> str:
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def ticket_text(doc: dict) -> str:
+    return f"{doc.get('title') or ''} {doc.get('description') or ''}"
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of ``text``, or None when it has nothing to compare."""
+    text = normalize_text(text)[:MAX_TEXT_CHARS]
+    if not text:
+        return None
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    hashes %= PRIME
+    # (a * x + b) mod p stays below 2**63 because a, x < 2**31
+    return ((_A * hashes + _B) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    return [hash((band, sig[band * ROWS:(band + 1) * ROWS].tobytes())) for band in range(BANDS)]
+
+
+class DuplicateIndex:
+    def __init__(self):
+        # company_id -> band key -> ticket ids; buckets are tuples, almost all of length one
+        self._buckets: Dict[str, Dict[int, Tuple[str, ...]]] = {}
+        # ticket_id -> (company_id, signature, title, duplicate_of)
+        self._entries: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, ticket_id: str) -> bool:
+        return ticket_id in self._entries
+
+    def add(self, ticket_id: str, company_id: str, sig: Optional[np.ndarray], title: str = '',
+            duplicate_of: Optional[str] = None):
+        self.remove(ticket_id)
+        if sig is None:
+            return
+        buckets = self._buckets.setdefault(company_id, {})
+        for key in band_keys(sig):
+            bucket = buckets.get(key, ())
+            if len(bucket) < MAX_BUCKET_SIZE:
+                buckets[key] = bucket + (ticket_id,)
+        self._entries[ticket_id] = (company_id, sig, title, duplicate_of)
+
+    def remove(self, ticket_id: str):
+        entry = self._entries.pop(ticket_id, None)
+        if entry is None:
+            return
+        company_id, sig = entry[0], entry[1]
+        buckets = self._buckets.get(company_id, {})
+        for key in band_keys(sig):
+            remaining = tuple(t for t in buckets.get(key, ()) if t != ticket_id)
+            if remaining:
+                buckets[key] = remaining
+            else:
+                buckets.pop(key, None)
+        if not buckets:
+            self._buckets.pop(company_id, None)
+
+    def remove_company(self, company_id: str):
+        if self._buckets.pop(company_id, None) is not None:
+            self._entries = {t: e for t, e in self._entries.items() if e[0] != company_id}
+
+    def query(self, company_id: str, sig: Optional[np.ndarray], threshold: float, limit: int = 5,
+              exclude: Optional[str] = None) -> List[dict]:
+        """Open tickets of the company whose estimated similarity is at least ``threshold``."""
+        buckets = self._buckets.get(company_id)
+        if not buckets or sig is None:
+            return []
+        candidates = set()
+        for key in band_keys(sig):
+            candidates.update(buckets.get(key, ()))
+        candidates.discard(exclude)
+        matches = []
+        for ticket_id in candidates:
+            _, other, title, duplicate_of = self._entries[ticket_id]
+            similarity = float(np.count_nonzero(sig == other)) / NUM_PERM
+            if similarity >= threshold:
+                matches.append({'id': ticket_id, 'title': title, 'similarity': round(similarity, 3),
+                                'duplicate_of': duplicate_of})
+        matches.sort(key=lambda match: match['similarity'], reverse=True)
+        return matches[:limit]
+
+    def stats(self) -> dict:
+        return {
+            'tickets': len(self._entries),
+            'companies': len(self._buckets),
+            'buckets': sum(len(buckets) for buckets in self._buckets.values()),
+        }
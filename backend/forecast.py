@@ -0,0 +1,169 @@
+"""
+Fleet depreciation schedules and end-of-life forecast.
+
+Assets are loaded once into column arrays (purchase month, value, useful life
+and an optional grouping key) and every quarter of the schedule is computed
+as whole-array NumPy operations. Time is counted in months: an asset bought
+in March is one month old at the start of April.
+
+Methods:
+- ``straight_line``: the value is written off evenly over the useful life.
+- ``declining_balance``: each month writes off ``factor / life`` of the
+  remaining book value, switching to straight line once that writes off more
+  (``factor=2`` is double-declining). The book value reaches 0 at end of life.
+"""
+
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+METHODS = ('straight_line', 'declining_balance')
+
+
+class FleetColumns(NamedTuple):
+    purchase_month: np.ndarray  # int64, months since year 0
+    value: np.ndarray  # float64
+    life_months: np.ndarray  # int64, always >= 1
+    keys: Optional[np.ndarray]  # group label per asset ('' when unset), or None when not grouping
+
+
+def month_index(day) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def quarter_label(month: int) -> str:
+    return f"{month // 12}-Q{month % 12 // 3 + 1}"
+
+
+def parse_quarter(value: str) -> int:
+    """First month of a quarter written as ``2026-Q1``."""
+    year, _, quarter = value.upper().partition('-Q')
+    quarter = int(quarter)
+    if not 1 <= quarter <= 4:
+        raise ValueError(value)
+    return int(year) * 12 + (quarter - 1) * 3
+
+
+def load_columns(docs: Iterable[dict], default_life_months: int, group_field: Optional[str] = None) -> Tuple[FleetColumns, dict]:
+    """Build column arrays from documents with ``purchase_date_at``, ``purchase_value_num``
+    and ``estimated_life_months``; assets missing a date or value are skipped."""
+    months, values, lives, keys = [], [], [], []
+    counts = {'loaded': 0, 'skipped': 0, 'default_life': 0}
+    for doc in docs:
+        purchased, value = doc.get('purchase_date_at'), doc.get('purchase_value_num')
+        if not isinstance(purchased, (date, datetime)) or value is None:
+            counts['skipped'] += 1
+            continue
+        life = doc.get('estimated_life_months')
+        if not life or life < 1:
+            life = default_life_months
+            counts['default_life'] += 1
+        months.append(month_index(purchased))
+        values.append(value)
+        lives.append(life)
+        if group_field:
+            keys.append(doc.get(group_field) or '')
+        counts['loaded'] += 1
+
+    columns = FleetColumns(
+        purchase_month=np.array(months, dtype=np.int64),
+        value=np.array(values, dtype=np.float64),
+        life_months=np.array(lives, dtype=np.int64),
+        keys=np.array(keys, dtype=str) if group_field else None,
+    )
+    return columns, counts
+
+
+def book_value(columns: FleetColumns, ages: np.ndarray, method: str, factor: float) -> np.ndarray:
+    """Book value of each asset (rows) at each age in months (columns); 0 before purchase."""
+    value = columns.value[:, None]
+    life = columns.life_months[:, None].astype(np.float64)
+    elapsed = np.clip(ages, 0, life)
+
+    if method == 'straight_line':
+        book = value * (1 - elapsed / life)
+    else:
+        rate = np.minimum(factor / life, 1.0)
+        # Month after which straight line over the remaining life beats the declining rate
+        switch = np.ceil(life * (1 - 1 / factor))
+        at_switch = value * (1 - rate) ** switch
+        remaining_after_switch = np.maximum(life - switch, 1)
+        book = np.where(
+            elapsed < switch,
+            value * (1 - rate) ** elapsed,
+            at_switch * (life - elapsed) / remaining_after_switch
+        )
+    return np.where(ages < 0, 0.0, np.maximum(book, 0.0))
+
+
+def group_sums(matrix: np.ndarray, codes: Optional[np.ndarray], groups: int) -> np.ndarray:
+    """Sum the rows of ``matrix`` per group code (or all rows when not grouping)."""
+    if codes is None:
+        return matrix.sum(axis=0, keepdims=True)
+    out = np.zeros((groups,) + matrix.shape[1:], dtype=matrix.dtype)
+    np.add.at(out, codes, matrix)
+    return out
+
+
+def forecast(columns: FleetColumns, start_month: int, quarters: int, method: str = 'straight_line', factor: float = 2.0) -> dict:
+    """Quarterly depreciation schedule and end-of-life counts from ``start_month`` on."""
+    if columns.keys is not None:
+        labels, codes = np.unique(columns.keys, return_inverse=True)
+        labels = [label or None for label in labels.tolist()]
+    else:
+        labels, codes = [None], None
+
+    # Ages at the start of each quarter plus the end of the last one
+    boundaries = start_month + 3 * np.arange(quarters + 1)
+    ages = boundaries[None, :] - columns.purchase_month[:, None]
+    book = book_value(columns, ages, method, factor)
+    acquired = np.where(ages >= 0, columns.value[:, None], 0.0)
+    accumulated = acquired - book
+    expense = np.diff(accumulated, axis=1)
+
+    book_totals = group_sums(book[:, 1:], codes, len(labels))
+    expense_totals = group_sums(expense, codes, len(labels))
+
+    # End of life: the month the asset is fully depreciated
+    eol_quarter = (columns.purchase_month + columns.life_months - start_month) // 3
+    in_range = (eol_quarter >= 0) & (eol_quarter < quarters)
+    flat_index = (codes if codes is not None else np.zeros(len(eol_quarter), dtype=np.int64)) * quarters + eol_quarter
+    eol_counts = np.bincount(flat_index[in_range], minlength=len(labels) * quarters).reshape(len(labels), quarters)
+    eol_values = np.bincount(flat_index[in_range], weights=columns.value[in_range],
+                             minlength=len(labels) * quarters).reshape(len(labels), quarters)
+    overdue = group_sums((eol_quarter < 0).astype(np.int64)[:, None], codes, len(labels))[:, 0]
+
+    groups = []
+    for g, label in enumerate(labels):
+        groups.append({
+            'key': label,
+            'overdue_replacements': int(overdue[g]),
+            'quarters': [
+                {
+                    'quarter': quarter_label(int(boundaries[q])),
+                    'depreciation': round(float(expense_totals[g, q]), 2),
+                    'book_value_end': round(float(book_totals[g, q]), 2),
+                    'end_of_life_assets': int(eol_counts[g, q]),
+                    'replacement_cost': round(float(eol_values[g, q]), 2),
+                }
+                for q in range(quarters)
+            ]
+        })
+    return {'method': method, 'factor': factor if method == 'declining_balance' else None, 'groups': groups}
+
+
+CSV_COLUMNS = ['group', 'quarter', 'depreciation', 'book_value_end', 'end_of_life_assets', 'replacement_cost']
+
+
+def to_csv(result: dict) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for group in result['groups']:
+        for row in group['quarters']:
+            writer.writerow([group['key'] or ''] + [row[column] for column in CSV_COLUMNS[1:]])
+    return buffer.getvalue()
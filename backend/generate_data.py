@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic data generator for the ITSM database.
+
+Generates companies, users, assets, services, contracts, tickets and ticket
+notes with the same document shape the API stores (ISO strings for dates,
+uuid ``id`` fields), using a seeded RNG so two runs with the same arguments
+produce identical data.
+
+Usage:
+    python generate_data.py --mongo                      # load into MONGO_URL/DB_NAME
+    python generate_data.py --ndjson ./dataset           # one .ndjson file per collection
+    python generate_data.py --mongo --scale 0.01 --seed 7
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).parent
+
+# Full-size volumes (scale = 1.0)
+DEFAULT_COUNTS = {
+    'companies': 500,
+    'technicians': 60,
+    'assets': 200_000,
+    'services': 5_000,
+    'tickets': 2_000_000,
+    'ticket_notes': 2_000_000,
+}
+
+DEFAULT_PASSWORD = 'password123'
+# bcrypt hash of DEFAULT_PASSWORD, fixed so the users collection is reproducible too
+DEFAULT_PASSWORD_HASH = '$2b$10$QGDT7HaXpUEmjmEt.Z53ReJy1/x8FoKaFAOujH9pGHybqdVr7282O'
+
+ASSET_TYPES = [('Laptop', 35), ('Desktop', 30), ('Servidor', 5), ('Impresora', 10),
+               ('Switch', 5), ('Router', 4), ('Monitor', 8), ('Tablet', 3)]
+MANUFACTURERS = [('Dell', 30), ('HP', 28), ('Lenovo', 22), ('Apple', 8), ('Cisco', 5),
+                 ('Asus', 4), ('Acer', 3)]
+OPERATING_SYSTEMS = [('Windows 11', 40), ('Windows 10', 35), ('Ubuntu', 8), ('macOS', 8),
+                     ('Windows Server 2022', 6), ('N/A', 3)]
+ASSET_STATUSES = [('active', 85), ('in_repair', 5), ('retired', 10)]
+RAM_SIZES = ['4', '8', '8', '16', '16', '16', '32', '64']
+STORAGE = ['SSD 256GB', 'SSD 512GB', 'SSD 1TB', 'HDD 1TB', 'HDD 2TB', 'SSD 512GB + HDD 1TB']
+LOCATIONS = ['Oficina Principal', 'Recepción', 'Contabilidad', 'Gerencia', 'Almacén',
+             'Sala de Servidores', 'Ventas', 'Recursos Humanos']
+
+TICKET_STATUSES = [('closed', 55), ('resolved', 20), ('open', 15), ('in_progress', 10)]
+TICKET_PRIORITIES = [('Baja', 30), ('Media', 45), ('Alta', 20), ('Crítica', 5)]
+TICKET_CATEGORIES = [('Hardware', 30), ('Software', 35), ('Red', 15), ('Correo', 12),
+                     ('Accesos', 8)]
+TICKET_SUBJECTS = [
+    'No enciende el equipo', 'Impresora no imprime', 'Sin acceso a internet',
+    'Error al abrir Outlook', 'Equipo muy lento', 'Restablecer contraseña',
+    'Instalación de software', 'Pantalla azul', 'No sincroniza OneDrive',
+    'VPN no conecta', 'Falla de respaldo', 'Actualización de sistema operativo',
+]
+RESOLUTIONS = [
+    'Se reinició el servicio y se verificó el funcionamiento.',
+    'Se reemplazó el componente dañado.',
+    'Se reinstaló el controlador y se configuró nuevamente.',
+    'Se restableció la contraseña del usuario.',
+    'Se actualizó el sistema operativo y se aplicaron parches.',
+    'Se reconfiguró el perfil de correo.',
+]
+NOTE_TEXTS = [
+    'Se contactó al usuario para más detalles.', 'En espera de respuesta del cliente.',
+    'Se escaló al proveedor.', 'Se programó visita en sitio.',
+    'Se realizó diagnóstico remoto.', 'Pendiente de repuesto.',
+]
+SERVICE_TYPES = [('Web Hosting', 25), ('Email', 30), ('Licencias', 25), ('VPS', 10),
+                 ('Dominio', 10)]
+BILLING_PERIODS = ['Mensual', 'Trimestral', 'Anual']
+
+
+class DataGenerator:
+    """Seeded generator producing API-shaped documents collection by collection.
+
+    Companies get a Zipf-like weight so a handful of large clients own most of
+    the assets and tickets, which is what production data looks like.
+    """
+
+    def __init__(self, seed=42, scale=1.0, end_date=None, history_days=3 * 365):
+        self.rng = random.Random(seed)
+        self.counts = {name: max(1, int(count * scale)) for name, count in DEFAULT_COUNTS.items()}
+        self.end_date = end_date or datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.start_date = self.end_date - timedelta(days=history_days)
+        self.span_seconds = int((self.end_date - self.start_date).total_seconds())
+
+        self.company_ids = []
+        self.company_weights = []
+        self.technician_ids = []
+        self.client_user_ids = {}
+        self.asset_ids_by_company = {}
+        self.service_ids_by_company = {}
+        self.ticket_ids = []
+
+    # ---- helpers ----
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _choice(self, weighted):
+        values, weights = zip(*weighted)
+        return self.rng.choices(values, weights=weights)[0]
+
+    def _company(self):
+        return self.rng.choices(self.company_ids, cum_weights=self.company_weights)[0]
+
+    def _timestamp(self):
+        return self.start_date + timedelta(seconds=self.rng.randrange(self.span_seconds))
+
+    # ---- collections ----
+
+    def companies(self):
+        cumulative = 0.0
+        for i in range(self.counts['companies']):
+            company_id = self._uuid()
+            cumulative += 1.0 / (i + 1) ** 0.9
+            self.company_ids.append(company_id)
+            self.company_weights.append(cumulative)
+            name = f"Empresa {i + 1:04d}"
+            yield {
+                'id': company_id,
+                'name': name,
+                'contact_person': f"Contacto {i + 1}",
+                'email': f"contacto@empresa{i + 1:04d}.com",
+                'phone': f"+52 55 {self.rng.randrange(1000, 9999)} {self.rng.randrange(1000, 9999)}",
+                'address': f"Calle {self.rng.randrange(1, 300)} #{self.rng.randrange(1, 999)}",
+                'created_at': self._timestamp().isoformat(),
+            }
+
+    def users(self):
+        password_hash = DEFAULT_PASSWORD_HASH
+        for i in range(self.counts['technicians']):
+            user_id = self._uuid()
+            self.technician_ids.append(user_id)
+            yield {
+                'id': user_id,
+                'email': f"tecnico{i + 1:03d}@itsm.com",
+                'name': f"Técnico {i + 1}",
+                'role': 'technician',
+                'company_id': None,
+                'created_at': self.start_date.isoformat(),
+                'password_hash': password_hash,
+            }
+        for i, company_id in enumerate(self.company_ids):
+            user_id = self._uuid()
+            self.client_user_ids[company_id] = user_id
+            yield {
+                'id': user_id,
+                'email': f"usuario@empresa{i + 1:04d}.com",
+                'name': f"Usuario Empresa {i + 1}",
+                'role': 'client',
+                'company_id': company_id,
+                'created_at': self.start_date.isoformat(),
+                'password_hash': password_hash,
+            }
+
+    def assets(self):
+        for i in range(self.counts['assets']):
+            asset_id = self._uuid()
+            company_id = self._company()
+            self.asset_ids_by_company.setdefault(company_id, []).append(asset_id)
+            asset_type = self._choice(ASSET_TYPES)
+            purchase = self._timestamp()
+            yield {
+                'id': asset_id,
+                'company_id': company_id,
+                'asset_type': asset_type,
+                'manufacturer': self._choice(MANUFACTURERS),
+                'model': f"Modelo {self.rng.randrange(100, 999)}",
+                'serial_number': f"SN{self.rng.getrandbits(40):010X}",
+                'host_name': f"HOST-{i:06d}",
+                'windows_user': None,
+                'windows_password': None,
+                'email_accounts': None,
+                'cloud_user': None,
+                'backup_folder': None,
+                'location': self.rng.choice(LOCATIONS),
+                'status': self._choice(ASSET_STATUSES),
+                'ip_address': f"10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}",
+                'operating_system': self._choice(OPERATING_SYSTEMS),
+                'os_version': None,
+                'cpu_processor': self.rng.choice(['Intel Core i5', 'Intel Core i7', 'AMD Ryzen 5', 'AMD Ryzen 7', 'Intel Xeon']),
+                'ram_gb': self.rng.choice(RAM_SIZES),
+                'storage_type_capacity': self.rng.choice(STORAGE),
+                'graphics_card': None,
+                'network_ports': None,
+                'purchase_date': purchase.date().isoformat(),
+                'purchase_value': f"{self.rng.randrange(300, 4000)}.00",
+                'warranty_expiration': (purchase + timedelta(days=365 * self.rng.choice([1, 2, 3]))).date().isoformat(),
+                'support_provider': None,
+                'estimated_life_months': self.rng.choice([36, 48, 60]),
+                'notes': None,
+                'created_at': purchase.isoformat(),
+            }
+
+    def services(self):
+        for _ in range(self.counts['services']):
+            service_id = self._uuid()
+            company_id = self._company()
+            self.service_ids_by_company.setdefault(company_id, []).append(service_id)
+            start = self._timestamp()
+            yield {
+                'id': service_id,
+                'company_id': company_id,
+                'service_type': self._choice(SERVICE_TYPES),
+                'service_name': f"Servicio {self.rng.randrange(1000, 9999)}",
+                'description': None,
+                'start_date': start.date().isoformat(),
+                'expiration_date': (start + timedelta(days=365)).date().isoformat(),
+                'billing_period': self.rng.choice(BILLING_PERIODS),
+                'cost': f"{self.rng.randrange(10, 500)}.00",
+                'external_provider': None,
+                'associated_domain': None,
+                'panel_access_data': None,
+                'licenses_quantity': self.rng.randrange(1, 50),
+                'created_at': start.isoformat(),
+            }
+
+    def contracts(self):
+        for company_id, service_ids in self.service_ids_by_company.items():
+            service_id = service_ids[0]
+            start = self._timestamp()
+            end = start + timedelta(days=365 * self.rng.choice([1, 2]))
+            yield {
+                'id': self._uuid(),
+                'company_id': company_id,
+                'service_id': service_id,
+                'start_date': start.date().isoformat(),
+                'end_date': end.date().isoformat(),
+                'sla_hours': self.rng.choice([4, 8, 24, 48]),
+                'terms': 'Soporte técnico según contrato de servicio.',
+                'status': 'active' if end > self.end_date else 'expired',
+                'created_at': start.isoformat(),
+            }
+
+    def tickets(self):
+        for _ in range(self.counts['tickets']):
+            ticket_id = self._uuid()
+            company_id = self._company()
+            self.ticket_ids.append(ticket_id)
+            assets = self.asset_ids_by_company.get(company_id)
+            status = self._choice(TICKET_STATUSES)
+            created_at = self._timestamp()
+            resolved_at = None
+            updated_at = created_at
+            if status in ('resolved', 'closed'):
+                resolved_at = min(created_at + timedelta(minutes=int(self.rng.expovariate(1 / 1440)) + 5), self.end_date)
+                updated_at = resolved_at
+            assigned_to = None
+            if status != 'open' or self.rng.random() < 0.5:
+                assigned_to = self.rng.choice(self.technician_ids)
+            yield {
+                'id': ticket_id,
+                'asset_id': self.rng.choice(assets) if assets and self.rng.random() < 0.7 else None,
+                'company_id': company_id,
+                'service_id': None,
+                'title': self.rng.choice(TICKET_SUBJECTS),
+                'category': self._choice(TICKET_CATEGORIES),
+                'priority': self._choice(TICKET_PRIORITIES),
+                'status': status,
+                'requester': f"Usuario {self.rng.randrange(1, 200)}",
+                'assigned_to': assigned_to,
+                'created_by': self.client_user_ids.get(company_id) or self.rng.choice(self.technician_ids),
+                'description': self.rng.choice(TICKET_SUBJECTS) + '. ' + self.rng.choice(NOTE_TEXTS),
+                'maintenance_log': None,
+                'final_resolution': self.rng.choice(RESOLUTIONS) if resolved_at else None,
+                'created_at': created_at.isoformat(),
+                'updated_at': updated_at.isoformat(),
+                'resolved_at': resolved_at.isoformat() if resolved_at else None,
+            }
+
+    def ticket_notes(self):
+        for _ in range(self.counts['ticket_notes']):
+            yield {
+                'id': self._uuid(),
+                'ticket_id': self.rng.choice(self.ticket_ids),
+                'user_id': self.rng.choice(self.technician_ids),
+                'note': self.rng.choice(NOTE_TEXTS),
+                'created_at': self._timestamp().isoformat(),
+            }
+
+    def collections(self):
+        """Yield (collection_name, document_iterator) in dependency order."""
+        yield 'companies', self.companies()
+        yield 'users', self.users()
+        yield 'assets', self.assets()
+        yield 'services', self.services()
+        yield 'contracts', self.contracts()
+        yield 'tickets', self.tickets()
+        yield 'ticket_notes', self.ticket_notes()
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_into_mongo(generator, mongo_url, db_name, batch_size, drop=False):
+    from pymongo import MongoClient
+
+    client = MongoClient(mongo_url)
+    db = client[db_name]
+    try:
+        for name, docs in generator.collections():
+            if drop:
+                db[name].drop()
+            started = time.perf_counter()
+            total = 0
+            for batch in batched(docs, batch_size):
+                # insert_many adds an _id to each dict; the docs are not reused
+                db[name].insert_many(batch, ordered=False, bypass_document_validation=True)
+                total += len(batch)
+            report(name, total, time.perf_counter() - started)
+    finally:
+        client.close()
+
+
+def write_ndjson(generator, output_dir, batch_size):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, docs in generator.collections():
+        started = time.perf_counter()
+        total = 0
+        with open(output_dir / f"{name}.ndjson", 'w', encoding='utf-8') as f:
+            for batch in batched(docs, batch_size):
+                f.write('\n'.join(json.dumps(doc, ensure_ascii=False) for doc in batch))
+                f.write('\n')
+                total += len(batch)
+        report(name, total, time.perf_counter() - started)
+
+
+def report(name, total, elapsed):
+    rate = total / elapsed * 60 if elapsed > 0 else 0
+    print(f"{name:<14} {total:>10,} docs  {elapsed:8.1f}s  {rate:>12,.0f} docs/min", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic ITSM data")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--mongo', action='store_true', help="Bulk-load into MONGO_URL / DB_NAME")
+    target.add_argument('--ndjson', metavar='DIR', help="Write one NDJSON file per collection to DIR")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="Multiplier applied to the default volumes (1.0 = 500 companies, 2M tickets)")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--end-date', help="Last timestamp of generated history (YYYY-MM-DD), default 2025-01-01")
+    parser.add_argument('--drop', action='store_true', help="Drop each collection before loading (--mongo only)")
+    args = parser.parse_args(argv)
+
+    end_date = None
+    if args.end_date:
+        end_date = datetime.fromisoformat(args.end_date).replace(tzinfo=timezone.utc)
+    generator = DataGenerator(seed=args.seed, scale=args.scale, end_date=end_date)
+
+    if args.mongo:
+        from dotenv import load_dotenv
+        load_dotenv(ROOT_DIR / '.env')
+        load_into_mongo(generator, os.environ['MONGO_URL'], os.environ['DB_NAME'], args.batch_size, drop=args.drop)
+    else:
+        write_ndjson(generator, args.ndjson, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
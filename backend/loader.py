@@ -0,0 +1,78 @@
+"""
+Request coalescing for by-key document lookups.
+
+``BatchLoader.load(key)`` does not query right away: every key requested
+during the same event-loop tick (from any request) is collected and fetched
+with a single ``{field: {"$in": keys}}`` query. A key that is already pending
+or in flight is not requested again; callers share the same result. Nothing
+is cached once the query returns, so callers never see data older than the
+query they waited for.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+
+class BatchLoader:
+    def __init__(self, collection, field: str = 'id', projection: Optional[dict] = None,
+                 query: Optional[dict] = None, many: bool = False, max_batch_size: int = 1000):
+        """``many=True`` resolves each key to the list of all matching documents
+        (e.g. contracts by company) instead of a single document or ``None``."""
+        self.collection = collection
+        self.field = field
+        self.projection = projection or {"_id": 0}
+        self.query = query or {}
+        self.many = many
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+        self.counters = {'loads': 0, 'coalesced': 0, 'queries': 0, 'keys_fetched': 0}
+
+    async def load(self, key: str):
+        self.counters['loads'] += 1
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        # Shielded so a cancelled request doesn't cancel the lookup for everyone else waiting on it
+        result = await asyncio.shield(future)
+        return [dict(doc) for doc in result] if self.many else (dict(result) if result else None)
+
+    async def load_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        unique = list(dict.fromkeys(key for key in keys if key is not None))
+        results = await asyncio.gather(*(self.load(key) for key in unique))
+        return dict(zip(unique, results))
+
+    async def _dispatch(self):
+        self._dispatch_scheduled = False
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        keys = list(batch)
+        try:
+            for start in range(0, len(keys), self.max_batch_size):
+                chunk = keys[start:start + self.max_batch_size]
+                self.counters['queries'] += 1
+                self.counters['keys_fetched'] += len(chunk)
+                docs = await self.collection.find({**self.query, self.field: {"$in": chunk}}, self.projection).to_list(None)
+                found: Dict[str, List[dict]] = {}
+                for doc in docs:
+                    found.setdefault(doc.get(self.field), []).append(doc)
+                for key in chunk:
+                    matches = found.get(key, [])
+                    batch[key].set_result(matches if self.many else (matches[0] if matches else None))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            for key in keys:
+                self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {**self.counters, 'round_trips_saved': self.counters['loads'] - self.counters['queries']}
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Email-to-ticket ingestion worker.
+
+Runs as its own process next to the API (it never imports ``server``) and
+takes mail from a local SMTP listener, a maildir drop folder, or both:
+
+    python mail_ingest.py --smtp 127.0.0.1:2525
+    python mail_ingest.py --maildir /var/mail/itsm --workers 4
+
+Messages are collected into batches and parsed in a process pool. Each batch
+is then written with a few bulk queries:
+
+- replies whose subject contains an existing ticket id (``Re: [#<id>] ...``)
+  become ``ticket_notes`` on that ticket when they come from staff, from a
+  user of the ticket's company, or from an unknown sender on that company's
+  domain;
+- other mail from a known company domain becomes a new open ticket; the
+  domain comes from the company's optional ``email_domains`` list or its
+  contact ``email``, unless that is a public webmail provider or claimed by
+  more than one company;
+- everything else, including replies to another company's ticket, lands in
+  ``mail_quarantine`` for a dispatcher to review.
+
+New tickets are queued as ``ticket.created`` webhook events in the same outbox
+the API delivers from.
+
+Message-IDs of ingested mail are recorded in ``mail_ingest_log`` so a
+redelivered message is skipped. SMTP clients get their 250 only once the
+batch holding their message is written, and maildir files are moved to
+``cur/`` only after that, so nothing acknowledged is lost.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email import policy
+from email.parser import BytesParser
+from email.utils import getaddresses, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from webhooks import WebhookDispatcher
+
+ROOT_DIR = Path(__file__).parent
+logger = logging.getLogger('mail_ingest')
+
+TICKET_REF = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]+>')
+MAX_TITLE_LENGTH = 200
+MAX_BODY_LENGTH = 20000
+# Mail from senders that aren't users is attributed to this user id
+INGEST_USER_ID = os.environ.get('MAIL_INGEST_USER_ID', 'mail-ingest')
+STAFF_ROLES = ('admin', 'technician')
+# A contact address on one of these says nothing about who else writes from the domain
+PUBLIC_MAIL_DOMAINS = frozenset(
+    ['gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'msn.com', 'yahoo.com',
+     'yahoo.es', 'icloud.com', 'me.com', 'aol.com', 'proton.me', 'protonmail.com', 'gmx.com', 'zoho.com']
+    + os.environ.get('MAIL_PUBLIC_DOMAINS', '').lower().split()
+)
+DUPLICATE_KEY = 11000
+
+
+# Parsing runs in worker processes; these functions must stay importable without side effects
+
+def message_text(message) -> str:
+    body = message.get_body(preferencelist=('plain', 'html'))
+    if body is None:
+        return ''
+    try:
+        text = body.get_content()
+    except (LookupError, UnicodeDecodeError):
+        text = body.get_payload(decode=True).decode('utf-8', errors='replace')
+    if body.get_content_subtype() == 'html':
+        text = HTML_TAG.sub(' ', text)
+    return text.strip()
+
+
+def strip_quoted(text: str) -> str:
+    """Drop the quoted previous message from a reply so notes only hold the new text."""
+    lines = []
+    for line in text.splitlines():
+        if line.startswith('>'):
+            continue
+        if re.match(r'^(On .+ wrote:|El .+ escribió:|-----Original Message-----)$', line.strip()):
+            break
+        lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def parse_message(raw: bytes) -> dict:
+    message = BytesParser(policy=policy.default).parsebytes(raw)
+    addresses = getaddresses([str(message.get('From', ''))])
+    from_name, from_address = addresses[0] if addresses else ('', '')
+    from_address = from_address.lower()
+    subject = ' '.join(str(message.get('Subject', '')).split())
+    try:
+        sent_at = parsedate_to_datetime(str(message['Date'])).astimezone(timezone.utc) if message['Date'] else None
+    except (TypeError, ValueError):
+        sent_at = None
+    ref = TICKET_REF.search(subject)
+    return {
+        'message_id': str(message.get('Message-ID', '')).strip() or 'sha256:' + hashlib.sha256(raw).hexdigest(),
+        'from_name': from_name,
+        'from_address': from_address,
+        'domain': from_address.rpartition('@')[2],
+        'subject': subject,
+        'body': message_text(message)[:MAX_BODY_LENGTH],
+        'ticket_ref': ref.group().lower() if ref else None,
+        'sent_at': sent_at.isoformat() if sent_at else None,
+    }
+
+
+def parse_batch(raws: List[bytes]) -> List[Optional[dict]]:
+    parsed = []
+    for raw in raws:
+        try:
+            parsed.append(parse_message(raw))
+        except Exception:
+            parsed.append(None)
+    return parsed
+
+
+class MongoSink:
+    def __init__(self, db, domain_refresh_seconds: float = 60):
+        self.db = db
+        self.domain_refresh_seconds = domain_refresh_seconds
+        self._domains: Dict[str, str] = {}
+        self._domains_loaded_at = 0.0
+        # Only queues events; the API's dispatcher delivers them
+        self.webhooks = WebhookDispatcher(db.webhook_subscriptions, db.webhook_outbox)
+        self._subscriptions_loaded_at = 0.0
+
+    async def ensure_indexes(self):
+        await self.db.mail_ingest_log.create_index("message_id", unique=True)
+        await self.db.mail_quarantine.create_index("received_at")
+
+    async def company_for_domain(self, domain: str) -> Optional[str]:
+        if time.monotonic() - self._domains_loaded_at > self.domain_refresh_seconds:
+            explicit, contact = {}, {}
+            async for company in self.db.companies.find({}, {"_id": 0, "id": 1, "email": 1, "email_domains": 1}):
+                for value in company.get('email_domains') or []:
+                    explicit.setdefault(value.rpartition('@')[2].strip().lower(), set()).add(company['id'])
+                domain_name = (company.get('email') or '').rpartition('@')[2].strip().lower()
+                if domain_name not in PUBLIC_MAIL_DOMAINS:
+                    contact.setdefault(domain_name, set()).add(company['id'])
+            # Explicit domains win; a domain claimed by several companies maps to none of them
+            owners = {**contact, **explicit}
+            self._domains = {
+                domain_name: next(iter(ids)) for domain_name, ids in owners.items() if domain_name and len(ids) == 1
+            }
+            self._domains_loaded_at = time.monotonic()
+        return self._domains.get(domain)
+
+    async def emit_ticket_created(self, tickets: List[dict]):
+        if time.monotonic() - self._subscriptions_loaded_at > self.domain_refresh_seconds:
+            await self.webhooks.load_subscriptions()
+            self._subscriptions_loaded_at = time.monotonic()
+        await self.webhooks.emit_many('ticket.created', [
+            ({'ticket': {key: value for key, value in ticket.items() if key != '_id'}}, ticket['company_id'])
+            for ticket in tickets
+        ])
+
+    async def already_ingested(self, message_ids: List[str]) -> set:
+        docs = await self.db.mail_ingest_log.find(
+            {"message_id": {"$in": message_ids}}, {"_id": 0, "message_id": 1}
+        ).to_list(len(message_ids))
+        return {doc['message_id'] for doc in docs}
+
+    async def mark_ingested(self, message_ids: List[str]):
+        # Recorded after the writes: a crash in between means a redelivered message is
+        # ingested again, never that an acknowledged one is dropped
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            await self.db.mail_ingest_log.insert_many(
+                [{"message_id": mid, "received_at": now} for mid in message_ids], ordered=False
+            )
+        except BulkWriteError as e:
+            if any(err['code'] != DUPLICATE_KEY for err in e.details['writeErrors']):
+                raise
+
+    async def write(self, messages: List[dict]) -> Dict[str, int]:
+        counts = {'tickets': 0, 'notes': 0, 'quarantined': 0, 'duplicates': 0}
+        seen = await self.already_ingested(list({m['message_id'] for m in messages}))
+        # Also drops repeats of the same Message-ID within the batch
+        unique = {}
+        for m in messages:
+            if m['message_id'] not in seen:
+                unique.setdefault(m['message_id'], m)
+        counts['duplicates'] = len(messages) - len(unique)
+        messages = list(unique.values())
+        if not messages:
+            return counts
+
+        refs = list({m['ticket_ref'] for m in messages if m['ticket_ref']})
+        tickets = {
+            t['id']: t for t in await self.db.tickets.find(
+                {"id": {"$in": refs}}, {"_id": 0, "id": 1, "company_id": 1}
+            ).to_list(len(refs))
+        } if refs else {}
+        senders = list({m['from_address'] for m in messages})
+        users = {
+            u['email'].lower(): u for u in await self.db.users.find(
+                {"email": {"$in": senders}}, {"_id": 0, "id": 1, "email": 1, "role": 1, "company_id": 1}
+            ).to_list(len(senders))
+        }
+
+        now = datetime.now(timezone.utc).isoformat()
+        new_tickets, notes, quarantined = [], [], []
+        for m in messages:
+            user = users.get(m['from_address'])
+            user_id = user['id'] if user else INGEST_USER_ID
+            company_id = await self.company_for_domain(m['domain'])
+            ticket = tickets.get(m['ticket_ref'])
+            if ticket and not self.may_reply(user, company_id, ticket):
+                # Anyone can copy a ticket id into a subject; a dispatcher decides
+                quarantined.append({**m, 'id': str(uuid.uuid4()), 'received_at': now, 'reason': 'reply_not_allowed'})
+                continue
+            if ticket:
+                notes.append({
+                    'id': str(uuid.uuid4()),
+                    'ticket_id': m['ticket_ref'],
+                    'user_id': user_id,
+                    'note': strip_quoted(m['body']) or m['subject'],
+                    'created_at': now,
+                })
+                continue
+            if company_id is None:
+                quarantined.append({**m, 'id': str(uuid.uuid4()), 'received_at': now, 'reason': 'unknown_domain'})
+                continue
+            new_tickets.append({
+                'id': str(uuid.uuid4()),
+                'asset_id': None,
+                'company_id': company_id,
+                'service_id': None,
+                'title': (m['subject'] or '(sin asunto)')[:MAX_TITLE_LENGTH],
+                'category': None,
+                'priority': None,
+                'status': 'open',
+                'requester': f"{m['from_name']} <{m['from_address']}>" if m['from_name'] else m['from_address'],
+                'assigned_to': None,
+                'created_by': user_id,
+                'description': m['body'] or m['subject'],
+                'maintenance_log': None,
+                'final_resolution': None,
+                'created_at': now,
+                'updated_at': now,
+                'version': 1,
+                'resolved_at': None,
+            })
+
+        if new_tickets:
+            await self.db.tickets.insert_many(new_tickets, ordered=False)
+            await self.bump_ticket_stats(new_tickets)
+            await self.emit_ticket_created(new_tickets)
+        if notes:
+            await self.db.ticket_notes.insert_many(notes, ordered=False)
+        if quarantined:
+            await self.db.mail_quarantine.insert_many(quarantined, ordered=False)
+        await self.mark_ingested([m['message_id'] for m in messages])
+        counts.update(tickets=len(new_tickets), notes=len(notes), quarantined=len(quarantined))
+        return counts
+
+    @staticmethod
+    def may_reply(user: Optional[dict], company_id: Optional[str], ticket: dict) -> bool:
+        # Staff, users of the ticket's company, and unknown senders from its domain
+        if user:
+            return user.get('role') in STAFF_ROLES or user.get('company_id') == ticket['company_id']
+        return company_id is not None and company_id == ticket['company_id']
+
+    async def bump_ticket_stats(self, tickets: List[dict]):
+        # Same counters the API keeps in the stats collection (see bump_stats in stats.py)
+        per_company: Dict[str, int] = {}
+        for ticket in tickets:
+            per_company[ticket['company_id']] = per_company.get(ticket['company_id'], 0) + 1
+        per_company['__all__'] = len(tickets)
+        await self.db.stats.bulk_write([
+            UpdateOne({"company_id": cid}, {"$inc": {"tickets.total": count, "tickets.open": count}}, upsert=True)
+            for cid, count in per_company.items()
+        ], ordered=False)
+        await self.db.data_versions.update_one({"id": "tickets"}, {"$inc": {"version": 1}}, upsert=True)
+
+
+class Ingestor:
+    """Batches incoming raw messages, parses them in a process pool and writes them through the sink.
+
+    ``submit`` returns once the message is stored (or raises), so sources can
+    acknowledge only what has been written.
+    """
+
+    def __init__(self, sink: MongoSink, executor, batch_size: int = 200, batch_seconds: float = 0.5,
+                 idle_seconds: float = 0.02, concurrency: int = 4, max_queue: int = 10000):
+        self.sink = sink
+        self.executor = executor
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        # SMTP clients wait for their 250 before sending more, so once arrivals pause the batch is
+        # as full as it will get; waiting out batch_seconds would only add latency
+        self.idle_seconds = idle_seconds
+        self.concurrency = concurrency
+        # Bounded so a burst applies backpressure to SMTP clients instead of exhausting memory
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.counters = {'received': 0, 'tickets': 0, 'notes': 0, 'quarantined': 0, 'duplicates': 0,
+                         'unparseable': 0, 'batches': 0, 'failed_batches': 0}
+
+    async def submit(self, raw: bytes):
+        done = asyncio.get_running_loop().create_future()
+        await self.queue.put((raw, done))
+        self.counters['received'] += 1
+        await done
+
+    async def run(self):
+        await asyncio.gather(*(self._batch_loop() for _ in range(self.concurrency)))
+
+    async def _next_batch(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), min(timeout, self.idle_seconds)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            try:
+                parsed = await loop.run_in_executor(self.executor, parse_batch, [raw for raw, _ in batch])
+                messages = [message for message in parsed if message is not None]
+                self.counters['unparseable'] += len(parsed) - len(messages)
+                counts = await self.sink.write(messages)
+                for key, value in counts.items():
+                    self.counters[key] += value
+                self.counters['batches'] += 1
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+            except Exception as e:
+                logger.exception("Batch of %d messages failed", len(batch))
+                self.counters['failed_batches'] += 1
+                for _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+
+
+class SMTPServer:
+    """Just enough SMTP (RFC 5321) for local MTAs and test clients to hand over mail."""
+
+    def __init__(self, ingestor: Ingestor, hostname: str = 'itsm-ingest', max_message_bytes: int = 25 * 1024 * 1024):
+        self.ingestor = ingestor
+        self.hostname = hostname
+        self.max_message_bytes = max_message_bytes
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info("SMTP listening on %s:%d", host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(line: str):
+            writer.write(line.encode('ascii') + b'\r\n')
+            await writer.drain()
+
+        mail_from, recipients = None, []
+        try:
+            await reply(f"220 {self.hostname} ESMTP ready")
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit; readline has already discarded it
+                    await reply("500 Line too long")
+                    continue
+                if not line:
+                    break
+                command, _, argument = line.decode('latin-1').strip().partition(' ')
+                command = command.upper()
+                if command in ('HELO', 'EHLO'):
+                    if command == 'EHLO':
+                        await reply(f"250-{self.hostname}")
+                        await reply(f"250-SIZE {self.max_message_bytes}")
+                        await reply("250 8BITMIME")
+                    else:
+                        await reply(f"250 {self.hostname}")
+                elif command == 'MAIL':
+                    mail_from, recipients = argument, []
+                    await reply("250 OK")
+                elif command == 'RCPT':
+                    if mail_from is None:
+                        await reply("503 Need MAIL first")
+                        continue
+                    recipients.append(argument)
+                    await reply("250 OK")
+                elif command == 'DATA':
+                    if not recipients:
+                        await reply("503 Need RCPT first")
+                        continue
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    raw = await self.read_data(reader)
+                    mail_from, recipients = None, []
+                    if raw is None:
+                        await reply("552 Message exceeds fixed maximum message size or line length")
+                        continue
+                    try:
+                        await self.ingestor.submit(raw)
+                    except Exception:
+                        await reply("451 Temporary failure, try again later")
+                        continue
+                    await reply("250 OK queued")
+                elif command == 'RSET':
+                    mail_from, recipients = None, []
+                    await reply("250 OK")
+                elif command == 'NOOP':
+                    await reply("250 OK")
+                elif command == 'QUIT':
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_data(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """Read the DATA section, undoing dot-stuffing; None if it exceeds the size or line limit."""
+        lines, size = [], 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Keep reading up to the terminating dot so the session stays in sync
+                size = self.max_message_bytes + 1
+                continue
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            if line in (b'.\r\n', b'.\n'):
+                break
+            if line.startswith(b'.'):
+                line = line[1:]
+            size += len(line)
+            if size <= self.max_message_bytes:
+                lines.append(line)
+        return b''.join(lines) if size <= self.max_message_bytes else None
+
+
+async def watch_maildir(ingestor: Ingestor, root: Path, poll_seconds: float = 2.0, concurrency: Optional[int] = None):
+    """Ingest files delivered to ``root/new`` and move each to ``root/cur`` once stored.
+
+    At most ``concurrency`` files are read and waiting on the ingestor at once;
+    by default enough to fill every batch the ingestor can write in parallel.
+    """
+    new_dir, cur_dir = root / 'new', root / 'cur'
+    for directory in (new_dir, cur_dir, root / 'tmp'):
+        directory.mkdir(parents=True, exist_ok=True)
+    concurrency = concurrency or ingestor.batch_size * ingestor.concurrency
+    pending: asyncio.Queue = asyncio.Queue()
+    queued = set()
+
+    async def worker():
+        while True:
+            name = await pending.get()
+            path = new_dir / name
+            try:
+                raw = await asyncio.to_thread(path.read_bytes)
+                await ingestor.submit(raw)
+                await asyncio.to_thread(os.replace, path, cur_dir / (name + ':2,S'))
+            except Exception:
+                logger.exception("Could not ingest %s; will retry", name)
+            finally:
+                queued.discard(name)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        while True:
+            names = await asyncio.to_thread(os.listdir, new_dir)
+            for name in names:
+                if name not in queued and not name.startswith('.'):
+                    queued.add(name)
+                    pending.put_nowait(name)
+            await asyncio.sleep(poll_seconds)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def log_counters(ingestor: Ingestor, interval: float = 30):
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("Ingest counters: %s", ingestor.counters)
+
+
+async def run(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    sink = MongoSink(client[os.environ['DB_NAME']])
+    await sink.ensure_indexes()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        ingestor = Ingestor(sink, executor, batch_size=args.batch_size, batch_seconds=args.batch_seconds,
+                            concurrency=args.workers)
+        tasks = [ingestor.run(), log_counters(ingestor)]
+        if args.smtp:
+            host, _, port = args.smtp.rpartition(':')
+            tasks.append(SMTPServer(ingestor).serve(host or '127.0.0.1', int(port)))
+        if args.maildir:
+            tasks.append(watch_maildir(ingestor, Path(args.maildir), args.poll_seconds))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Turn incoming email into tickets and ticket notes")
+    parser.add_argument('--smtp', metavar='HOST:PORT', help="Listen for SMTP, e.g. 127.0.0.1:2525")
+    parser.add_argument('--maildir', help="Maildir to watch for delivered messages")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Parser processes")
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--batch-seconds', type=float, default=0.5, help="Longest a message waits for its batch to fill")
+    parser.add_argument('--poll-seconds', type=float, default=2.0)
+    args = parser.parse_args(argv)
+    if not args.smtp and not args.maildir:
+        parser.error("give --smtp and/or --maildir")
+
+    from dotenv import load_dotenv
+    load_dotenv(ROOT_DIR / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
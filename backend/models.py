@@ -0,0 +1,406 @@
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from typing import Optional, List, Dict, Any
+import uuid
+from datetime import datetime, timezone
+
+
+class User(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    email: EmailStr
+    name: str
+    role: str  # admin, technician, client
+    company_id: Optional[str] = None  # For client role
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class UserCreate(BaseModel):
+    email: EmailStr
+    password: str
+    name: str
+    role: str
+    company_id: Optional[str] = None
+
+class LoginRequest(BaseModel):
+    email: EmailStr
+    password: str
+
+class Company(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    contact_person: str
+    email: EmailStr
+    phone: str
+    address: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1  # Se incrementa en cada PUT; se expone como ETag
+
+class CompanyCreate(BaseModel):
+    name: str
+    contact_person: str
+    email: EmailStr
+    phone: str
+    address: str
+
+class Asset(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    company_id: str
+    
+    # I. Información Básica
+    asset_type: Optional[str] = None  # Tipo de Activo
+    manufacturer: Optional[str] = None  # Fabricante
+    model: Optional[str] = None  # Modelo
+    serial_number: Optional[str] = None  # Número de Serie (S/N)
+    host_name: Optional[str] = None  # Nombre Host
+    
+    # Credenciales Windows
+    windows_user: Optional[str] = None
+    windows_password: Optional[str] = None
+    
+    # Correos electrónicos
+    email_accounts: Optional[str] = None  # Correos y contraseñas (JSON o texto)
+    
+    # Usuario Nube y Respaldo
+    cloud_user: Optional[str] = None
+    backup_folder: Optional[str] = None
+    
+    # II. Operación y Ubicación
+    location: Optional[str] = None  # Ubicación Física
+    status: str = "active"  # Estado del Activo (active, retired, in_repair)
+    ip_address: Optional[str] = None  # Dirección IP
+    operating_system: Optional[str] = None  # Sistema Operativo
+    os_version: Optional[str] = None  # Versión SO
+    
+    # III. Especificaciones Técnicas (Hardware)
+    cpu_processor: Optional[str] = None  # CPU/Procesador
+    ram_gb: Optional[str] = None  # Memoria RAM (GB)
+    storage_type_capacity: Optional[str] = None  # Almacenamiento (Tipo/Capacidad)
+    graphics_card: Optional[str] = None  # Tarjeta Gráfica/GPU
+    network_ports: Optional[str] = None  # Puertos de Red
+    
+    # IV. Gestión Financiera y Soporte
+    purchase_date: Optional[str] = None  # Fecha de Compra
+    purchase_value: Optional[str] = None  # Valor de Compra
+    warranty_expiration: Optional[str] = None  # Fecha Vencimiento Garantía
+    support_provider: Optional[str] = None  # Proveedor de Soporte
+    estimated_life_months: Optional[int] = None  # Vida Útil Estimada (Meses)
+    
+    notes: Optional[str] = None  # Notas Adicionales
+    
+    # Campos derivados (normalizados al guardar)
+    expires_at: Optional[datetime] = None  # warranty_expiration como fecha
+    expiry_parser_version: Optional[int] = None  # Versión del parser que calculó expires_at
+    ram_gb_num: Optional[float] = None  # ram_gb en GB
+    storage_capacity_gb: Optional[float] = None  # Suma de las unidades de storage_type_capacity
+    purchase_value_num: Optional[float] = None  # purchase_value como número
+    purchase_date_at: Optional[datetime] = None  # purchase_date como fecha
+    spec_parser_version: Optional[int] = None  # Versión de los parsers que calcularon estos campos
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class AssetCreate(BaseModel):
+    company_id: str
+    
+    # I. Información Básica
+    asset_type: Optional[str] = None
+    manufacturer: Optional[str] = None
+    model: Optional[str] = None
+    serial_number: Optional[str] = None
+    host_name: Optional[str] = None
+    
+    # Credenciales Windows
+    windows_user: Optional[str] = None
+    windows_password: Optional[str] = None
+    
+    # Correos electrónicos
+    email_accounts: Optional[str] = None
+    
+    # Usuario Nube y Respaldo
+    cloud_user: Optional[str] = None
+    backup_folder: Optional[str] = None
+    
+    # II. Operación y Ubicación
+    location: Optional[str] = None
+    status: str = "active"
+    ip_address: Optional[str] = None
+    operating_system: Optional[str] = None
+    os_version: Optional[str] = None
+    
+    # III. Especificaciones Técnicas (Hardware)
+    cpu_processor: Optional[str] = None
+    ram_gb: Optional[str] = None
+    storage_type_capacity: Optional[str] = None
+    graphics_card: Optional[str] = None
+    network_ports: Optional[str] = None
+    
+    # IV. Gestión Financiera y Soporte
+    purchase_date: Optional[str] = None
+    purchase_value: Optional[str] = None
+    warranty_expiration: Optional[str] = None
+    support_provider: Optional[str] = None
+    estimated_life_months: Optional[int] = None
+    
+    notes: Optional[str] = None
+
+class Ticket(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    
+    # Relaciones
+    asset_id: Optional[str] = None  # ID_Activo_Afectado
+    company_id: str  # Empresa_Cliente
+    service_id: Optional[str] = None  # Servicio_Contratado_Afectado
+    
+    # Información del Ticket
+    title: str  # Titulo_Ticket
+    category: Optional[str] = None  # Categoria
+    priority: Optional[str] = None  # Prioridad (Baja, Media, Alta, Crítica)
+    status: str = "open"  # Estado (open, in_progress, resolved, closed)
+    
+    # Personas
+    requester: Optional[str] = None  # Solicitante
+    assigned_to: Optional[str] = None  # Asignado_a_Tecnico (User ID)
+    created_by: str  # User ID
+    
+    # Descripciones
+    description: str  # Descripcion_del_Problema
+    maintenance_log: Optional[str] = None  # Bitacora_Mantenimiento
+    final_resolution: Optional[str] = None  # Resolucion_Final
+    
+    # Ticket abierto casi idéntico detectado al crearlo
+    duplicate_of: Optional[str] = None
+    duplicate_score: Optional[float] = None
+    
+    # Fechas
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))  # Fecha_Creacion
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+    resolved_at: Optional[datetime] = None  # Fecha_Hora_Resolucion
+    archived_at: Optional[datetime] = None  # Movido a tickets_archive (solo lectura)
+
+class TicketCreate(BaseModel):
+    company_id: str
+    asset_id: Optional[str] = None
+    service_id: Optional[str] = None
+    title: str
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    requester: Optional[str] = None
+    assigned_to: Optional[str] = None
+    description: str
+    maintenance_log: Optional[str] = None
+
+class TicketUpdate(BaseModel):
+    status: Optional[str] = None
+    assigned_to: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    requester: Optional[str] = None
+    maintenance_log: Optional[str] = None
+    final_resolution: Optional[str] = None
+    duplicate_of: Optional[str] = None
+
+class ResolutionQuery(BaseModel):
+    title: str
+    description: str = ''
+    limit: int = 5
+
+class TicketNote(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    ticket_id: str
+    user_id: str
+    note: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TicketNoteCreate(BaseModel):
+    ticket_id: str
+    note: str
+
+class Attachment(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    ticket_id: str
+    note_id: Optional[str] = None
+    company_id: str
+    filename: str
+    content_type: str
+    size: int = 0
+    sha256: str = ''
+    uploaded_by: str
+    thumbnails: List[int] = Field(default_factory=list)  # Tamaños ya generados
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class Service(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    
+    # Relaciones
+    company_id: str  # Empresa_Cliente
+    
+    # Información del Servicio
+    service_type: Optional[str] = None  # Tipo_de_Servicio (Web Hosting, VPS, Email, Licencias, etc.)
+    service_name: str  # Nombre_Servicio_Específico
+    description: Optional[str] = None  # Descripción_Detallada
+    
+    # Fechas y Facturación
+    start_date: Optional[str] = None  # Fecha_Inicio_Contrato
+    expiration_date: Optional[str] = None  # Fecha_Vencimiento_Contrato
+    billing_period: Optional[str] = None  # Periodo_Facturacion (Mensual, Trimestral, Anual)
+    cost: Optional[str] = None  # Costo_Mensual_o_Total
+    
+    # Proveedor y Acceso
+    external_provider: Optional[str] = None  # Proveedor_Externo
+    associated_domain: Optional[str] = None  # Dominio_Asociado
+    panel_access_data: Optional[str] = None  # Datos_Acceso_Panel
+    licenses_quantity: Optional[int] = None  # Licencias_Cantidad
+    
+    expires_at: Optional[datetime] = None  # expiration_date como fecha
+    expiry_parser_version: Optional[int] = None  # Versión del parser que calculó expires_at
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class ServiceCreate(BaseModel):
+    company_id: str
+    service_type: Optional[str] = None
+    service_name: str
+    description: Optional[str] = None
+    start_date: Optional[str] = None
+    expiration_date: Optional[str] = None
+    billing_period: Optional[str] = None
+    cost: Optional[str] = None
+    external_provider: Optional[str] = None
+    associated_domain: Optional[str] = None
+    panel_access_data: Optional[str] = None
+    licenses_quantity: Optional[int] = None
+
+class Contract(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    company_id: str
+    service_id: str
+    start_date: str
+    end_date: str
+    sla_hours: int  # Response time in hours
+    calendar_id: Optional[str] = None  # Calendario laboral del SLA; sin calendario cuenta 24x7
+    terms: str
+    status: str  # active, expired, cancelled
+    expires_at: Optional[datetime] = None  # end_date como fecha
+    expiry_parser_version: Optional[int] = None  # Versión del parser que calculó expires_at
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class ContractCreate(BaseModel):
+    company_id: str
+    service_id: str
+    start_date: str
+    end_date: str
+    sla_hours: int
+    calendar_id: Optional[str] = None
+    terms: str
+    status: str
+
+class SLACalendar(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    timezone: str = "Europe/Madrid"
+    # {"mon": ["09:00-14:00", "15:00-18:00"], ...}; días sin entrada no son laborables
+    working_hours: Dict[str, List[str]]
+    holidays: List[str] = []  # YYYY-MM-DD
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class SLACalendarCreate(BaseModel):
+    name: str
+    timezone: str = "Europe/Madrid"
+    working_hours: Dict[str, List[str]]
+    holidays: List[str] = []
+
+class SystemConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = "system_config"
+    logo_base64: Optional[str] = None
+    company_name: str = "ITSM System"
+    custom_fields: Dict[str, Any] = Field(default_factory=dict)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class SystemConfigUpdate(BaseModel):
+    logo_base64: Optional[str] = None
+    company_name: Optional[str] = None
+    custom_fields: Optional[Dict[str, Any]] = None
+
+class WebhookSubscription(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    url: str
+    events: List[str]  # ticket.created, ticket.updated, ticket.deleted, sla.warning, sla.breached
+    company_id: Optional[str] = None  # Solo eventos de esta empresa; None = todas
+    secret: Optional[str] = None  # Firma HMAC de cada envío; solo se muestra al crear
+    batch_size: int = 1  # >1 agrupa hasta ese número de eventos por petición
+    active: bool = True
+    created_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 1
+
+class WebhookSubscriptionCreate(BaseModel):
+    url: str
+    events: List[str]
+    company_id: Optional[str] = None
+    batch_size: int = 1
+    active: bool = True
+
+class WebhookDelivery(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    subscription_id: str
+    event: Dict[str, Any]
+    status: str  # pending, sending, delivered, failed
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    last_status_code: Optional[int] = None
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+
+class Job(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    type: str  # company_delete
+    target_id: str
+    status: str = "pending"  # pending, running, completed, failed
+    progress: Dict[str, int] = Field(default_factory=dict)  # deleted documents per collection
+    error: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+class ReportJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    report_type: str  # tickets, assets
+    filters: Dict[str, str] = Field(default_factory=dict)
+    fingerprint: str
+    status: str = "queued"  # queued, running, completed, failed
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    cached: bool = False  # True when served from a previously rendered report
+    created_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+class ReportJobCreate(BaseModel):
+    report_type: str
+    filters: Dict[str, Optional[str]] = Field(default_factory=dict)
@@ -0,0 +1,109 @@
+"""
+Parsers that turn the free-form text fields users type into typed values.
+
+Each parser returns ``None`` when the input is empty or can't be understood, so
+callers can store the result next to the original string without rejecting
+the write.
+"""
+
+import calendar
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+from dateutil import parser as date_parser
+
+# Bumped whenever parse_loose_date changes, so stored dates are derived again
+DATE_PARSER_VERSION = 2
+
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+# Two defaults that differ in every part: a part that differs between the two parses was not written
+PROBE_DEFAULTS = (datetime(2000, 1, 1), datetime(2001, 2, 2))
+
+
+def parse_loose_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a date such as ``2025-03-01``, ``01/03/2025`` or ``1.3.2025`` to UTC midnight.
+
+    Ambiguous numeric dates are read day-first, which is how the UI's users write them.
+    Partial dates mean the end of the period (``2026`` is 2026-12-31, ``3/2027`` is
+    2027-03-31); anything without a year, like a bare day, is not a date.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    try:
+        if ISO_DATE.match(value):
+            parsed = datetime.fromisoformat(value[:10])
+            return datetime(parsed.year, parsed.month, parsed.day, tzinfo=timezone.utc)
+        first, second = (date_parser.parse(value, dayfirst=True, default=default) for default in PROBE_DEFAULTS)
+    except (ValueError, OverflowError):
+        return None
+    if first.year != second.year:
+        return None
+    month = first.month if first.month == second.month else 12
+    day = first.day if first.day == second.day else calendar.monthrange(first.year, month)[1]
+    return datetime(first.year, month, day, tzinfo=timezone.utc)
+
+
+NUMBER = re.compile(r'\d[\d.,\s]*')
+NEGATIVE_PREFIX = re.compile(r'(?:^|[\s$€£])-\s*[$€£]?\s*$')
+SIZE = re.compile(r'(?<![A-Za-z\d.,])(?:(\d+)\s*[x×]\s*)?(\d+(?:[.,]\d+)?)\s*(TB|GB|MB|T|G|M)?\b', re.IGNORECASE)
+PARENTHESISED = re.compile(r'\([^)]*\)')
+SIZE_TO_GB = {'t': 1024, 'tb': 1024, 'g': 1, 'gb': 1, 'm': 1 / 1024, 'mb': 1 / 1024}
+
+
+def parse_decimal(value: Optional[str]) -> Optional[float]:
+    """Parse an amount such as ``1500``, ``$1,234.50``, ``1.234,50 €`` or ``USD 300``.
+
+    When only one kind of separator appears it is a thousands separator if it
+    repeats or is followed by exactly three digits (``1.500``, ``1,500``), and a
+    decimal point otherwise (``12,5``).
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER.search(value)
+    if not match:
+        return None
+    # A minus at the start or after a space or currency sign: "-300", "$-300", "USD -300"
+    sign = -1 if NEGATIVE_PREFIX.search(value[:match.start()]) else 1
+    number = re.sub(r'\s', '', match.group()).rstrip('.,')
+    if '.' in number and ',' in number:
+        decimal = '.' if number.rfind('.') > number.rfind(',') else ','
+    elif '.' in number or ',' in number:
+        separator = '.' if '.' in number else ','
+        head, _, tail = number.rpartition(separator)
+        decimal = None if number.count(separator) > 1 or len(tail) == 3 else separator
+    else:
+        decimal = None
+    thousands = {'.', ','} - {decimal}
+    number = ''.join(ch for ch in number if ch not in thousands)
+    try:
+        return sign * float(number.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def parse_size_gb(value: Optional[str], default_unit: str = 'gb', add_all: bool = True) -> Optional[float]:
+    """Capacity in GB of a spec such as ``16``, ``8 GB DDR4``, ``2x8GB``, ``512MB`` or ``SSD 512GB + HDD 1TB``.
+
+    Only sizes with a unit count once any unit appears, so ``500 GB, 7200 rpm``
+    reads as 500; ``NxSIZE`` multiplies, and parenthesised breakdowns are
+    skipped (``16GB (2x8GB)`` is 16). A spec with no unit at all is read as
+    its first number in ``default_unit``. With ``add_all`` every size is added
+    up (drive lists); otherwise only the first one counts.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    sizes = SIZE.findall(PARENTHESISED.sub(' ', value)) or SIZE.findall(value)
+    if not sizes:
+        return None
+    with_unit = [size for size in sizes if size[2]]
+    sizes = with_unit if with_unit else sizes[:1]
+    total = 0.0
+    for count, amount, unit in (sizes if add_all else sizes[:1]):
+        total += int(count or 1) * float(amount.replace(',', '.')) * SIZE_TO_GB[(unit or default_unit).lower()]
+    return round(total, 3)
@@ -0,0 +1,139 @@
+"""
+Login attempt throttling.
+
+Attempts are counted per key (e.g. ``email:<address>`` and ``ip:<addr>``) over a
+sliding window and rejected before any password hashing happens. The default
+backend keeps the attempt log in process memory; ``MongoRateLimitBackend``
+shares counters between workers through a collection with a TTL index.
+"""
+
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+def parse_rule(value: str) -> Tuple[int, int]:
+    """Parse a ``"<attempts>/<seconds>"`` rule such as ``"5/300"``."""
+    limit, window = value.split('/', 1)
+    return int(limit), int(window)
+
+
+class InMemoryRateLimitBackend:
+    """Sliding-log limiter; memory per key is bounded by the rule's limit.
+
+    Keys are kept in order of their last attempt, so expired keys and, past
+    ``max_keys``, the least recently seen ones are dropped from the front in
+    O(1) each, however many distinct keys a client sprays.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._hits: "OrderedDict[str, Tuple[int, deque]]" = OrderedDict()
+        self._max_keys = max_keys
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        """Record an attempt; returns 0 if allowed, otherwise seconds until retry."""
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._hits.get(key)
+        if entry is None:
+            while len(self._hits) >= self._max_keys:
+                self._hits.popitem(last=False)
+            entry = self._hits[key] = (window, deque())
+        hits = entry[1]
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return hits[0] + window - now
+        hits.append(now)
+        self._hits[key] = (window, hits)
+        self._hits.move_to_end(key)
+        return 0
+
+    async def reset(self, key: str):
+        self._hits.pop(key, None)
+
+    def _expire(self, now: float):
+        # Oldest first: stops at the first key still inside its window
+        while self._hits:
+            window, hits = next(iter(self._hits.values()))
+            if hits and hits[-1] > now - window:
+                return
+            self._hits.popitem(last=False)
+
+
+class MongoRateLimitBackend:
+    """Shared limiter for multi-worker deployments.
+
+    Uses two fixed windows and weights the previous one by how much of it still
+    overlaps the sliding window, which needs one upsert and one read per attempt.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("key", 1), ("window_start", 1)], unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        now = time.time()
+        window_start = int(now // window) * window
+        elapsed = now - window_start
+        current = await self.collection.find_one_and_update(
+            {"key": key, "window_start": window_start},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "expires_at": datetime.fromtimestamp(window_start + 2 * window, tz=timezone.utc)
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await self.collection.find_one({"key": key, "window_start": window_start - window})
+        previous_count = previous['count'] if previous else 0
+        estimate = previous_count * (1 - elapsed / window) + current['count']
+        if estimate > limit:
+            return window - elapsed
+        return 0
+
+    async def reset(self, key: str):
+        await self.collection.delete_many({"key": key})
+
+
+class LoginRateLimiter:
+    def __init__(self, backend, email_rule: Tuple[int, int], ip_rule: Tuple[int, int]):
+        self.backend = backend
+        self.rules = {'email': email_rule, 'ip': ip_rule}
+        self.counters = {'allowed': 0, 'rejected_email': 0, 'rejected_ip': 0, 'resets': 0}
+
+    async def check(self, email: str, ip: Optional[str]) -> float:
+        """Record a login attempt; returns 0 if it may proceed, else seconds to wait."""
+        if ip:
+            limit, window = self.rules['ip']
+            retry_after = await self.backend.hit(f"ip:{ip}", limit, window)
+            if retry_after:
+                self.counters['rejected_ip'] += 1
+                return retry_after
+        limit, window = self.rules['email']
+        retry_after = await self.backend.hit(f"email:{email.lower()}", limit, window)
+        if retry_after:
+            self.counters['rejected_email'] += 1
+            return retry_after
+        self.counters['allowed'] += 1
+        return 0
+
+    async def reset(self, email: str):
+        """Forget failed attempts for an account after a successful login."""
+        self.counters['resets'] += 1
+        await self.backend.reset(f"email:{email.lower()}")
+
+    def stats(self) -> dict:
+        return {
+            'backend': type(self.backend).__name__,
+            'rules': {name: {'limit': limit, 'window_seconds': window} for name, (limit, window) in self.rules.items()},
+            'counters': dict(self.counters),
+        }
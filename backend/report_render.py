@@ -0,0 +1,179 @@
+"""
+PDF rendering of the ticket and asset reports.
+
+Imports ReportLab and Pillow, so it is only imported when a report is rendered
+(see ``render_report`` in ``routers/reports.py``) and never by the API at startup.
+"""
+
+from typing import Optional, Dict
+from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, Spacer, TableStyle, Image as RLImage
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from io import BytesIO
+import base64
+from PIL import Image
+
+
+def report_title_style():
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a56db'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    return styles, title_style
+
+def add_report_logo(elements: list, config: Optional[dict]):
+    if config and config.get('logo_base64'):
+        try:
+            img_data = base64.b64decode(config['logo_base64'].split(',')[1])
+            img = Image.open(BytesIO(img_data))
+            img_buffer = BytesIO()
+            img.save(img_buffer, format='PNG')
+            img_buffer.seek(0)
+            logo = RLImage(img_buffer, width=2*inch, height=1*inch)
+            elements.append(logo)
+            elements.append(Spacer(1, 0.3*inch))
+        except:
+            pass
+
+def render_tickets_pdf(tickets: list, config: Optional[dict], start_date: Optional[str], end_date: Optional[str]) -> bytes:
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+    styles, title_style = report_title_style()
+    
+    # Add logo if exists
+    add_report_logo(elements, config)
+    
+    # Title
+    company_name = config.get('company_name', 'ITSM System') if config else 'ITSM System'
+    title = Paragraph(f"{company_name}<br/>Reporte de Tickets", title_style)
+    elements.append(title)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Date range
+    if start_date and end_date:
+        date_text = Paragraph(f"Período: {start_date} a {end_date}", styles['Normal'])
+        elements.append(date_text)
+        elements.append(Spacer(1, 0.2*inch))
+    
+    # Table data
+    data = [['ID', 'Título', 'Tipo', 'Estado', 'Fecha Creación', 'SLA']]
+    for ticket in tickets:
+        created_at = ticket['created_at']
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        
+        data.append([
+            ticket['id'][:8],
+            ticket['title'][:30],
+            ticket.get('ticket_type') or '',
+            ticket['status'],
+            created_at.strftime('%Y-%m-%d'),
+            {True: 'Sí', False: 'No'}.get(ticket.get('sla_met'), '-')
+        ])
+    
+    table = Table(data, colWidths=[1*inch, 2*inch, 1*inch, 1*inch, 1.1*inch, 0.6*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a56db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    elements.append(table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Summary
+    summary = Paragraph(f"<b>Total de tickets:</b> {len(tickets)}", styles['Normal'])
+    elements.append(summary)
+    measured = [ticket['sla_met'] for ticket in tickets if 'sla_met' in ticket]
+    if measured:
+        elements.append(Paragraph(
+            f"<b>SLA cumplido:</b> {sum(measured)} de {len(measured)} tickets resueltos", styles['Normal']
+        ))
+    
+    doc.build(elements)
+    return buffer.getvalue()
+
+def render_assets_pdf(assets: list, companies: Dict[str, str], config: Optional[dict]) -> bytes:
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+    styles, title_style = report_title_style()
+    
+    # Add logo if exists
+    add_report_logo(elements, config)
+    
+    # Title
+    company_name = config.get('company_name', 'ITSM System') if config else 'ITSM System'
+    title = Paragraph(f"{company_name}<br/>Reporte de Activos", title_style)
+    elements.append(title)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Group assets by company
+    assets_by_company = {}
+    for asset in assets:
+        cid = asset['company_id']
+        if cid not in assets_by_company:
+            assets_by_company[cid] = []
+        assets_by_company[cid].append(asset)
+    
+    # Generate table for each company
+    for cid, company_assets in assets_by_company.items():
+        company_title = Paragraph(f"<b>Empresa: {companies.get(cid, 'Desconocida')}</b>", styles['Heading2'])
+        elements.append(company_title)
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Table data
+        data = [['Tipo', 'Modelo', 'S/N', 'Host', 'Ubicación', 'Estado']]
+        for asset in company_assets:
+            data.append([
+                (asset.get('asset_type') or '')[:15],
+                (asset.get('model') or '')[:15],
+                (asset.get('serial_number') or '')[:15],
+                (asset.get('host_name') or '')[:15],
+                (asset.get('location') or '')[:15],
+                (asset.get('status') or '')[:10]
+            ])
+        
+        table = Table(data, colWidths=[1*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.5*inch, 0.8*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a56db')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ]))
+        
+        elements.append(table)
+        elements.append(Spacer(1, 0.3*inch))
+        
+        # Summary for this company
+        summary = Paragraph(f"<b>Total de activos:</b> {len(company_assets)}", styles['Normal'])
+        elements.append(summary)
+        elements.append(Spacer(1, 0.5*inch))
+    
+    # Overall summary
+    total_summary = Paragraph(f"<b>Total general de activos:</b> {len(assets)}", styles['Heading3'])
+    elements.append(total_summary)
+    
+    doc.build(elements)
+    return buffer.getvalue()
+
+REPORT_RENDERERS = {'tickets': render_tickets_pdf, 'assets': render_assets_pdf}
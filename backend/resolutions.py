@@ -0,0 +1,268 @@
+"""
+Resolution suggestions.
+
+Resolved tickets are indexed by the text of their problem (title and
+description) as l2-normalised TF-IDF vectors, stored term-major in flat NumPy
+arrays (an inverted index in CSR layout). Scoring a query only touches the
+postings of its own terms: a single ``np.bincount`` over them yields the cosine
+similarity with every indexed ticket.
+
+The built index is immutable. Tickets resolved afterwards go to a small delta
+scored with the same IDF, and tickets reopened or deleted are masked out; the
+next rebuild folds both in. ``python resolutions.py`` builds the index offline
+and saves it where the server loads it on startup.
+"""
+
+import argparse
+import math
+import os
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from dedup import normalize_text
+
+RESOLVED_STATUSES = ('resolved', 'closed')
+MAX_TOKEN_LENGTH = 30
+# Postings of very common terms are cut to their heaviest entries; they barely move the ranking
+MAX_POSTINGS_PER_TERM = 50_000
+
+STOPWORDS = frozenset("""
+    al algo algun alguna algunos ante antes aqui asi aun bien cada como con cual cuando de del desde
+    donde dos el ella ellos en entre era es esa ese eso esta estan estar este esto fue ha hace han hay
+    la las le les lo los mas me mi muy nada ni no nos o otra otro para pero poco por porque que se ser
+    si sin sobre solo son su sus tambien te tiene todo todos tras un una uno unos usted ya yo
+    an and are as at be but by for from has have in is it its no not of on or that the this to was
+    were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in normalize_text(text).split():
+        if len(token) < 2 or len(token) > MAX_TOKEN_LENGTH or token in STOPWORDS:
+            continue
+        # Cheap plural folding: "impresoras" and "impresora" share a term
+        if len(token) > 3 and token.endswith('s'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def document_text(doc: dict) -> str:
+    return f"{doc.get('title') or ''} {doc.get('description') or ''}"
+
+
+def has_resolution(doc: dict) -> bool:
+    return doc.get('status') in RESOLVED_STATUSES and bool(doc.get('final_resolution') or doc.get('maintenance_log'))
+
+
+class ResolutionIndex:
+    def __init__(self, terms: List[str], idf: np.ndarray, ptr: np.ndarray, postings: np.ndarray,
+                 weights: np.ndarray, ticket_ids: np.ndarray, built_at: Optional[str]):
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.idf = idf
+        self.ptr = ptr
+        self.postings = postings
+        self.weights = weights
+        self.ticket_ids = ticket_ids
+        self.built_at = built_at
+        # Watermark for catching up with tickets resolved after the build
+        self.synced_at = built_at
+        self._sorted = np.argsort(ticket_ids) if len(ticket_ids) else np.zeros(0, dtype=np.int64)
+        self._unseen_idf = math.log((len(ticket_ids) + 1) / 2) + 1
+        self._dead = set()
+        # ticket_id -> term -> weight, and the same postings by term for scoring
+        self._delta: Dict[str, Dict[str, float]] = {}
+        self._delta_postings: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def empty(cls) -> 'ResolutionIndex':
+        return ResolutionIndexBuilder().finish(None)
+
+    @property
+    def size(self) -> int:
+        return len(self.ticket_ids) - len(self._dead) + len(self._delta)
+
+    @property
+    def delta_size(self) -> int:
+        return len(self._delta)
+
+    def _vector(self, text: str) -> Dict[str, float]:
+        weights = {}
+        for term, count in Counter(tokenize(text)).items():
+            i = self.vocab.get(term)
+            weights[term] = (1 + math.log(count)) * (float(self.idf[i]) if i is not None else self._unseen_idf)
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {term: w / norm for term, w in weights.items()} if norm else {}
+
+    def _position(self, ticket_id: str) -> Optional[int]:
+        key = ticket_id.encode()
+        i = int(np.searchsorted(self.ticket_ids, key, sorter=self._sorted))
+        if i < len(self._sorted) and self.ticket_ids[self._sorted[i]] == key:
+            return int(self._sorted[i])
+        return None
+
+    def add(self, ticket_id: str, doc: dict):
+        self.remove(ticket_id)
+        vector = self._vector(document_text(doc))
+        if not vector:
+            return
+        self._delta[ticket_id] = vector
+        for term, weight in vector.items():
+            self._delta_postings.setdefault(term, {})[ticket_id] = weight
+
+    def remove(self, ticket_id: str):
+        vector = self._delta.pop(ticket_id, None)
+        if vector is not None:
+            for term in vector:
+                postings = self._delta_postings[term]
+                del postings[ticket_id]
+                if not postings:
+                    del self._delta_postings[term]
+        position = self._position(ticket_id)
+        if position is not None:
+            self._dead.add(position)
+
+    def query(self, text: str, k: int = 5, min_score: float = 0.05) -> List[tuple]:
+        """Up to ``k`` (ticket_id, score) pairs, best first."""
+        vector = self._vector(text)
+        results = []
+
+        ids, contributions = [], []
+        for term, query_weight in vector.items():
+            i = self.vocab.get(term)
+            if i is not None:
+                start, end = self.ptr[i], self.ptr[i + 1]
+                ids.append(self.postings[start:end])
+                contributions.append(self.weights[start:end] * query_weight)
+        if ids:
+            scores = np.bincount(np.concatenate(ids), np.concatenate(contributions), minlength=len(self.ticket_ids))
+            if self._dead:
+                scores[list(self._dead)] = 0
+            top = np.argpartition(-scores, k)[:k] if len(scores) > k else np.arange(len(scores))
+            results.extend((self.ticket_ids[i].decode(), float(scores[i])) for i in top)
+
+        delta_scores = Counter()
+        for term, query_weight in vector.items():
+            for ticket_id, weight in self._delta_postings.get(term, {}).items():
+                delta_scores[ticket_id] += weight * query_weight
+        results.extend(delta_scores.most_common(k))
+
+        results = [(ticket_id, round(score, 4)) for ticket_id, score in results if score >= min_score]
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+    def stats(self) -> dict:
+        return {
+            'tickets': self.size,
+            'terms': len(self.vocab),
+            'postings': len(self.postings),
+            'delta_tickets': self.delta_size,
+            'masked_tickets': len(self._dead),
+            'built_at': self.built_at,
+        }
+
+    def save(self, path: Path):
+        path = Path(path)
+        partial = path.with_name(path.name + '.part')
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(partial, 'wb') as handle:
+            np.savez(
+                handle,
+                terms=np.frombuffer('\n'.join(terms).encode(), dtype=np.uint8),
+                idf=self.idf, ptr=self.ptr, postings=self.postings, weights=self.weights,
+                ticket_ids=self.ticket_ids, built_at=np.array(self.built_at or ''),
+            )
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ResolutionIndex':
+        with np.load(path) as data:
+            blob = data['terms'].tobytes().decode()
+            return cls(
+                blob.split('\n') if blob else [], data['idf'], data['ptr'], data['postings'],
+                data['weights'], data['ticket_ids'], str(data['built_at']) or None,
+            )
+
+
+class ResolutionIndexBuilder:
+    """Accumulates (ticket, term, count) triples in compact arrays; ``finish`` turns them into an index."""
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.ticket_ids: List[bytes] = []
+        self._docs = array('i')
+        self._terms = array('i')
+        self._counts = array('f')
+
+    def add(self, docs: Iterable[dict]):
+        for doc in docs:
+            counts = Counter(tokenize(document_text(doc)))
+            if not counts:
+                continue
+            position = len(self.ticket_ids)
+            self.ticket_ids.append(doc['id'].encode())
+            for term, count in counts.items():
+                self._docs.append(position)
+                self._terms.append(self.vocab.setdefault(term, len(self.vocab)))
+                self._counts.append(count)
+
+    def finish(self, built_at: Optional[str]) -> ResolutionIndex:
+        n, vocab_size = len(self.ticket_ids), len(self.vocab)
+        docs = np.frombuffer(self._docs, dtype=np.int32)
+        terms = np.frombuffer(self._terms, dtype=np.int32)
+        counts = np.frombuffer(self._counts, dtype=np.float32)
+
+        df = np.bincount(terms, minlength=vocab_size)
+        idf = np.log((n + 1) / (df + 1)) + 1
+        weights = (1 + np.log(counts)) * idf[terms]
+        norms = np.sqrt(np.bincount(docs, weights * weights, minlength=n))
+        weights = weights / norms[docs]
+
+        # Term-major, heaviest postings first, so truncation keeps the ones that matter
+        order = np.lexsort((-weights, terms))
+        docs, terms, weights = docs[order], terms[order], weights[order]
+        starts = np.concatenate(([0], np.cumsum(df)[:-1])).astype(np.int64)
+        keep = np.arange(len(terms)) - starts[terms] < MAX_POSTINGS_PER_TERM
+        docs, terms, weights = docs[keep], terms[keep], weights[keep]
+        ptr = np.concatenate(([0], np.cumsum(np.bincount(terms, minlength=vocab_size)))).astype(np.int64)
+
+        return ResolutionIndex(
+            sorted(self.vocab, key=self.vocab.get), idf.astype(np.float32), ptr,
+            docs.astype(np.int32), weights.astype(np.float32),
+            np.array(self.ticket_ids, dtype='S') if n else np.zeros(0, dtype='S36'), built_at,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the resolution suggestion index from resolved tickets")
+    parser.add_argument('--output', help="Index file (default: RESOLUTION_INDEX_PATH or backend/resolution_index.npz)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    root_dir = Path(__file__).parent
+    load_dotenv(root_dir / '.env')
+    output = Path(args.output or os.environ.get('RESOLUTION_INDEX_PATH', str(root_dir / 'resolution_index.npz')))
+
+    db = MongoClient(os.environ['MONGO_URL'])[os.environ['DB_NAME']]
+    built_at = datetime.now(timezone.utc).isoformat()
+    builder = ResolutionIndexBuilder()
+    cursor = db.tickets.find(
+        {"status": {"$in": list(RESOLVED_STATUSES)}},
+        {"_id": 0, "id": 1, "status": 1, "title": 1, "description": 1, "final_resolution": 1, "maintenance_log": 1},
+        batch_size=5000,
+    )
+    builder.add(doc for doc in cursor if has_resolution(doc))
+    index = builder.finish(built_at)
+    index.save(output)
+    print(f"Indexed {index.size} tickets, {len(index.vocab)} terms -> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+from fastapi import APIRouter, Depends, HTTPException
+import math
+import asyncio
+from typing import Optional, Dict, List
+from collections import OrderedDict
+from datetime import date, timedelta, datetime, timezone
+
+from core import db, ANALYTICS_CACHE_MAX_ENTRIES
+from models import User
+from security import get_current_user
+from routers.archive import archive_may_hold
+
+
+router = APIRouter()
+
+# Closed buckets (entirely in the past) never change, so their rows are cached per
+# scope/granularity/grouping and only missing buckets plus the current one are queried
+analytics_cache: "OrderedDict[tuple, list]" = OrderedDict()
+
+ANALYTICS_GROUP_FIELDS = {'none': None, 'company': 'company_id', 'technician': 'assigned_to'}
+ANALYTICS_DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 12}
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket_start(start: date, granularity: str) -> date:
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+def bucket_key(start: date, granularity: str) -> str:
+    if granularity == 'week':
+        iso_year, iso_week, _ = start.isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if granularity == 'month':
+        return start.strftime('%Y-%m')
+    return start.isoformat()
+
+def bucket_key_expr(field: str, granularity: str) -> dict:
+    # Dates are stored as UTC ISO strings, so day and month keys are plain prefixes
+    day = {"$substrBytes": [f"${field}", 0, 10]}
+    if granularity == 'week':
+        return {"$dateToString": {"format": "%G-W%V", "date": {"$dateFromString": {"dateString": day, "format": "%Y-%m-%d"}}}}
+    if granularity == 'month':
+        return {"$substrBytes": [f"${field}", 0, 7]}
+    return day
+
+def iso_date_expr(field: str) -> dict:
+    return {"$dateFromString": {"dateString": {"$substrBytes": [f"${field}", 0, 19]}, "format": "%Y-%m-%dT%H:%M:%S"}}
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank method
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def ticket_source_stages(match: dict, fields: List[str], archived: bool) -> List[dict]:
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+    stages = [{"$match": match}, {"$project": projection}]
+    if archived:
+        # A batch being archived is in both collections until the archiver deletes it, so keep one copy per id
+        stages += [
+            {"$unionWith": {"coll": db.tickets_archive.name, "pipeline": [{"$match": match}, {"$project": projection}]}},
+            {"$group": {"_id": "$id", "ticket": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$ticket"}},
+        ]
+    return stages
+
+async def compute_ticket_buckets(scope: dict, granularity: str, group_field: Optional[str], start: date, end: date) -> Dict[str, list]:
+    group_key = f"${group_field}" if group_field else None
+    start_iso, end_iso = start.isoformat(), end.isoformat()
+    
+    fields = ['created_at', 'resolved_at'] + ([group_field] if group_field else [])
+    archived = archive_may_hold(start_iso)
+    opened_pipeline = ticket_source_stages({**scope, "created_at": {"$gte": start_iso, "$lt": end_iso}}, fields, archived) + [
+        {"$group": {"_id": {"bucket": bucket_key_expr('created_at', granularity), "key": group_key}, "count": {"$sum": 1}}}
+    ]
+    resolved_pipeline = ticket_source_stages({**scope, "resolved_at": {"$gte": start_iso, "$lt": end_iso}}, fields, archived) + [
+        {"$group": {
+            "_id": {"bucket": bucket_key_expr('resolved_at', granularity), "key": group_key},
+            "count": {"$sum": 1},
+            "hours": {"$push": {"$divide": [
+                {"$subtract": [iso_date_expr('resolved_at'), iso_date_expr('created_at')]}, 3600000
+            ]}}
+        }}
+    ]
+    opened, resolved = await asyncio.gather(*(
+        db.tickets.aggregate(pipeline, allowDiskUse=True).to_list(None) for pipeline in (opened_pipeline, resolved_pipeline)
+    ))
+    
+    rows = {}
+    resolution_hours = {}
+    def row_for(ident):
+        return rows.setdefault((ident['bucket'], ident.get('key')), {
+            'bucket': ident['bucket'], 'key': ident.get('key'), 'opened': 0, 'resolved': 0,
+            'mttr_hours': None, 'p50_hours': None, 'p90_hours': None, 'p95_hours': None
+        })
+    
+    for group in opened:
+        row_for(group['_id'])['opened'] += group['count']
+    for group in resolved:
+        row_for(group['_id'])['resolved'] += group['count']
+        resolution_hours.setdefault((group['_id']['bucket'], group['_id'].get('key')), []).extend(group['hours'])
+    for ident, hours in resolution_hours.items():
+        row = rows[ident]
+        hours = sorted(hours)
+        row['mttr_hours'] = round(sum(hours) / len(hours), 2) if hours else None
+        for pct in (50, 90, 95):
+            value = percentile(hours, pct)
+            row[f"p{pct}_hours"] = round(value, 2) if value is not None else None
+    
+    by_bucket = {}
+    for row in rows.values():
+        by_bucket.setdefault(row['bucket'], []).append(row)
+    return by_bucket
+
+async def compute_backlog(scope: dict, group_field: Optional[str]) -> List[dict]:
+    groups = await db.tickets.aggregate([
+        {"$match": {**scope, "status": {"$in": ['open', 'in_progress']}}},
+        {"$group": {
+            "_id": f"${group_field}" if group_field else None,
+            "open": {"$sum": 1},
+            "avg_created_ms": {"$avg": {"$toLong": iso_date_expr('created_at')}},
+            "oldest": {"$min": "$created_at"}
+        }}
+    ]).to_list(None)
+    
+    now = datetime.now(timezone.utc)
+    backlog = []
+    for group in groups:
+        oldest = datetime.fromisoformat(group['oldest']) if isinstance(group['oldest'], str) else group['oldest']
+        avg_created = datetime.fromtimestamp(group['avg_created_ms'] / 1000, tz=timezone.utc) if group.get('avg_created_ms') else None
+        backlog.append({
+            'key': group['_id'],
+            'open': group['open'],
+            'avg_age_hours': round((now - avg_created).total_seconds() / 3600, 2) if avg_created else None,
+            'max_age_hours': round((now - oldest).total_seconds() / 3600, 2) if oldest else None
+        })
+    backlog.sort(key=lambda item: item['open'], reverse=True)
+    return backlog
+
+@router.get("/analytics/tickets")
+async def get_ticket_analytics(
+    granularity: str = 'day',
+    group_by: str = 'none',
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    company_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if granularity not in ANALYTICS_DEFAULT_BUCKETS:
+        raise HTTPException(status_code=400, detail="granularity must be day, week or month")
+    if group_by not in ANALYTICS_GROUP_FIELDS:
+        raise HTTPException(status_code=400, detail="group_by must be none, company or technician")
+    
+    scope = {}
+    if current_user.role == 'client':
+        scope['company_id'] = current_user.company_id
+    elif company_id:
+        scope['company_id'] = company_id
+    if assigned_to:
+        scope['assigned_to'] = assigned_to
+    group_field = ANALYTICS_GROUP_FIELDS[group_by]
+    
+    try:
+        today = datetime.now(timezone.utc).date()
+        end = date.fromisoformat(end_date) if end_date else today
+        if start_date:
+            start = date.fromisoformat(start_date)
+        else:
+            start = bucket_start(end, granularity)
+            for _ in range(ANALYTICS_DEFAULT_BUCKETS[granularity] - 1):
+                start = bucket_start(start - timedelta(days=1), granularity)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end - start).days > 3 * 366:
+        raise HTTPException(status_code=400, detail="Window cannot exceed three years")
+    
+    # Expand the window to whole buckets so every bucket is complete
+    buckets = []
+    cursor = bucket_start(start, granularity)
+    while cursor <= end:
+        following = next_bucket_start(cursor, granularity)
+        buckets.append((cursor, following))
+        cursor = following
+    
+    current_start = bucket_start(today, granularity)
+    scope_key = (tuple(sorted(scope.items())), granularity, group_by)
+    results = {}
+    missing = []
+    for bucket_from, bucket_to in buckets:
+        cached = analytics_cache.get(scope_key + (bucket_from,)) if bucket_to <= current_start else None
+        if cached is None:
+            missing.append((bucket_from, bucket_to))
+        else:
+            analytics_cache.move_to_end(scope_key + (bucket_from,))
+            results[bucket_from] = cached
+    
+    if missing:
+        computed = await compute_ticket_buckets(scope, granularity, group_field, missing[0][0], missing[-1][1])
+        for bucket_from, bucket_to in missing:
+            rows = computed.get(bucket_key(bucket_from, granularity), [])
+            results[bucket_from] = rows
+            if bucket_to <= current_start:
+                analytics_cache[scope_key + (bucket_from,)] = rows
+        while len(analytics_cache) > ANALYTICS_CACHE_MAX_ENTRIES:
+            analytics_cache.popitem(last=False)
+    
+    series = []
+    for bucket_from, _ in buckets:
+        rows = results[bucket_from]
+        if not rows and group_field is None:
+            rows = [{'bucket': bucket_key(bucket_from, granularity), 'key': None, 'opened': 0, 'resolved': 0,
+                     'mttr_hours': None, 'p50_hours': None, 'p90_hours': None, 'p95_hours': None}]
+        for row in rows:
+            series.append({**row, 'bucket_start': bucket_from.isoformat()})
+    
+    return {
+        'granularity': granularity,
+        'group_by': group_by,
+        'start': buckets[0][0].isoformat(),
+        'end': buckets[-1][1].isoformat(),
+        'series': series,
+        'backlog': await compute_backlog(scope, group_field)
+    }
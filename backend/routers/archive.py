@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Optional
+from datetime import datetime, timezone, timedelta
+from archive import TicketArchiver
+
+from core import (
+    db,
+    TICKET_ARCHIVE_AFTER_DAYS,
+    TICKET_ARCHIVE_BATCH_SIZE,
+    TICKET_ARCHIVE_PAUSE_SECONDS,
+    TICKET_ARCHIVE_INTERVAL_SECONDS,
+    bump_data_version,
+    spawn_background_task,
+    logger,
+)
+from models import User
+from security import get_current_user
+
+
+router = APIRouter()
+
+ticket_archiver = TicketArchiver(
+    db.tickets, db.ticket_notes, db.tickets_archive, db.ticket_notes_archive,
+    batch_size=TICKET_ARCHIVE_BATCH_SIZE, pause_seconds=TICKET_ARCHIVE_PAUSE_SECONDS
+)
+# Newest updated_at in the archive, refreshed after every run; None while it is empty
+archive_horizon: Optional[str] = None
+
+def archive_cutoff() -> Optional[str]:
+    if TICKET_ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return (datetime.now(timezone.utc) - timedelta(days=TICKET_ARCHIVE_AFTER_DAYS)).isoformat()
+
+def archive_may_hold(since: Optional[str]) -> bool:
+    """Whether archived tickets can fall in a date range starting at ``since`` (None: unbounded).
+
+    Created and resolved dates never come after updated_at, so ranges starting after the
+    archive horizon are answered from the hot collection alone. The current cutoff covers
+    tickets other workers archived since this one last looked.
+    """
+    horizon = max(filter(None, (archive_horizon, archive_cutoff())), default=None)
+    return horizon is not None and (since is None or since < horizon)
+
+async def raise_if_archived(ticket_id: str):
+    # Between the archiver's copy and delete a ticket is in both collections and still writable
+    if (await db.tickets_archive.find_one({"id": ticket_id}, {"_id": 1})
+            and not await db.tickets.find_one({"id": ticket_id}, {"_id": 1})):
+        raise HTTPException(status_code=409, detail="Archived tickets are read-only")
+
+async def refresh_archive_horizon():
+    global archive_horizon
+    archive_horizon = await ticket_archiver.horizon()
+
+async def run_ticket_archive() -> dict:
+    cutoff = archive_cutoff()
+    if cutoff is None:
+        return {'tickets': 0, 'ticket_notes': 0}
+    moved = await ticket_archiver.archive(cutoff)
+    if moved['tickets']:
+        await bump_data_version('tickets')
+        logger.info("Archived %d tickets and %d notes", moved['tickets'], moved['ticket_notes'])
+    await refresh_archive_horizon()
+    return moved
+
+async def run_ticket_archive_periodically():
+    await refresh_archive_horizon()
+    while True:
+        try:
+            await run_ticket_archive()
+        except Exception:
+            logger.exception("Ticket archiving failed")
+        await asyncio.sleep(TICKET_ARCHIVE_INTERVAL_SECONDS)
+
+@router.get("/archive/stats")
+async def get_archive_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view archive stats")
+
+    hot, archived, archived_notes = await asyncio.gather(
+        db.tickets.estimated_document_count(),
+        db.tickets_archive.estimated_document_count(),
+        db.ticket_notes_archive.estimated_document_count(),
+    )
+    return {
+        'hot_tickets': hot,
+        'archived_tickets': archived,
+        'archived_notes': archived_notes,
+        'archive_after_days': TICKET_ARCHIVE_AFTER_DAYS,
+        'horizon': archive_horizon,
+        'archiver': ticket_archiver.stats(),
+    }
+
+@router.post("/archive/run")
+async def trigger_ticket_archive(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can run the ticket archiver")
+    if TICKET_ARCHIVE_AFTER_DAYS <= 0:
+        raise HTTPException(status_code=400, detail="Ticket archiving is disabled")
+
+    spawn_background_task('ticket_archive_run', run_ticket_archive())
+    return {"message": "Archiving started"}
@@ -0,0 +1,289 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+import asyncio
+from typing import Optional, List
+from collections import OrderedDict
+from datetime import datetime, timezone
+from normalize import DATE_PARSER_VERSION, parse_loose_date, parse_size_gb, parse_decimal
+import forecast
+from audit import field_diff
+
+from core import (
+    db,
+    DEPRECIATION_DEFAULT_LIFE_MONTHS,
+    FORECAST_CACHE_MAX_ENTRIES,
+    backfill_derived_fields,
+    bump_data_version,
+    logger,
+)
+from models import User, Asset, AssetCreate
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, bumped_version, raise_update_failed, set_etag
+from stats import asset_stats_delta, bump_stats
+from routers.audit import audit_log
+from routers.sync import record_deletions
+
+
+router = APIRouter()
+
+INVENTORY_HISTOGRAMS = {
+    'ram_gb': ('ram_gb_num', [0, 4, 8, 16, 32, 64, 128]),
+    'storage_gb': ('storage_capacity_gb', [0, 128, 256, 512, 1024, 2048, 4096]),
+    'purchase_value': ('purchase_value_num', [0, 250, 500, 1000, 2000, 5000, 10000]),
+}
+INVENTORY_BREAKDOWNS = ['asset_type', 'operating_system', 'manufacturer', 'company_id']
+INVENTORY_BREAKDOWN_LIMIT = 25
+
+# Bumped whenever the spec parsers change, so stored values are derived again
+SPEC_PARSER_VERSION = 3
+
+def asset_spec_fields(doc: dict) -> dict:
+    return {
+        'spec_parser_version': SPEC_PARSER_VERSION,
+        'ram_gb_num': parse_size_gb(doc.get('ram_gb'), add_all=False),
+        'storage_capacity_gb': parse_size_gb(doc.get('storage_type_capacity')),
+        'purchase_value_num': parse_decimal(doc.get('purchase_value')),
+        'purchase_date_at': parse_loose_date(doc.get('purchase_date')),
+    }
+
+async def backfill_asset_specs():
+    count = await backfill_derived_fields(
+        db.assets, 'spec_parser_version',
+        ['ram_gb', 'storage_type_capacity', 'purchase_value', 'purchase_date'], asset_spec_fields,
+        version=SPEC_PARSER_VERSION
+    )
+    if count:
+        logger.info("Backfilled numeric specs on %d assets", count)
+        await bump_data_version('assets')
+
+# Results keyed by the assets data version, so any asset write invalidates them
+forecast_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+FORECAST_GROUP_FIELDS = {'none': None, 'company': 'company_id', 'asset_type': 'asset_type'}
+
+@router.post("/assets", response_model=Asset)
+async def create_asset(asset_data: AssetCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can create assets")
+    
+    data = asset_data.model_dump()
+    asset = Asset(**data, expires_at=parse_loose_date(asset_data.warranty_expiration),
+                  expiry_parser_version=DATE_PARSER_VERSION, **asset_spec_fields(data))
+    doc = asset.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    
+    await db.assets.insert_one(doc)
+    await bump_stats(doc['company_id'], asset_stats_delta(doc, 1))
+    await bump_data_version('assets')
+    audit_log.record('asset', asset.id, 'create', current_user.id, company_id=asset.company_id)
+    return asset
+
+@router.get("/assets", response_model=List[Asset])
+async def get_assets(company_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    query = {}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    elif company_id:
+        query['company_id'] = company_id
+    
+    assets = await db.assets.find(query, {"_id": 0}).to_list(1000)
+    
+    for asset in assets:
+        if 'created_at' in asset and isinstance(asset['created_at'], str):
+            asset['created_at'] = datetime.fromisoformat(asset['created_at'])
+        elif 'created_at' not in asset:
+            asset['created_at'] = datetime.now(timezone.utc)
+    
+    return assets
+
+@router.get("/assets/inventory-summary")
+async def get_inventory_summary(
+    company_id: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    match = {}
+    if current_user.role == 'client':
+        match['company_id'] = current_user.company_id
+    elif company_id:
+        match['company_id'] = company_id
+    if status:
+        match['status'] = status
+
+    sums = {
+        "ram_gb": {"$sum": "$ram_gb_num"},
+        "storage_gb": {"$sum": "$storage_capacity_gb"},
+        "purchase_value": {"$sum": "$purchase_value_num"},
+    }
+    facets = {
+        "totals": [{"$group": {
+            "_id": None,
+            "assets": {"$sum": 1},
+            **sums,
+            **{f"with_{name}": {"$sum": {"$cond": [{"$isNumber": f"${field}"}, 1, 0]}}
+               for name, (field, _) in INVENTORY_HISTOGRAMS.items()}
+        }}]
+    }
+    for name, (field, boundaries) in INVENTORY_HISTOGRAMS.items():
+        facets[f"histogram_{name}"] = [
+            {"$match": {field: {"$type": "number"}}},
+            {"$bucket": {"groupBy": f"${field}", "boundaries": boundaries, "default": boundaries[-1],
+                         "output": {"count": {"$sum": 1}}}}
+        ]
+    for name in INVENTORY_BREAKDOWNS:
+        facets[f"by_{name}"] = [
+            {"$group": {"_id": f"${name}", "count": {"$sum": 1}, **sums}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": INVENTORY_BREAKDOWN_LIMIT}
+        ]
+
+    result = (await db.assets.aggregate([{"$match": match}, {"$facet": facets}]).to_list(1))[0]
+
+    totals = result['totals'][0] if result['totals'] else {"assets": 0, "ram_gb": 0, "storage_gb": 0, "purchase_value": 0}
+    totals.pop('_id', None)
+    histograms = {}
+    for name, (_, boundaries) in INVENTORY_HISTOGRAMS.items():
+        counts = {bucket['_id']: bucket['count'] for bucket in result[f"histogram_{name}"]}
+        upper_bounds = boundaries[1:] + [None]
+        histograms[name] = [
+            {"min": low, "max": high, "count": counts.get(low, 0)} for low, high in zip(boundaries, upper_bounds)
+        ]
+
+    return {
+        "totals": totals,
+        "histograms": histograms,
+        "breakdowns": {
+            name: [{"value": row.pop('_id'), **row} for row in result[f"by_{name}"]]
+            for name in INVENTORY_BREAKDOWNS
+        }
+    }
+
+@router.get("/assets/depreciation-forecast")
+async def get_depreciation_forecast(
+    method: str = 'straight_line',
+    factor: float = 2.0,
+    start: Optional[str] = None,
+    quarters: int = 8,
+    company_id: Optional[str] = None,
+    group_by: str = 'none',
+    format: str = 'json',
+    current_user: User = Depends(get_current_user)
+):
+    if method not in forecast.METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(forecast.METHODS)}")
+    if not 1 <= factor <= 4:
+        raise HTTPException(status_code=400, detail="factor must be between 1 and 4")
+    if not 1 <= quarters <= 40:
+        raise HTTPException(status_code=400, detail="quarters must be between 1 and 40")
+    if group_by not in FORECAST_GROUP_FIELDS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(FORECAST_GROUP_FIELDS)}")
+    if format not in ('json', 'csv'):
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    try:
+        start_month = forecast.parse_quarter(start) if start else forecast.month_index(datetime.now(timezone.utc)) // 3 * 3
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start must look like 2026-Q1")
+    
+    match = {"status": {"$ne": "retired"}}
+    if current_user.role == 'client':
+        match['company_id'] = current_user.company_id
+    elif company_id:
+        match['company_id'] = company_id
+    group_field = FORECAST_GROUP_FIELDS[group_by]
+    
+    version = await db.data_versions.find_one({"id": "assets"}, {"_id": 0, "version": 1})
+    cache_key = ((version or {}).get('version', 0), match.get('company_id'), method, factor, start_month, quarters, group_field)
+    result = forecast_cache.get(cache_key)
+    if result is not None:
+        forecast_cache.move_to_end(cache_key)
+    else:
+        projection = {"_id": 0, "purchase_date_at": 1, "purchase_value_num": 1, "estimated_life_months": 1}
+        if group_field:
+            projection[group_field] = 1
+        docs = await db.assets.find(match, projection).to_list(None)
+        
+        def compute():
+            columns, counts = forecast.load_columns(docs, DEPRECIATION_DEFAULT_LIFE_MONTHS, group_field)
+            return {**forecast.forecast(columns, start_month, quarters, method, factor), 'assets': counts}
+        
+        result = await asyncio.to_thread(compute)
+        forecast_cache[cache_key] = result
+        while len(forecast_cache) > FORECAST_CACHE_MAX_ENTRIES:
+            forecast_cache.popitem(last=False)
+    
+    if format == 'csv':
+        return Response(
+            content=forecast.to_csv(result),
+            media_type='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="depreciation_{method}.csv"'}
+        )
+    return {**result, 'group_by': group_by}
+
+@router.get("/assets/{asset_id}", response_model=Asset)
+async def get_asset(asset_id: str, response: Response, current_user: User = Depends(get_current_user)):
+    asset = await db.assets.find_one({"id": asset_id}, {"_id": 0})
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    if isinstance(asset['created_at'], str):
+        asset['created_at'] = datetime.fromisoformat(asset['created_at'])
+    
+    asset = Asset(**asset)
+    set_etag(response, asset.version)
+    return asset
+
+@router.put("/assets/{asset_id}", response_model=Asset)
+async def update_asset(
+    asset_id: str,
+    asset_data: AssetCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can update assets")
+    
+    update_data = asset_data.model_dump()
+    update_data['expires_at'] = parse_loose_date(asset_data.warranty_expiration)
+    update_data['expiry_parser_version'] = DATE_PARSER_VERSION
+    update_data.update(asset_spec_fields(update_data))
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(asset_id, expected, {"$set": update_data})
+    # The previous company/status is needed for the stats delta, so take the old document and apply the $set locally
+    previous = await db.assets.find_one_and_update(query, update, projection={"_id": 0})
+    
+    if not previous:
+        await raise_update_failed(db.assets, asset_id, expected, "Asset")
+    
+    if (previous.get('company_id'), previous.get('status')) != (update_data['company_id'], update_data['status']):
+        await bump_stats(previous['company_id'], asset_stats_delta(previous, -1))
+        await bump_stats(update_data['company_id'], asset_stats_delta(update_data, 1))
+    await bump_data_version('assets')
+    audit_log.record('asset', asset_id, 'update', current_user.id,
+                     field_diff(previous, update_data, AssetCreate.model_fields), company_id=update_data['company_id'])
+    
+    updated = {**previous, **update_data, 'version': bumped_version(previous, expected)}
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    
+    set_etag(response, updated['version'])
+    return Asset(**updated)
+
+@router.delete("/assets/{asset_id}")
+async def delete_asset(asset_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete assets")
+    
+    deleted = await db.assets.find_one_and_delete(
+        {"id": asset_id},
+        projection={"_id": 0, "company_id": 1, "status": 1}
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    await record_deletions('assets', deleted['company_id'], [asset_id])
+    await bump_stats(deleted['company_id'], asset_stats_delta(deleted, -1))
+    await bump_data_version('assets')
+    audit_log.record('asset', asset_id, 'delete', current_user.id, company_id=deleted['company_id'])
+    
+    return {"message": "Asset deleted successfully"}
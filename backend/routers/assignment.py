@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import timedelta, datetime, timezone
+from assignment import AssignmentEngine, OPEN_STATUSES
+
+from core import (
+    db,
+    AUTO_ASSIGN_TICKETS,
+    ASSIGNMENT_AFFINITY_DAYS,
+    ASSIGNMENT_RECONCILE_SECONDS,
+    loaders,
+    logger,
+)
+from models import User
+from security import get_current_user
+
+
+router = APIRouter()
+
+assignment_engine = AssignmentEngine()
+
+async def reconcile_assignment():
+    """Rebuild technician workloads from the database.
+
+    Picks up tickets written by other processes (other workers, the mail
+    ingestor) and corrects any drift in the incremental bookkeeping.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=ASSIGNMENT_AFFINITY_DAYS)).isoformat()
+    technicians, open_rows, affinity_rows = await asyncio.gather(
+        db.users.find({"role": "technician"}, {"_id": 0, "id": 1}).to_list(None),
+        db.tickets.aggregate([
+            {"$match": {"status": {"$in": list(OPEN_STATUSES)}, "assigned_to": {"$ne": None}}},
+            {"$group": {"_id": {"assigned_to": "$assigned_to", "priority": "$priority"}, "count": {"$sum": 1}}}
+        ]).to_list(None),
+        db.tickets.aggregate([
+            {"$match": {"created_at": {"$gte": since}, "assigned_to": {"$ne": None}}},
+            {"$group": {"_id": {"assigned_to": "$assigned_to", "company_id": "$company_id"}, "count": {"$sum": 1}}}
+        ]).to_list(None)
+    )
+    assignment_engine.rebuild(
+        [user['id'] for user in technicians],
+        [{**row['_id'], 'count': row['count']} for row in open_rows],
+        [{**row['_id'], 'count': row['count']} for row in affinity_rows]
+    )
+
+async def reconcile_assignment_periodically():
+    while True:
+        try:
+            await reconcile_assignment()
+        except Exception:
+            logger.exception("Assignment reconciliation failed")
+        await asyncio.sleep(ASSIGNMENT_RECONCILE_SECONDS)
+
+@router.get("/assignment/workload")
+async def get_assignment_workload(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view technician workload")
+    
+    snapshot = assignment_engine.snapshot()
+    users = await loaders['users'].load_many(row['technician_id'] for row in snapshot['technicians'])
+    for row in snapshot['technicians']:
+        user = users.get(row['technician_id'])
+        row['name'] = user.get('name') if user else None
+    return {**snapshot, 'auto_assign': AUTO_ASSIGN_TICKETS}
+
+@router.post("/assignment/reconcile")
+async def trigger_assignment_reconcile(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can reconcile assignments")
+    
+    await reconcile_assignment()
+    return assignment_engine.snapshot()
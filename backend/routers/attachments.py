@@ -0,0 +1,187 @@
+from fastapi import APIRouter, Request, Depends, Header, Response, HTTPException
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+import os
+import asyncio
+from pathlib import Path
+from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from datetime import datetime
+from attachments import LocalAttachmentStore, GridFSAttachmentStore, AttachmentTooLarge, parse_range, make_thumbnail
+
+from core import (
+    db,
+    ATTACHMENT_MAX_BYTES,
+    ATTACHMENT_DIR,
+    THUMBNAIL_SIZES,
+    THUMBNAIL_MAX_SOURCE_BYTES,
+    THUMBNAIL_WORKERS,
+)
+from models import User, Attachment
+from security import get_current_user, get_visible_ticket
+
+
+router = APIRouter()
+
+if os.environ.get('ATTACHMENT_STORE', 'gridfs') == 'local':
+    attachment_store = LocalAttachmentStore(ATTACHMENT_DIR)
+else:
+    attachment_store = GridFSAttachmentStore(AsyncIOMotorGridFSBucket(db, bucket_name='attachments'))
+
+thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnail')
+
+def thumbnail_key(attachment_id: str, size: int) -> str:
+    return f"{attachment_id}-thumb-{size}"
+
+async def get_visible_attachment(attachment_id: str, current_user: User) -> dict:
+    attachment = await db.attachments.find_one({"id": attachment_id}, {"_id": 0})
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    if current_user.role == 'client' and attachment['company_id'] != current_user.company_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this attachment")
+    return attachment
+
+async def delete_attachments(query: dict) -> int:
+    attachments = await db.attachments.find(query, {"_id": 0, "id": 1, "thumbnails": 1}).to_list(None)
+    for attachment in attachments:
+        await attachment_store.delete(attachment['id'])
+        for size in attachment.get('thumbnails', []):
+            await attachment_store.delete(thumbnail_key(attachment['id'], size))
+    if not attachments:
+        return 0
+    result = await db.attachments.delete_many({"id": {"$in": [a['id'] for a in attachments]}})
+    return result.deleted_count
+
+@router.post("/tickets/{ticket_id}/attachments", response_model=Attachment)
+async def upload_ticket_attachment(
+    ticket_id: str,
+    request: Request,
+    filename: str,
+    note_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # The request body is the raw file, written to the store chunk by chunk as it arrives
+    ticket = await get_visible_ticket(ticket_id, current_user)
+    if note_id and not await db.ticket_notes.find_one({"id": note_id, "ticket_id": ticket_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Note not found")
+    declared_size = request.headers.get('content-length')
+    if declared_size and declared_size.isdigit() and int(declared_size) > ATTACHMENT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Attachments are limited to {ATTACHMENT_MAX_BYTES} bytes")
+    filename = Path(filename.replace('\\', '/')).name.strip()[:255]
+    if not filename:
+        raise HTTPException(status_code=400, detail="filename is required")
+    
+    attachment = Attachment(
+        ticket_id=ticket_id,
+        note_id=note_id,
+        company_id=ticket['company_id'],
+        filename=filename,
+        content_type=request.headers.get('content-type', 'application/octet-stream').split(';')[0].strip(),
+        uploaded_by=current_user.id
+    )
+    try:
+        attachment.size, attachment.sha256 = await attachment_store.save(
+            attachment.id, request.stream(), ATTACHMENT_MAX_BYTES
+        )
+    except AttachmentTooLarge:
+        raise HTTPException(status_code=413, detail=f"Attachments are limited to {ATTACHMENT_MAX_BYTES} bytes")
+    if attachment.size == 0:
+        await attachment_store.delete(attachment.id)
+        raise HTTPException(status_code=400, detail="Attachment is empty")
+    
+    doc = attachment.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    await db.attachments.insert_one(doc)
+    return attachment
+
+@router.get("/tickets/{ticket_id}/attachments", response_model=List[Attachment])
+async def get_ticket_attachments(ticket_id: str, note_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    await get_visible_ticket(ticket_id, current_user, include_archived=True)
+    query = {"ticket_id": ticket_id}
+    if note_id:
+        query['note_id'] = note_id
+    
+    attachments = await db.attachments.find(query, {"_id": 0}).sort('created_at', 1).to_list(1000)
+    for attachment in attachments:
+        if isinstance(attachment['created_at'], str):
+            attachment['created_at'] = datetime.fromisoformat(attachment['created_at'])
+    
+    return attachments
+
+@router.get("/attachments/{attachment_id}/download")
+async def download_attachment(
+    attachment_id: str,
+    range_header: Optional[str] = Header(None, alias='Range'),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    attachment = await get_visible_attachment(attachment_id, current_user)
+    size = attachment['size']
+    etag = f'"{attachment["sha256"]}"'
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        # Attachment contents never change once uploaded
+        'Cache-Control': 'private, max-age=31536000, immutable',
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(attachment['filename'])}",
+    }
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    
+    if if_range and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={'Content-Range': f"bytes */{size}"})
+    
+    start, end = byte_range or (0, size - 1)
+    headers['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        attachment_store.read_range(attachment_id, start, end),
+        status_code=206 if byte_range else 200,
+        media_type=attachment['content_type'],
+        headers=headers
+    )
+
+@router.get("/attachments/{attachment_id}/thumbnail")
+async def get_attachment_thumbnail(attachment_id: str, size: int = 256, current_user: User = Depends(get_current_user)):
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(map(str, THUMBNAIL_SIZES))}")
+    attachment = await get_visible_attachment(attachment_id, current_user)
+    if not attachment['content_type'].startswith('image/'):
+        raise HTTPException(status_code=415, detail="Attachment is not an image")
+    if attachment['size'] > THUMBNAIL_MAX_SOURCE_BYTES:
+        raise HTTPException(status_code=413, detail="Image is too large to thumbnail")
+    
+    key = thumbnail_key(attachment_id, size)
+    if size in attachment.get('thumbnails', []):
+        thumbnail = await attachment_store.read(key)
+    else:
+        source = await attachment_store.read(attachment_id)
+        try:
+            thumbnail = await asyncio.get_running_loop().run_in_executor(thumbnail_executor, make_thumbnail, source, size)
+        except Exception:
+            raise HTTPException(status_code=415, detail="Image could not be decoded")
+        await attachment_store.put_bytes(key, thumbnail)
+        await db.attachments.update_one({"id": attachment_id}, {"$addToSet": {"thumbnails": size}})
+    
+    return Response(
+        content=thumbnail,
+        media_type='image/jpeg',
+        headers={'Cache-Control': 'private, max-age=31536000, immutable', 'ETag': f'"{attachment["sha256"]}-{size}"'}
+    )
+
+@router.delete("/attachments/{attachment_id}")
+async def delete_attachment(attachment_id: str, current_user: User = Depends(get_current_user)):
+    attachment = await get_visible_attachment(attachment_id, current_user)
+    if current_user.role != 'admin' and attachment['uploaded_by'] != current_user.id:
+        raise HTTPException(status_code=403, detail="Only admins and the uploader can delete attachments")
+    
+    await delete_attachments({"id": attachment_id})
+    return {"message": "Attachment deleted successfully"}
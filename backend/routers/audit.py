@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from audit import AuditLog
+
+from core import db, AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS
+from models import User
+from security import get_current_user
+
+
+router = APIRouter()
+
+audit_log = AuditLog(db.audit_log, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_SECONDS)
+
+async def entity_history(entity_type: str, entity_id: str, skip: int, limit: int, current_user: User) -> dict:
+    # Write out anything still buffered so the history includes the caller's own recent edits
+    await audit_log.flush()
+    query = {"entity_type": entity_type, "entity_id": entity_id}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    skip = max(skip, 0)
+    limit = min(max(limit, 1), 200)
+    
+    items, total = await asyncio.gather(
+        db.audit_log.find(query, {"_id": 0}).sort('created_at', -1).skip(skip).limit(limit).to_list(limit),
+        db.audit_log.count_documents(query)
+    )
+    return {"total": total, "skip": skip, "limit": limit, "items": items}
+
+@router.get("/tickets/{ticket_id}/history")
+async def get_ticket_history(ticket_id: str, skip: int = 0, limit: int = 50, current_user: User = Depends(get_current_user)):
+    return await entity_history('ticket', ticket_id, skip, limit, current_user)
+
+@router.get("/assets/{asset_id}/history")
+async def get_asset_history(asset_id: str, skip: int = 0, limit: int = 50, current_user: User = Depends(get_current_user)):
+    return await entity_history('asset', asset_id, skip, limit, current_user)
+
+@router.get("/audit/stats")
+async def get_audit_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view audit stats")
+    
+    return audit_log.stats()
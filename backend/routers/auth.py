@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+import os
+import math
+import asyncio
+from typing import Optional
+from datetime import datetime
+from rate_limit import LoginRateLimiter, MongoRateLimitBackend, InMemoryRateLimitBackend, parse_rule
+
+from core import db, TRUST_PROXY_HEADERS
+from models import User, UserCreate, LoginRequest
+from security import hash_password, verify_password, create_token, get_current_user
+from routers.assignment import assignment_engine
+
+
+router = APIRouter()
+
+# Login throttling: "<attempts>/<seconds>" per account and per client IP
+login_rate_limiter = LoginRateLimiter(
+    MongoRateLimitBackend(db.login_attempts)
+    if os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory') == 'mongo'
+    else InMemoryRateLimitBackend(),
+    email_rule=parse_rule(os.environ.get('LOGIN_RATE_LIMIT_EMAIL', '5/300')),
+    ip_rule=parse_rule(os.environ.get('LOGIN_RATE_LIMIT_IP', '30/300'))
+)
+
+@router.post("/auth/register")
+async def register(user_data: UserCreate):
+    # Check if user exists
+    existing = await db.users.find_one({"email": user_data.email})
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
+    # Create user
+    user_dict = user_data.model_dump()
+    password = user_dict.pop('password')
+    user_obj = User(**user_dict)
+    
+    doc = user_obj.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['password_hash'] = hash_password(password)
+    
+    await db.users.insert_one(doc)
+    if user_obj.role == 'technician':
+        assignment_engine.add_technician(user_obj.id)
+    
+    token = create_token(user_obj.id, user_obj.role)
+    return {"user": user_obj, "token": token}
+
+def client_ip(request: Request) -> Optional[str]:
+    if TRUST_PROXY_HEADERS and request.headers.get('x-real-ip'):
+        return request.headers['x-real-ip']
+    return request.client.host if request.client else None
+
+@router.post("/auth/login")
+async def login(login_data: LoginRequest, request: Request):
+    # Throttle before any bcrypt work so bursts of bad passwords can't saturate the CPU
+    retry_after = await login_rate_limiter.check(login_data.email, client_ip(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    
+    user = await db.users.find_one({"email": login_data.email}, {"_id": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    # bcrypt is CPU bound; keep it off the event loop
+    if not await asyncio.to_thread(verify_password, login_data.password, user['password_hash']):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    await login_rate_limiter.reset(login_data.email)
+    user.pop('password_hash')
+    if isinstance(user['created_at'], str):
+        user['created_at'] = datetime.fromisoformat(user['created_at'])
+    
+    token = create_token(user['id'], user['role'])
+    return {"user": User(**user), "token": token}
+
+@router.get("/auth/me", response_model=User)
+async def get_me(current_user: User = Depends(get_current_user)):
+    return current_user
+
+@router.get("/auth/rate-limit/stats")
+async def get_login_rate_limit_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view rate limit stats")
+    
+    return login_rate_limiter.stats()
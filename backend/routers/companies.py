@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+from pymongo import ReturnDocument
+from typing import List, Optional
+from datetime import datetime, timezone
+
+from core import db, bump_data_version
+from models import User, Company, CompanyCreate, Job
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+from routers.jobs import start_job
+from routers.sync import record_deletions
+
+
+router = APIRouter()
+
+@router.post("/companies", response_model=Company)
+async def create_company(company_data: CompanyCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can create companies")
+    
+    company = Company(**company_data.model_dump())
+    doc = company.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    
+    await db.companies.insert_one(doc)
+    await bump_data_version('companies')
+    return company
+
+@router.get("/companies", response_model=List[Company])
+async def get_companies(current_user: User = Depends(get_current_user)):
+    if current_user.role == 'client':
+        companies = await db.companies.find({"id": current_user.company_id}, {"_id": 0}).to_list(1000)
+    else:
+        companies = await db.companies.find({}, {"_id": 0}).to_list(1000)
+    
+    for company in companies:
+        if 'created_at' in company and isinstance(company['created_at'], str):
+            company['created_at'] = datetime.fromisoformat(company['created_at'])
+        elif 'created_at' not in company:
+            company['created_at'] = datetime.now(timezone.utc)
+    
+    return companies
+
+@router.get("/companies/{company_id}", response_model=Company)
+async def get_company(company_id: str, response: Response, current_user: User = Depends(get_current_user)):
+    company = await db.companies.find_one({"id": company_id}, {"_id": 0})
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    if isinstance(company['created_at'], str):
+        company['created_at'] = datetime.fromisoformat(company['created_at'])
+    
+    company = Company(**company)
+    set_etag(response, company.version)
+    return company
+
+@router.put("/companies/{company_id}", response_model=Company)
+async def update_company(
+    company_id: str,
+    company_data: CompanyCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can update companies")
+    
+    update_data = company_data.model_dump()
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(company_id, expected, {"$set": update_data})
+    updated = await db.companies.find_one_and_update(
+        query, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    
+    if not updated:
+        await raise_update_failed(db.companies, company_id, expected, "Company")
+    await bump_data_version('companies')
+    
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    
+    set_etag(response, updated['version'])
+    return Company(**updated)
+
+@router.delete("/companies/{company_id}")
+async def delete_company(company_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete companies")
+    
+    result = await db.companies.delete_one({"id": company_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Company not found")
+    await record_deletions('companies', company_id, [company_id])
+    await bump_data_version('companies')
+    
+    # Dependent documents are removed by a background job so large clients don't block the request
+    job = Job(type='company_delete', target_id=company_id, created_by=current_user.id)
+    doc = job.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    await db.jobs.insert_one(doc)
+    start_job(job.id)
+    
+    return {"message": "Company deleted successfully", "job_id": job.id}
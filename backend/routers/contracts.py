@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+from pymongo import ReturnDocument
+from typing import Optional, List
+from datetime import datetime, timezone
+from normalize import DATE_PARSER_VERSION, parse_loose_date
+
+from core import db, bump_data_version
+from models import User, Contract, ContractCreate
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+from routers.sync import record_deletions
+from routers.sla import check_calendar_exists
+
+
+router = APIRouter()
+
+@router.post("/contracts", response_model=Contract)
+async def create_contract(contract_data: ContractCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can create contracts")
+    
+    await check_calendar_exists(contract_data.calendar_id)
+    contract = Contract(**contract_data.model_dump(), expires_at=parse_loose_date(contract_data.end_date),
+                     expiry_parser_version=DATE_PARSER_VERSION)
+    doc = contract.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    
+    await db.contracts.insert_one(doc)
+    await bump_data_version('contracts')
+    return contract
+
+@router.get("/contracts", response_model=List[Contract])
+async def get_contracts(company_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    query = {}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    elif company_id:
+        query['company_id'] = company_id
+    
+    contracts = await db.contracts.find(query, {"_id": 0}).to_list(1000)
+    
+    for contract in contracts:
+        if isinstance(contract['created_at'], str):
+            contract['created_at'] = datetime.fromisoformat(contract['created_at'])
+    
+    return contracts
+
+@router.put("/contracts/{contract_id}", response_model=Contract)
+async def update_contract(
+    contract_id: str,
+    contract_data: ContractCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can update contracts")
+    
+    await check_calendar_exists(contract_data.calendar_id)
+    update_data = contract_data.model_dump()
+    update_data['expires_at'] = parse_loose_date(contract_data.end_date)
+    update_data['expiry_parser_version'] = DATE_PARSER_VERSION
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(contract_id, expected, {"$set": update_data})
+    updated = await db.contracts.find_one_and_update(
+        query, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    
+    if not updated:
+        await raise_update_failed(db.contracts, contract_id, expected, "Contract")
+    await bump_data_version('contracts')
+    
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    
+    set_etag(response, updated['version'])
+    return Contract(**updated)
+
+@router.delete("/contracts/{contract_id}")
+async def delete_contract(contract_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete contracts")
+    
+    deleted = await db.contracts.find_one_and_delete({"id": contract_id}, projection={"_id": 0, "company_id": 1})
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    await record_deletions('contracts', deleted.get('company_id'), [contract_id])
+    await bump_data_version('contracts')
+    
+    return {"message": "Contract deleted successfully"}
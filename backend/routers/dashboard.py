@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import timedelta, datetime, timezone
+
+from core import db
+from models import User
+from security import get_current_user
+from stats import STATS_GLOBAL_ID, reconcile_stats
+from routers.expirations import get_expiration_digest
+
+
+router = APIRouter()
+
+@router.post("/stats/reconcile")
+async def trigger_stats_reconcile(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can reconcile stats")
+    
+    companies = await reconcile_stats()
+    return {"message": "Stats reconciled", "documents": companies}
+
+@router.get("/dashboard/stats")
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+    query = {}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    
+    # Counters are maintained incrementally, so this is a single document read
+    stats_id = current_user.company_id if current_user.role == 'client' else STATS_GLOBAL_ID
+    stats = await db.stats.find_one({"company_id": stats_id}, {"_id": 0}) or {}
+    ticket_counts = stats.get('tickets', {})
+    asset_counts = stats.get('assets', {})
+    
+    # Company stats (admin only)
+    total_companies = 0
+    if current_user.role in ['admin', 'technician']:
+        total_companies = await db.companies.estimated_document_count()
+    
+    # Ticket by type
+    ticket_types = {}
+    for t_type in ['incident', 'request', 'maintenance']:
+        ticket_types[t_type] = stats.get('tickets_by_type', {}).get(t_type, 0)
+    
+    # Recent activity (last 7 days)
+    seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+    recent_tickets = await db.tickets.find(
+        {**query},
+        {"_id": 0, "id": 1, "title": 1, "status": 1, "created_at": 1}
+    ).sort('created_at', -1).limit(5).to_list(5)
+    
+    for ticket in recent_tickets:
+        if isinstance(ticket['created_at'], str):
+            ticket['created_at'] = datetime.fromisoformat(ticket['created_at'])
+    
+    # Precomputed once a day
+    expiration_digest = await get_expiration_digest()
+    
+    return {
+        'tickets': {
+            'total': ticket_counts.get('total', 0),
+            'open': ticket_counts.get('open', 0),
+            'in_progress': ticket_counts.get('in_progress', 0),
+            'resolved': ticket_counts.get('resolved', 0) + ticket_counts.get('closed', 0),
+            'by_type': ticket_types
+        },
+        'assets': {
+            'total': asset_counts.get('total', 0),
+            'active': asset_counts.get('active', 0),
+            'in_repair': asset_counts.get('in_repair', 0)
+        },
+        'companies': total_companies,
+        'recent_tickets': recent_tickets,
+        'expirations': (
+            expiration_digest['companies'].get(current_user.company_id, {})
+            if current_user.role == 'client' else expiration_digest['totals']
+        )
+    }
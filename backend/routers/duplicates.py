@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Callable, List, Optional
+from assignment import OPEN_STATUSES
+from dedup import DuplicateIndex, signature, ticket_text
+
+from core import db, DUPLICATE_THRESHOLD, DUPLICATE_INDEX_REBUILD_SECONDS, logger
+from models import User
+from security import get_current_user, get_visible_ticket
+
+
+router = APIRouter()
+
+duplicate_index = DuplicateIndex()
+# Changes made while a rebuild runs, replayed onto the new index before it replaces the old one
+pending_changes: Optional[List[Callable[[DuplicateIndex], None]]] = None
+
+def index_ticket(index: DuplicateIndex, doc: dict):
+    if doc.get('status') in OPEN_STATUSES:
+        index.add(doc['id'], doc['company_id'], signature(ticket_text(doc)), doc.get('title') or '', doc.get('duplicate_of'))
+    else:
+        index.remove(doc['id'])
+
+def apply_change(change: Callable[[DuplicateIndex], None]):
+    change(duplicate_index)
+    if pending_changes is not None:
+        pending_changes.append(change)
+
+# duplicate_index is replaced on every rebuild, so other modules go through these helpers
+def duplicate_candidates(company_id: str, sig, limit: int = 1) -> List[dict]:
+    return duplicate_index.query(company_id, sig, DUPLICATE_THRESHOLD, limit=limit)
+
+def register_ticket(ticket_id: str, company_id: str, sig, title: str, duplicate_of: Optional[str]):
+    apply_change(lambda index: index.add(ticket_id, company_id, sig, title, duplicate_of))
+
+def reindex_ticket(doc: dict):
+    doc = dict(doc)
+    apply_change(lambda index: index_ticket(index, doc))
+
+def unindex_ticket(ticket_id: str):
+    apply_change(lambda index: index.remove(ticket_id))
+
+def unindex_company(company_id: str):
+    apply_change(lambda index: index.remove_company(company_id))
+
+def build_duplicate_index(tickets: List[dict]) -> DuplicateIndex:
+    index = DuplicateIndex()
+    for doc in tickets:
+        index_ticket(index, doc)
+    return index
+
+async def rebuild_duplicate_index():
+    """Rebuild the index from the open tickets, including those created by other processes."""
+    global duplicate_index, pending_changes
+    # Started before the read: replaying a change the snapshot already holds is harmless
+    pending_changes = []
+    try:
+        tickets = await db.tickets.find(
+            {"status": {"$in": list(OPEN_STATUSES)}},
+            {"_id": 0, "id": 1, "company_id": 1, "status": 1, "title": 1, "description": 1, "duplicate_of": 1}
+        ).to_list(None)
+        index = await asyncio.to_thread(build_duplicate_index, tickets)
+        for change in pending_changes:
+            change(index)
+        duplicate_index = index
+    finally:
+        pending_changes = None
+
+async def rebuild_duplicate_index_periodically():
+    while True:
+        try:
+            await rebuild_duplicate_index()
+        except Exception:
+            logger.exception("Duplicate index rebuild failed")
+        await asyncio.sleep(DUPLICATE_INDEX_REBUILD_SECONDS)
+
+@router.get("/tickets/{ticket_id}/duplicates")
+async def get_ticket_duplicates(
+    ticket_id: str,
+    threshold: float = DUPLICATE_THRESHOLD,
+    limit: int = 10,
+    current_user: User = Depends(get_current_user)
+):
+    if not 0.1 <= threshold <= 1:
+        raise HTTPException(status_code=400, detail="threshold must be between 0.1 and 1")
+    limit = min(max(limit, 1), 50)
+    await get_visible_ticket(ticket_id, current_user)
+    ticket = await db.tickets.find_one({"id": ticket_id}, {"_id": 0, "company_id": 1, "title": 1, "description": 1})
+    sig = signature(ticket_text(ticket))
+    return duplicate_index.query(ticket['company_id'], sig, threshold, limit=limit, exclude=ticket_id)
+
+@router.get("/duplicates/stats")
+async def get_duplicate_index_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view duplicate index stats")
+    return {**duplicate_index.stats(), 'threshold': DUPLICATE_THRESHOLD}
@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Optional
+from datetime import date, datetime, timezone, timedelta
+from normalize import DATE_PARSER_VERSION, parse_loose_date
+
+from core import db, backfill_derived_fields, logger
+from models import User
+from security import get_current_user
+
+
+router = APIRouter()
+
+# Free-form expiry strings are mirrored into an indexed `expires_at` date on write
+EXPIRY_SOURCES = {
+    'asset': ('assets', 'warranty_expiration'),
+    'service': ('services', 'expiration_date'),
+    'contract': ('contracts', 'end_date'),
+}
+EXPIRY_LABEL_FIELDS = {
+    'asset': ['asset_type', 'model', 'serial_number', 'host_name'],
+    'service': ['service_name', 'service_type'],
+    'contract': ['service_id', 'status'],
+}
+DIGEST_WINDOWS = [7, 30, 90]
+
+async def backfill_expirations():
+    for collection_name, source_field in EXPIRY_SOURCES.values():
+        count = await backfill_derived_fields(
+            db[collection_name], 'expiry_parser_version', [source_field],
+            lambda doc, field=source_field: {
+                'expires_at': parse_loose_date(doc.get(field)),
+                'expiry_parser_version': DATE_PARSER_VERSION,
+            },
+            version=DATE_PARSER_VERSION
+        )
+        if count:
+            logger.info("Backfilled expires_at on %d %s", count, collection_name)
+
+async def compute_expiration_digest(day: date) -> dict:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    
+    async def group_counts(collection_name):
+        return await db[collection_name].aggregate([
+            {"$match": {"expires_at": {"$gte": start - timedelta(days=30), "$lt": start + timedelta(days=max(DIGEST_WINDOWS))}}},
+            {"$group": {
+                "_id": "$company_id",
+                "expired_30d": {"$sum": {"$cond": [{"$lt": ["$expires_at", start]}, 1, 0]}},
+                **{
+                    f"next_{days}d": {"$sum": {"$cond": [{"$and": [
+                        {"$gte": ["$expires_at", start]},
+                        {"$lt": ["$expires_at", start + timedelta(days=days)]}
+                    ]}, 1, 0]}}
+                    for days in DIGEST_WINDOWS
+                }
+            }}
+        ]).to_list(None)
+    
+    kinds = list(EXPIRY_SOURCES)
+    results = await asyncio.gather(*(group_counts(EXPIRY_SOURCES[kind][0]) for kind in kinds))
+    
+    companies = {}
+    totals = {}
+    for kind, groups in zip(kinds, results):
+        for group in groups:
+            if not group['_id']:
+                continue
+            counts = {key: value for key, value in group.items() if key != '_id'}
+            companies.setdefault(group['_id'], {})[kind] = counts
+            kind_totals = totals.setdefault(kind, {})
+            for key, value in counts.items():
+                kind_totals[key] = kind_totals.get(key, 0) + value
+    
+    return {
+        "date": day.isoformat(),
+        "totals": totals,
+        "companies": companies,
+        "generated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+async def get_expiration_digest(day: Optional[date] = None) -> dict:
+    day = day or datetime.now(timezone.utc).date()
+    digest = await db.expiration_digests.find_one({"date": day.isoformat()}, {"_id": 0})
+    if not digest:
+        # First request of the day computes it; concurrent computations upsert the same result
+        digest = await compute_expiration_digest(day)
+        await db.expiration_digests.replace_one({"date": digest['date']}, digest, upsert=True)
+    return digest
+
+@router.get("/expirations")
+async def get_expirations(
+    days: int = 30,
+    past_days: int = 0,
+    types: Optional[str] = None,
+    company_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    days = min(max(days, 0), 365)
+    past_days = min(max(past_days, 0), 365)
+    kinds = [kind.strip() for kind in types.split(',')] if types else list(EXPIRY_SOURCES)
+    if any(kind not in EXPIRY_SOURCES for kind in kinds):
+        raise HTTPException(status_code=400, detail="types must be a comma separated list of asset, service, contract")
+    
+    now = datetime.now(timezone.utc)
+    today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+    query = {"expires_at": {"$gte": today - timedelta(days=past_days), "$lt": today + timedelta(days=days + 1)}}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    elif company_id:
+        query['company_id'] = company_id
+    
+    async def find_kind(kind):
+        collection_name, source_field = EXPIRY_SOURCES[kind]
+        projection = {"_id": 0, "id": 1, "company_id": 1, "expires_at": 1, source_field: 1,
+                      **{field: 1 for field in EXPIRY_LABEL_FIELDS[kind]}}
+        return await db[collection_name].find(query, projection).sort('expires_at', 1).to_list(500)
+    
+    results = await asyncio.gather(*(find_kind(kind) for kind in kinds))
+    
+    items = []
+    for kind, docs in zip(kinds, results):
+        for doc in docs:
+            items.append({**doc, 'type': kind, 'days_left': (doc['expires_at'] - today).days})
+    items.sort(key=lambda item: item['expires_at'])
+    
+    return {
+        'from': (today - timedelta(days=past_days)).date().isoformat(),
+        'to': (today + timedelta(days=days)).date().isoformat(),
+        'counts': {kind: len(docs) for kind, docs in zip(kinds, results)},
+        'items': items
+    }
+
+@router.get("/expirations/digest")
+async def get_expirations_digest(current_user: User = Depends(get_current_user)):
+    digest = await get_expiration_digest()
+    if current_user.role == 'client':
+        return {"date": digest['date'], "counts": digest['companies'].get(current_user.company_id, {})}
+    return {"date": digest['date'], "counts": digest['totals'], "companies": digest['companies']}
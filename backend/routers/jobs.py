@@ -0,0 +1,185 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo import ReturnDocument
+import asyncio
+from typing import Optional, List
+from datetime import datetime, timezone, timedelta
+
+from core import (
+    db,
+    CASCADE_DELETE_BATCH_SIZE,
+    CASCADE_DELETE_PAUSE_SECONDS,
+    JOB_LEASE_SECONDS,
+    bump_data_version,
+    spawn_background_task,
+    logger,
+)
+from models import User, Job
+from security import get_current_user
+from stats import drop_company_stats
+from routers.attachments import delete_attachments
+from routers.duplicates import unindex_company
+from routers.sync import record_deletions
+from routers.webhooks import webhook_dispatcher
+
+
+router = APIRouter()
+
+# ticket_notes have no company_id; they are removed together with each batch of tickets
+CASCADE_DELETE_COLLECTIONS = ['tickets', 'tickets_archive', 'assets', 'services', 'contracts']
+# Notes live next to their tickets, hot or archived
+TICKET_NOTE_COLLECTIONS = {'tickets': 'ticket_notes', 'tickets_archive': 'ticket_notes_archive'}
+# Name deletions are reported under by /api/sync, where archived tickets are still tickets
+SYNC_NAMES = {'tickets_archive': 'tickets'}
+
+def start_job(job_id: str):
+    spawn_background_task(job_id, run_company_delete_job(job_id))
+
+async def claim_job(job_id: str) -> Optional[dict]:
+    # A lease keeps two workers from running the same job; an expired lease means its worker died
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {
+            "id": job_id,
+            "status": {"$in": ["pending", "running"]},
+            "$or": [{"lease_until": None}, {"lease_until": {"$lt": now.isoformat()}}]
+        },
+        {"$set": {
+            "status": "running",
+            "lease_until": (now + timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(),
+            "updated_at": now.isoformat()
+        }},
+        projection={"_id": 0}
+    )
+
+async def wait_for_claim(job_id: str) -> Optional[dict]:
+    # A worker that died within its lease (e.g. a quick restart) blocks the claim until the lease runs out
+    while True:
+        job = await claim_job(job_id)
+        if job:
+            return job
+        current = await db.jobs.find_one({"id": job_id}, {"_id": 0, "status": 1, "lease_until": 1})
+        if not current or current['status'] not in ('pending', 'running'):
+            return None
+        wait = 1.0
+        if current.get('lease_until'):
+            lease_until = datetime.fromisoformat(current['lease_until'])
+            wait = max((lease_until - datetime.now(timezone.utc)).total_seconds(), 0) + 1
+        await asyncio.sleep(wait)
+
+async def run_company_delete_job(job_id: str):
+    job = await wait_for_claim(job_id)
+    if not job:
+        return
+    company_id = job['target_id']
+    
+    try:
+        for name in CASCADE_DELETE_COLLECTIONS:
+            while True:
+                batch = await db[name].find(
+                    {"company_id": company_id}, {"_id": 1, "id": 1}
+                ).limit(CASCADE_DELETE_BATCH_SIZE).to_list(CASCADE_DELETE_BATCH_SIZE)
+                if not batch:
+                    break
+                
+                deleted = {}
+                if name in TICKET_NOTE_COLLECTIONS:
+                    notes_name = TICKET_NOTE_COLLECTIONS[name]
+                    notes = await db[notes_name].delete_many({"ticket_id": {"$in": [d['id'] for d in batch]}})
+                    deleted[notes_name] = notes.deleted_count
+                    deleted['attachments'] = await delete_attachments({"ticket_id": {"$in": [d['id'] for d in batch]}})
+                result = await db[name].delete_many({"_id": {"$in": [d['_id'] for d in batch]}})
+                deleted[name] = result.deleted_count
+                await record_deletions(SYNC_NAMES.get(name, name), company_id, [d['id'] for d in batch])
+                if name in TICKET_NOTE_COLLECTIONS:
+                    await webhook_dispatcher.emit_many('ticket.deleted', [
+                        ({'ticket': {'id': d['id'], 'company_id': company_id}}, company_id) for d in batch
+                    ])
+                
+                now = datetime.now(timezone.utc)
+                await db.jobs.update_one(
+                    {"id": job_id},
+                    {
+                        "$inc": {f"progress.{key}": count for key, count in deleted.items()},
+                        "$set": {
+                            "lease_until": (now + timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(),
+                            "updated_at": now.isoformat()
+                        }
+                    }
+                )
+                # Throttle so foreground requests keep their share of the database
+                await asyncio.sleep(CASCADE_DELETE_PAUSE_SECONDS)
+        
+        await drop_company_stats(company_id)
+        unindex_company(company_id)
+        await bump_data_version(*CASCADE_DELETE_COLLECTIONS)
+        
+        now = datetime.now(timezone.utc).isoformat()
+        await db.jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "completed", "lease_until": None, "updated_at": now, "finished_at": now}}
+        )
+    except asyncio.CancelledError:
+        # Shutting down: release the lease so the next startup resumes immediately
+        await db.jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "pending", "lease_until": None, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        raise
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        await db.jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "lease_until": None,
+                      "updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+
+def parse_job(job: dict) -> Job:
+    for field in ('created_at', 'updated_at', 'finished_at'):
+        if job.get(field) and isinstance(job[field], str):
+            job[field] = datetime.fromisoformat(job[field])
+    return Job(**job)
+
+@router.get("/jobs", response_model=List[Job])
+async def get_jobs(status: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view jobs")
+    
+    query = {}
+    if status:
+        query['status'] = status
+    
+    jobs = await db.jobs.find(query, {"_id": 0}).sort('created_at', -1).to_list(100)
+    return [parse_job(job) for job in jobs]
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view jobs")
+    
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return parse_job(job)
+
+@router.post("/jobs/{job_id}/resume", response_model=Job)
+async def resume_job(job_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can resume jobs")
+    
+    now = datetime.now(timezone.utc).isoformat()
+    # A running job whose lease ran out has lost its worker
+    job = await db.jobs.find_one_and_update(
+        {"id": job_id, "$or": [
+            {"status": {"$in": ["pending", "failed"]}},
+            {"status": "running", "lease_until": {"$lt": now}},
+        ]},
+        {"$set": {"status": "pending", "error": None, "lease_until": None, "updated_at": now}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="No pending, failed or stalled job with that id")
+    
+    start_job(job_id)
+    return parse_job(job)
@@ -0,0 +1,354 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse, FileResponse
+import os
+import json
+import hashlib
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from resolutions import RESOLVED_STATUSES
+
+from core import (
+    db,
+    REPORT_WORKERS,
+    REPORT_POLL_SECONDS,
+    REPORT_JOB_TIMEOUT_SECONDS,
+    REPORTS_DIR,
+    REPORT_RETENTION_DAYS,
+    REPORT_PRUNE_SECONDS,
+    loaders,
+    logger,
+)
+from models import User, ReportJob, ReportJobCreate
+from security import get_current_user
+from routers.sla import contract_calendars, sla_clock
+from routers.archive import archive_may_hold
+
+
+router = APIRouter()
+
+REPORT_FILTERS = {
+    'tickets': ['company_id', 'start_date', 'end_date', 'ticket_type'],
+    'assets': ['company_id', 'status', 'asset_type'],
+}
+# Collections whose data version is part of a report's cache fingerprint
+REPORT_DATA_SOURCES = {
+    'tickets': ['tickets', 'contracts', 'sla_calendars', 'system_config'],
+    'assets': ['assets', 'companies', 'system_config'],
+}
+
+report_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report')
+
+def normalize_report_filters(report_type: str, filters: Dict[str, Any], current_user: User) -> Dict[str, str]:
+    normalized = {
+        key: str(filters[key]).strip()
+        for key in REPORT_FILTERS[report_type]
+        if filters.get(key) not in (None, '')
+    }
+    if current_user.role == 'client':
+        normalized['company_id'] = current_user.company_id
+    if report_type == 'tickets' and not ('start_date' in normalized and 'end_date' in normalized):
+        # The date range only applies when both ends are given
+        normalized.pop('start_date', None)
+        normalized.pop('end_date', None)
+    return normalized
+
+async def load_data_versions(names: List[str]) -> Dict[str, int]:
+    versions = await db.data_versions.find({"id": {"$in": names}}, {"_id": 0}).to_list(len(names))
+    return {doc['id']: doc['version'] for doc in versions}
+
+def fingerprint_with_versions(report_type: str, filters: Dict[str, str], versions: Dict[str, int]) -> str:
+    payload = {
+        'report_type': report_type,
+        'filters': filters,
+        'versions': {name: versions[name] for name in REPORT_DATA_SOURCES[report_type] if name in versions}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+async def report_fingerprint(report_type: str, filters: Dict[str, str]) -> str:
+    versions = await load_data_versions(REPORT_DATA_SOURCES[report_type])
+    return fingerprint_with_versions(report_type, filters, versions)
+
+async def load_tickets_report(filters: Dict[str, str]) -> dict:
+    query = {}
+    if filters.get('company_id'):
+        query['company_id'] = filters['company_id']
+    if filters.get('ticket_type'):
+        query['ticket_type'] = filters['ticket_type']
+    
+    # Date filtering
+    if filters.get('start_date') and filters.get('end_date'):
+        query['created_at'] = {
+            '$gte': filters['start_date'],
+            '$lte': filters['end_date']
+        }
+    
+    tickets, config = await asyncio.gather(
+        db.tickets.find(query, {"_id": 0}).to_list(1000),
+        db.system_config.find_one({"id": "system_config"}, {"_id": 0})
+    )
+    if 'created_at' in query and len(tickets) < 1000 and archive_may_hold(filters['start_date']):
+        hot_ids = {ticket['id'] for ticket in tickets}
+        # A batch being archived is in both collections until the archiver deletes it
+        tickets += [ticket for ticket in await db.tickets_archive.find(query, {"_id": 0}).to_list(1000 - len(tickets))
+                    if ticket['id'] not in hot_ids]
+    
+    # SLA compliance of resolved tickets, measured like the alerts; the strictest active contract counts
+    resolved = [ticket for ticket in tickets if ticket.get('status') in RESOLVED_STATUSES and ticket.get('resolved_at')]
+    contracts_by_company = await loaders['active_contracts_by_company'].load_many(
+        ticket['company_id'] for ticket in resolved
+    )
+    calendars = await contract_calendars(
+        contract for contracts in contracts_by_company.values() for contract in contracts
+    )
+    now = datetime.now(timezone.utc)
+    for ticket in resolved:
+        contracts = contracts_by_company[ticket['company_id']]
+        if contracts:
+            ticket['sla_met'] = min(
+                sla_clock(ticket, contract, calendars[contract['id']], now)['hours_remaining'] for contract in contracts
+            ) >= 0
+    return {
+        'tickets': tickets,
+        'config': config,
+        'start_date': filters.get('start_date'),
+        'end_date': filters.get('end_date')
+    }
+
+async def load_assets_report(filters: Dict[str, str]) -> dict:
+    query = {}
+    for key in ('company_id', 'status', 'asset_type'):
+        if filters.get(key):
+            query[key] = filters[key]
+    
+    assets, config = await asyncio.gather(
+        db.assets.find(query, {"_id": 0}).to_list(1000),
+        db.system_config.find_one({"id": "system_config"}, {"_id": 0})
+    )
+    
+    # Get companies info
+    company_ids = list(set([asset['company_id'] for asset in assets]))
+    companies = {
+        company['id']: company['name']
+        for company in await db.companies.find(
+            {"id": {"$in": company_ids}}, {"_id": 0, "id": 1, "name": 1}
+        ).to_list(len(company_ids))
+    }
+    return {'assets': assets, 'companies': companies, 'config': config}
+
+REPORT_LOADERS = {'tickets': load_tickets_report, 'assets': load_assets_report}
+
+def render_report(report_type: str, data: dict) -> bytes:
+    # ReportLab and Pillow are imported by the first report, on a report thread, not at API startup
+    from report_render import REPORT_RENDERERS
+    return REPORT_RENDERERS[report_type](**data)
+
+async def build_report(report_type: str, filters: Dict[str, str]) -> bytes:
+    data = await REPORT_LOADERS[report_type](filters)
+    # ReportLab is CPU bound; render on the bounded report pool instead of the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(report_executor, render_report, report_type, data)
+
+@router.get("/reports/tickets/pdf")
+async def generate_tickets_pdf(
+    company_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    ticket_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    filters = normalize_report_filters('tickets', {
+        'company_id': company_id, 'start_date': start_date, 'end_date': end_date, 'ticket_type': ticket_type
+    }, current_user)
+    pdf = await build_report('tickets', filters)
+    
+    return StreamingResponse(
+        BytesIO(pdf),
+        media_type="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=tickets_report.pdf"}
+    )
+
+
+@router.get("/reports/assets/pdf")
+async def generate_assets_pdf(
+    company_id: Optional[str] = None,
+    status: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    filters = normalize_report_filters('assets', {
+        'company_id': company_id, 'status': status, 'asset_type': asset_type
+    }, current_user)
+    pdf = await build_report('assets', filters)
+    
+    return StreamingResponse(
+        BytesIO(pdf),
+        media_type="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=assets_report.pdf"}
+    )
+
+# Reports requested through /reports/jobs are rendered by a fixed number of worker tasks
+# and stored on disk under their fingerprint (report type + normalized filters + data
+# versions), so identical requests reuse the finished file until the data changes
+report_queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+def report_file_path(fingerprint: str) -> Path:
+    return REPORTS_DIR / f"{fingerprint}.pdf"
+
+def parse_report_job(job: dict) -> ReportJob:
+    for field in ('created_at', 'finished_at'):
+        if job.get(field) and isinstance(job[field], str):
+            job[field] = datetime.fromisoformat(job[field])
+    return ReportJob(**job)
+
+async def claim_report_job(job_id: Optional[str]) -> Optional[dict]:
+    query = {"status": "queued"}
+    if job_id:
+        query['id'] = job_id
+    return await db.report_jobs.find_one_and_update(
+        query,
+        {"$set": {"status": "running", "started_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"_id": 0},
+        sort=[("created_at", 1)]
+    )
+
+async def run_report_job(job: dict):
+    try:
+        pdf = await build_report(job['report_type'], job['filters'])
+        path = report_file_path(job['fingerprint'])
+        tmp_path = path.with_suffix('.tmp')
+        await asyncio.to_thread(tmp_path.write_bytes, pdf)
+        os.replace(tmp_path, path)
+        await db.report_jobs.update_one(
+            {"id": job['id']},
+            {"$set": {"status": "completed", "file_size": len(pdf),
+                      "finished_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    except Exception as e:
+        logger.exception("Report job %s failed", job['id'])
+        await db.report_jobs.update_one(
+            {"id": job['id']},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.now(timezone.utc).isoformat()}}
+        )
+
+def list_report_files() -> List[Tuple[Path, float]]:
+    if not REPORTS_DIR.exists():
+        return []
+    return [(path, path.stat().st_mtime) for path in REPORTS_DIR.iterdir() if path.suffix in ('.pdf', '.tmp')]
+
+def remove_report_files(paths: List[Path]):
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+async def prune_report_files() -> int:
+    """Delete rendered reports past retention, and files no request can be served from any more.
+
+    Every data version bump gives new fingerprints, so without this the directory only grows.
+    A file is still servable while a completed job for it would get the same fingerprint from
+    the current data versions; completed jobs are kept, so older ones just stop matching.
+    Files younger than a job timeout are left alone: their job may not be marked completed yet.
+    """
+    now = time.time()
+    expired, candidates = [], {}
+    for path, modified in await asyncio.to_thread(list_report_files):
+        age = now - modified
+        if age > REPORT_RETENTION_DAYS * 86400 or (path.suffix == '.tmp' and age > REPORT_JOB_TIMEOUT_SECONDS):
+            expired.append(path)
+        elif path.suffix == '.pdf' and age > REPORT_JOB_TIMEOUT_SECONDS:
+            candidates[path.stem] = path
+    if candidates:
+        jobs, versions = await asyncio.gather(
+            db.report_jobs.find(
+                {"fingerprint": {"$in": list(candidates)}, "status": "completed"},
+                {"_id": 0, "report_type": 1, "filters": 1, "fingerprint": 1}
+            ).to_list(None),
+            load_data_versions(sorted({name for names in REPORT_DATA_SOURCES.values() for name in names}))
+        )
+        current = {
+            job['fingerprint'] for job in jobs
+            if fingerprint_with_versions(job['report_type'], job['filters'], versions) == job['fingerprint']
+        }
+        expired += [path for fingerprint, path in candidates.items() if fingerprint not in current]
+    await asyncio.to_thread(remove_report_files, expired)
+    return len(expired)
+
+# Shared by the worker tasks of this process
+last_report_prune: Optional[float] = None
+
+async def report_worker():
+    global last_report_prune
+    while True:
+        if last_report_prune is None or time.monotonic() - last_report_prune >= REPORT_PRUNE_SECONDS:
+            last_report_prune = time.monotonic()
+            try:
+                pruned = await prune_report_files()
+                if pruned:
+                    logger.info("Pruned %d cached report files", pruned)
+            except Exception:
+                logger.exception("Report cache pruning failed")
+        try:
+            job_id = await asyncio.wait_for(report_queue.get(), timeout=REPORT_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            # Also pick up jobs queued by other API workers or left over from a restart
+            job_id = None
+        try:
+            job = await claim_report_job(job_id)
+            if job:
+                await run_report_job(job)
+        except Exception:
+            logger.exception("Report worker error")
+
+@router.post("/reports/jobs", response_model=ReportJob)
+async def create_report_job(job_data: ReportJobCreate, current_user: User = Depends(get_current_user)):
+    if job_data.report_type not in REPORT_FILTERS:
+        raise HTTPException(status_code=400, detail="report_type must be tickets or assets")
+    
+    filters = normalize_report_filters(job_data.report_type, job_data.filters, current_user)
+    fingerprint = await report_fingerprint(job_data.report_type, filters)
+    
+    # Reuse a finished report for the same data, or join one already in progress
+    existing = await db.report_jobs.find_one(
+        {"fingerprint": fingerprint, "status": {"$in": ["queued", "running", "completed"]}},
+        {"_id": 0},
+        sort=[("created_at", -1)]
+    )
+    if existing and (existing['status'] != 'completed' or report_file_path(fingerprint).exists()):
+        existing['cached'] = existing['status'] == 'completed'
+        return parse_report_job(existing)
+    
+    job = ReportJob(report_type=job_data.report_type, filters=filters, fingerprint=fingerprint,
+                    created_by=current_user.id)
+    doc = job.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc.pop('cached')
+    await db.report_jobs.insert_one(doc)
+    report_queue.put_nowait(job.id)
+    return job
+
+async def get_authorized_report_job(job_id: str, current_user: User) -> dict:
+    job = await db.report_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if current_user.role == 'client' and job['filters'].get('company_id') != current_user.company_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this report")
+    return job
+
+@router.get("/reports/jobs/{job_id}", response_model=ReportJob)
+async def get_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    return parse_report_job(await get_authorized_report_job(job_id, current_user))
+
+@router.get("/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await get_authorized_report_job(job_id, current_user)
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+    
+    path = report_file_path(job['fingerprint'])
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Report file expired, request it again")
+    
+    return FileResponse(path, media_type="application/pdf", filename=f"{job['report_type']}_report.pdf")
@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Callable, List, Optional
+from datetime import datetime, timezone
+from resolutions import ResolutionIndex, has_resolution, ResolutionIndexBuilder, RESOLVED_STATUSES
+
+from core import (
+    db,
+    RESOLUTION_INDEX_PATH,
+    RESOLUTION_INDEX_REBUILD_SECONDS,
+    RESOLUTION_INDEX_MAX_DELTA,
+    RESOLUTION_INDEX_SYNC_SECONDS,
+    logger,
+)
+from models import User, ResolutionQuery
+from security import get_current_user
+
+
+router = APIRouter()
+
+resolution_index = ResolutionIndex.empty()
+# Changes made while a rebuild runs, replayed onto the new index before it replaces the old one
+pending_changes: Optional[List[Callable[[ResolutionIndex], None]]] = None
+RESOLUTION_SOURCE_PROJECTION = {
+    "_id": 0, "id": 1, "status": 1, "title": 1, "description": 1, "final_resolution": 1, "maintenance_log": 1
+}
+
+def apply_change(change: Callable[[ResolutionIndex], None]):
+    change(resolution_index)
+    if pending_changes is not None:
+        pending_changes.append(change)
+
+def index_resolution(doc: dict):
+    doc = dict(doc)
+    if has_resolution(doc):
+        apply_change(lambda index: index.add(doc['id'], doc))
+    else:
+        apply_change(lambda index: index.remove(doc['id']))
+
+def forget_resolution(ticket_id: str):
+    apply_change(lambda index: index.remove(ticket_id))
+
+async def build_resolution_index() -> ResolutionIndex:
+    built_at = datetime.now(timezone.utc).isoformat()
+    builder = ResolutionIndexBuilder()
+    # Archived tickets first: one archived while the live tickets are scanned is then not seen twice
+    for collection in (db.tickets_archive, db.tickets):
+        batch = []
+        async for doc in collection.find({"status": {"$in": list(RESOLVED_STATUSES)}}, RESOLUTION_SOURCE_PROJECTION):
+            if has_resolution(doc):
+                batch.append(doc)
+            if len(batch) >= 5000:
+                await asyncio.to_thread(builder.add, batch)
+                batch = []
+        await asyncio.to_thread(builder.add, batch)
+    index = await asyncio.to_thread(builder.finish, built_at)
+    await asyncio.to_thread(index.save, RESOLUTION_INDEX_PATH)
+    return index
+
+async def sync_resolution_index(index: ResolutionIndex):
+    """Add tickets resolved since the last sync, including those closed by other processes."""
+    synced_at = datetime.now(timezone.utc).isoformat()
+    query = {"status": {"$in": list(RESOLVED_STATUSES)}}
+    if index.synced_at:
+        query['resolved_at'] = {"$gte": index.synced_at}
+    async for doc in db.tickets.find(query, RESOLUTION_SOURCE_PROJECTION):
+        if has_resolution(doc):
+            index.add(doc['id'], doc)
+    index.synced_at = synced_at
+
+async def maintain_resolution_index():
+    global resolution_index, pending_changes
+    if RESOLUTION_INDEX_PATH.exists():
+        try:
+            resolution_index = await asyncio.to_thread(ResolutionIndex.load, RESOLUTION_INDEX_PATH)
+        except Exception:
+            logger.exception("Could not load %s; rebuilding", RESOLUTION_INDEX_PATH)
+    while True:
+        try:
+            index = resolution_index
+            age = (
+                (datetime.now(timezone.utc) - datetime.fromisoformat(index.built_at)).total_seconds()
+                if index.built_at else None
+            )
+            if age is None or age > RESOLUTION_INDEX_REBUILD_SECONDS or index.delta_size > RESOLUTION_INDEX_MAX_DELTA:
+                # Started before the scan: replaying a change the new index already holds is harmless,
+                # and removals (deleted or reopened tickets) would otherwise come back
+                pending_changes = []
+                index = await build_resolution_index()
+            await sync_resolution_index(index)
+            for change in pending_changes or []:
+                change(index)
+            resolution_index = index
+        except Exception:
+            logger.exception("Resolution index maintenance failed")
+        finally:
+            pending_changes = None
+        await asyncio.sleep(RESOLUTION_INDEX_SYNC_SECONDS)
+
+async def resolution_suggestions(text: str, limit: int, exclude: Optional[str] = None) -> List[dict]:
+    limit = min(max(limit, 1), 20)
+    # Ask for one extra in case the excluded ticket itself is among the matches
+    matches = [m for m in resolution_index.query(text, limit + 1) if m[0] != exclude][:limit]
+    if not matches:
+        return []
+    scores = dict(matches)
+    query = {"id": {"$in": list(scores)}, "status": {"$in": list(RESOLVED_STATUSES)}}
+    projection = {"_id": 0, "id": 1, "title": 1, "company_id": 1, "category": 1, "final_resolution": 1,
+                  "maintenance_log": 1, "resolved_at": 1}
+    tickets = await db.tickets.find(query, projection).to_list(limit)
+    if len(tickets) < len(scores):
+        query['id'] = {"$in": list(scores.keys() - {ticket['id'] for ticket in tickets})}
+        tickets += await db.tickets_archive.find(query, projection).to_list(limit)
+    for ticket in tickets:
+        ticket['score'] = scores[ticket['id']]
+    tickets.sort(key=lambda ticket: ticket['score'], reverse=True)
+    return tickets
+
+@router.post("/resolution-suggestions")
+async def suggest_resolutions(query: ResolutionQuery, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can view resolution suggestions")
+    return await resolution_suggestions(f"{query.title} {query.description}", query.limit)
+
+@router.get("/tickets/{ticket_id}/resolution-suggestions")
+async def suggest_ticket_resolutions(ticket_id: str, limit: int = 5, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can view resolution suggestions")
+    
+    ticket = await db.tickets.find_one({"id": ticket_id}, {"_id": 0, "title": 1, "description": 1})
+    if not ticket:
+        ticket = await db.tickets_archive.find_one({"id": ticket_id}, {"_id": 0, "title": 1, "description": 1})
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return await resolution_suggestions(f"{ticket['title']} {ticket['description']}", limit, exclude=ticket_id)
+
+@router.get("/resolution-suggestions/stats")
+async def get_resolution_index_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view resolution index stats")
+    return resolution_index.stats()
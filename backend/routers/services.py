@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+from pymongo import ReturnDocument
+from typing import Optional, List
+from datetime import datetime, timezone
+from normalize import DATE_PARSER_VERSION, parse_loose_date
+
+from core import db
+from models import User, Service, ServiceCreate
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+from routers.sync import record_deletions
+
+
+router = APIRouter()
+
+@router.post("/services", response_model=Service)
+async def create_service(service_data: ServiceCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can create services")
+    
+    service = Service(**service_data.model_dump(), expires_at=parse_loose_date(service_data.expiration_date),
+                   expiry_parser_version=DATE_PARSER_VERSION)
+    doc = service.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    
+    await db.services.insert_one(doc)
+    return service
+
+@router.get("/services", response_model=List[Service])
+async def get_services(company_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    query = {}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    elif company_id:
+        query['company_id'] = company_id
+    
+    services = await db.services.find(query, {"_id": 0}).to_list(1000)
+    
+    for service in services:
+        if isinstance(service['created_at'], str):
+            service['created_at'] = datetime.fromisoformat(service['created_at'])
+    
+    return services
+
+@router.get("/services/{service_id}", response_model=Service)
+async def get_service(service_id: str, response: Response, current_user: User = Depends(get_current_user)):
+    service = await db.services.find_one({"id": service_id}, {"_id": 0})
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    
+    if isinstance(service['created_at'], str):
+        service['created_at'] = datetime.fromisoformat(service['created_at'])
+    
+    service = Service(**service)
+    set_etag(response, service.version)
+    return service
+
+@router.put("/services/{service_id}", response_model=Service)
+async def update_service(
+    service_id: str,
+    service_data: ServiceCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can update services")
+    
+    update_data = service_data.model_dump()
+    update_data['expires_at'] = parse_loose_date(service_data.expiration_date)
+    update_data['expiry_parser_version'] = DATE_PARSER_VERSION
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(service_id, expected, {"$set": update_data})
+    updated = await db.services.find_one_and_update(
+        query, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    
+    if not updated:
+        await raise_update_failed(db.services, service_id, expected, "Service")
+    
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    
+    set_etag(response, updated['version'])
+    return Service(**updated)
+
+@router.delete("/services/{service_id}")
+async def delete_service(service_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete services")
+    
+    deleted = await db.services.find_one_and_delete({"id": service_id}, projection={"_id": 0, "company_id": 1})
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Service not found")
+    await record_deletions('services', deleted.get('company_id'), [service_id])
+    
+    return {"message": "Service deleted successfully"}
@@ -0,0 +1,243 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+from pymongo import ReturnDocument
+import asyncio
+from typing import Dict, Tuple, Iterable, Optional, List
+from datetime import datetime, timedelta, timezone
+from resolutions import RESOLVED_STATUSES
+from sla import WorkingCalendar
+
+from core import db, SLA_MONITOR_SECONDS, loaders, bump_data_version, logger
+from models import User, SLACalendar, SLACalendarCreate
+from security import get_current_user, get_visible_ticket
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+from routers.webhooks import webhook_dispatcher
+
+
+router = APIRouter()
+
+ALWAYS_OPEN_CALENDAR = WorkingCalendar()
+# Calendar id -> (version, compiled calendar); compiling expands the interval tables
+compiled_calendars: Dict[str, Tuple[int, WorkingCalendar]] = {}
+
+def compile_calendar(doc: dict) -> WorkingCalendar:
+    cached = compiled_calendars.get(doc['id'])
+    if cached and cached[0] == doc.get('version'):
+        return cached[1]
+    calendar = WorkingCalendar(doc['timezone'], doc['working_hours'], doc.get('holidays') or [])
+    compiled_calendars[doc['id']] = (doc.get('version'), calendar)
+    return calendar
+
+async def contract_calendars(contracts: Iterable[dict]) -> Dict[str, WorkingCalendar]:
+    """Working calendar of each contract, by contract id."""
+    contracts = list(contracts)
+    docs = await loaders['sla_calendars'].load_many(contract.get('calendar_id') for contract in contracts)
+    return {
+        contract['id']: compile_calendar(docs[contract['calendar_id']]) if docs.get(contract.get('calendar_id')) else ALWAYS_OPEN_CALENDAR
+        for contract in contracts
+    }
+
+def sla_clock(ticket: dict, contract: dict, calendar: WorkingCalendar, now: datetime) -> dict:
+    """Deadline and remaining business hours of a ticket under a contract; stops at resolution."""
+    created_at = datetime.fromisoformat(ticket['created_at']) if isinstance(ticket['created_at'], str) else ticket['created_at']
+    if ticket.get('status') in RESOLVED_STATUSES:
+        # Tickets resolved before resolved_at was recorded stopped at their last update
+        stop = ticket.get('resolved_at') or ticket.get('updated_at') or now
+    else:
+        stop = now
+    if isinstance(stop, str):
+        stop = datetime.fromisoformat(stop)
+    budget = timedelta(hours=contract['sla_hours'])
+    try:
+        deadline = calendar.deadline(created_at, budget)
+    except ValueError:
+        # Beyond the calendar table (a large sla_hours on a sparse calendar): no deadline to show
+        deadline = None
+    return {
+        'contract_id': contract['id'],
+        'sla_hours': contract['sla_hours'],
+        'deadline': deadline,
+        'hours_remaining': (budget - calendar.elapsed(created_at, stop)).total_seconds() / 3600
+    }
+
+async def check_calendar_exists(calendar_id: Optional[str]):
+    if calendar_id and not await db.sla_calendars.find_one({"id": calendar_id}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="SLA calendar not found")
+
+def validate_calendar(calendar_data: SLACalendarCreate):
+    try:
+        WorkingCalendar(calendar_data.timezone, calendar_data.working_hours, calendar_data.holidays)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sla-calendars", response_model=SLACalendar)
+async def create_sla_calendar(calendar_data: SLACalendarCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can create SLA calendars")
+    
+    validate_calendar(calendar_data)
+    calendar = SLACalendar(**calendar_data.model_dump())
+    doc = calendar.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    
+    await db.sla_calendars.insert_one(doc)
+    await bump_data_version('sla_calendars')
+    return calendar
+
+@router.get("/sla-calendars", response_model=List[SLACalendar])
+async def get_sla_calendars(current_user: User = Depends(get_current_user)):
+    calendars = await db.sla_calendars.find({}, {"_id": 0}).to_list(1000)
+    
+    for calendar in calendars:
+        if isinstance(calendar['created_at'], str):
+            calendar['created_at'] = datetime.fromisoformat(calendar['created_at'])
+    
+    return calendars
+
+@router.put("/sla-calendars/{calendar_id}", response_model=SLACalendar)
+async def update_sla_calendar(
+    calendar_id: str,
+    calendar_data: SLACalendarCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can update SLA calendars")
+    
+    validate_calendar(calendar_data)
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(calendar_id, expected, {"$set": calendar_data.model_dump()})
+    updated = await db.sla_calendars.find_one_and_update(
+        query, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    
+    if not updated:
+        await raise_update_failed(db.sla_calendars, calendar_id, expected, "SLA calendar")
+    await bump_data_version('sla_calendars')
+    
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    
+    set_etag(response, updated['version'])
+    return SLACalendar(**updated)
+
+@router.delete("/sla-calendars/{calendar_id}")
+async def delete_sla_calendar(calendar_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete SLA calendars")
+    
+    in_use = await db.contracts.count_documents({"calendar_id": calendar_id})
+    if in_use:
+        raise HTTPException(status_code=400, detail=f"SLA calendar is used by {in_use} contracts")
+    
+    result = await db.sla_calendars.delete_one({"id": calendar_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="SLA calendar not found")
+    compiled_calendars.pop(calendar_id, None)
+    await bump_data_version('sla_calendars')
+    
+    return {"message": "SLA calendar deleted successfully"}
+
+async def sla_alerts(tickets: List[dict]) -> List[dict]:
+    contracts_by_company = await loaders['active_contracts_by_company'].load_many(
+        ticket['company_id'] for ticket in tickets
+    )
+    calendars = await contract_calendars(
+        contract for contracts in contracts_by_company.values() for contract in contracts
+    )
+    now = datetime.now(timezone.utc)
+    
+    alerts = []
+    for ticket in tickets:
+        for contract in contracts_by_company[ticket['company_id']]:
+            # Business hours of the contract's calendar, not wall-clock time
+            clock = sla_clock(ticket, contract, calendars[contract['id']], now)
+            time_remaining = clock['hours_remaining']
+            
+            if time_remaining <= 0:
+                alerts.append({
+                    'ticket_id': ticket['id'],
+                    'ticket_title': ticket['title'],
+                    'company_id': ticket['company_id'],
+                    'contract_id': contract['id'],
+                    'sla_hours': contract['sla_hours'],
+                    'sla_deadline': clock['deadline'],
+                    'status': 'breached',
+                    'hours_overdue': abs(time_remaining)
+                })
+            elif time_remaining <= contract['sla_hours'] * 0.2:  # 20% time remaining
+                alerts.append({
+                    'ticket_id': ticket['id'],
+                    'ticket_title': ticket['title'],
+                    'company_id': ticket['company_id'],
+                    'contract_id': contract['id'],
+                    'sla_hours': contract['sla_hours'],
+                    'sla_deadline': clock['deadline'],
+                    'status': 'warning',
+                    'hours_remaining': time_remaining
+                })
+    
+    return alerts
+
+async def notify_sla_alerts() -> int:
+    """Emit sla.warning/sla.breached webhooks for open tickets crossing a threshold since the last scan."""
+    if not (webhook_dispatcher.wants('sla.warning') or webhook_dispatcher.wants('sla.breached')):
+        return 0
+    queued = 0
+    last_id = None
+    scan_started = datetime.now(timezone.utc).isoformat()
+    active = []
+    while True:
+        query = {'status': {'$in': ['open', 'in_progress']}}
+        if last_id:
+            query['id'] = {'$gt': last_id}
+        tickets = await db.tickets.find(query, {"_id": 0}).sort('id', 1).limit(1000).to_list(1000)
+        if not tickets:
+            # Markers of alerts no longer active (resolved, deleted or reopened tickets) go, so the
+            # collection stays small and a ticket can alert again; newer ones belong to other scans
+            await db.sla_notifications.delete_many({"created_at": {"$lt": scan_started}, "id": {"$nin": active}})
+            return queued
+        last_id = tickets[-1]['id']
+        for alert in await sla_alerts(tickets):
+            event_type = f"sla.{alert['status']}"
+            marker_id = f"{alert['ticket_id']}:{alert['contract_id']}:{alert['status']}"
+            active.append(marker_id)
+            if not webhook_dispatcher.wants(event_type):
+                continue
+            # One event per ticket, contract and threshold, however many workers and scans see it
+            marker = await db.sla_notifications.update_one(
+                {"id": marker_id},
+                {"$setOnInsert": {"created_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+            if marker.upserted_id is None:
+                continue
+            payload = {**alert, 'sla_deadline': alert['sla_deadline'].isoformat() if alert['sla_deadline'] else None}
+            queued += await webhook_dispatcher.emit(event_type, payload, alert['company_id'])
+
+async def run_sla_monitor_periodically():
+    while True:
+        try:
+            await notify_sla_alerts()
+        except Exception:
+            logger.exception("SLA webhook scan failed")
+        await asyncio.sleep(SLA_MONITOR_SECONDS)
+
+@router.get("/alerts/sla")
+async def get_sla_alerts(current_user: User = Depends(get_current_user)):
+    # Get all open tickets
+    query = {'status': {'$in': ['open', 'in_progress']}}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    
+    tickets = await db.tickets.find(query, {"_id": 0}).to_list(1000)
+    return await sla_alerts(tickets)
+
+@router.get("/tickets/{ticket_id}/sla")
+async def get_ticket_sla(ticket_id: str, current_user: User = Depends(get_current_user)):
+    ticket = await get_visible_ticket(ticket_id, current_user, include_archived=True,
+                                      projection={"status": 1, "created_at": 1, "resolved_at": 1, "updated_at": 1})
+    contracts = await loaders['active_contracts_by_company'].load(ticket['company_id'])
+    calendars = await contract_calendars(contracts)
+    now = datetime.now(timezone.utc)
+    return [sla_clock(ticket, contract, calendars[contract['id']], now) for contract in contracts]
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional, List
+from datetime import datetime, timezone
+from sync import ChangeFeed, TOMBSTONES, encode_token, tombstone
+
+from core import (
+    db,
+    SYNC_PAGE_SIZE,
+    SYNC_MAX_PAGE_SIZE,
+    SYNC_SETTLE_SECONDS,
+    SYNC_TOMBSTONE_DAYS,
+    backfill_derived_fields,
+    logger,
+)
+from models import User, Company, Asset, Ticket, Service, Contract
+from security import get_current_user
+
+
+router = APIRouter()
+
+SYNC_MODELS = {'companies': Company, 'services': Service, 'contracts': Contract, 'assets': Asset, 'tickets': Ticket}
+
+# Archived tickets are reported as tickets, so a first sync gets them too
+change_feed = ChangeFeed([
+    ('companies', db.companies, 'id'),
+    ('services', db.services, 'company_id'),
+    ('contracts', db.contracts, 'company_id'),
+    ('assets', db.assets, 'company_id'),
+    ('tickets', db.tickets, 'company_id'),
+    ('tickets', db.tickets_archive, 'company_id'),
+], db.tombstones, settle_seconds=SYNC_SETTLE_SECONDS, retention_days=SYNC_TOMBSTONE_DAYS)
+
+async def record_deletions(collection: str, company_id: Optional[str], doc_ids: List[str]):
+    if doc_ids:
+        await db.tombstones.insert_many(
+            [tombstone(collection, doc_id, company_id, SYNC_TOMBSTONE_DAYS) for doc_id in doc_ids], ordered=False
+        )
+
+def created_at_iso(doc: dict) -> dict:
+    created_at = doc.get('created_at')
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return {'updated_at': created_at or datetime.now(timezone.utc).isoformat()}
+
+async def backfill_updated_at():
+    # Documents written before updated_at was kept count as last changed when they were created
+    for collection_name in ('companies', 'assets', 'services', 'contracts'):
+        count = await backfill_derived_fields(db[collection_name], 'updated_at', ['created_at'], created_at_iso)
+        if count:
+            logger.info("Backfilled updated_at on %d %s", count, collection_name)
+
+@router.get("/sync")
+async def get_changes(
+    since: Optional[str] = None,
+    limit: int = SYNC_PAGE_SIZE,
+    current_user: User = Depends(get_current_user)
+):
+    if not 1 <= limit <= SYNC_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SYNC_MAX_PAGE_SIZE}")
+    try:
+        state = change_feed.resume(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be a token returned by this endpoint")
+    if change_feed.expired(state):
+        raise HTTPException(status_code=410, detail="Sync token is too old; start over without since")
+
+    company_id = current_user.company_id if current_user.role == 'client' else None
+    if current_user.role == 'client' and not company_id:
+        raise HTTPException(status_code=403, detail="Client users must belong to a company")
+
+    page, state = await change_feed.page(state, limit, company_id)
+    changes = {name: [] for name in SYNC_MODELS}
+    deleted = []
+    for name, doc in page:
+        if name == TOMBSTONES:
+            deleted.append({'collection': doc['collection'], 'id': doc['doc_id'], 'deleted_at': doc['updated_at']})
+        else:
+            changes[name].append(SYNC_MODELS[name](**doc))
+
+    finished = change_feed.finished(state)
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'until': state['until'],
+        'has_more': not finished,
+        'next': encode_token(change_feed.next_session(state) if finished else state),
+    }
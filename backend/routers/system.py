@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, Response, Header, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+import json
+import hashlib
+import asyncio
+from typing import Optional
+from datetime import datetime, timezone
+import base64
+
+from core import db, loaders, bump_data_version
+from models import User, SystemConfig, SystemConfigUpdate
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+from routers.dashboard import get_dashboard_stats
+from routers.sla import get_sla_alerts
+
+
+router = APIRouter()
+
+@router.get("/loaders/stats")
+async def get_loader_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view loader stats")
+    
+    return {name: loader.stats() for name, loader in loaders.items()}
+
+@router.get("/system/config", response_model=SystemConfig)
+async def get_system_config(response: Response, current_user: User = Depends(get_current_user)):
+    config = await db.system_config.find_one({"id": "system_config"}, {"_id": 0})
+    if not config:
+        config = SystemConfig().model_dump()
+        config['updated_at'] = config['updated_at'].isoformat()
+        await db.system_config.insert_one(config)
+    
+    if isinstance(config['updated_at'], str):
+        config['updated_at'] = datetime.fromisoformat(config['updated_at'])
+    
+    config = SystemConfig(**config)
+    set_etag(response, config.version)
+    return config
+
+@router.put("/system/config", response_model=SystemConfig)
+async def update_system_config(
+    config_data: SystemConfigUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can update system config")
+    
+    update_data = config_data.model_dump(exclude_unset=True)
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    
+    expected = parse_if_match(if_match)
+    query, update = versioned_update("system_config", expected, {"$set": update_data})
+    # Only unconditional writes may create the document; a versioned one must match the existing config
+    updated = await db.system_config.find_one_and_update(
+        query, update, projection={"_id": 0}, upsert=expected is None, return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        await raise_update_failed(db.system_config, "system_config", expected, "System config")
+    await bump_data_version('system_config')
+    
+    if isinstance(updated['updated_at'], str):
+        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    
+    set_etag(response, updated['version'])
+    return SystemConfig(**updated)
+
+@router.post("/system/upload-logo")
+async def upload_logo(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can upload logo")
+    
+    contents = await file.read()
+    base64_str = base64.b64encode(contents).decode('utf-8')
+    logo_base64 = f"data:{file.content_type};base64,{base64_str}"
+    
+    query, update = versioned_update("system_config", None, {"$set": {
+        "logo_base64": logo_base64,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }})
+    await db.system_config.update_one(query, update, upsert=True)
+    await bump_data_version('system_config')
+    
+    return {"message": "Logo uploaded successfully", "logo_base64": logo_base64}
+
+@router.get("/system/logo")
+async def get_system_logo(if_none_match: Optional[str] = Header(None)):
+    # Public so <img> tags can load it without an Authorization header
+    config = await db.system_config.find_one({"id": "system_config"}, {"_id": 0, "logo_base64": 1, "version": 1})
+    if not config or not config.get('logo_base64'):
+        raise HTTPException(status_code=404, detail="No logo configured")
+    
+    etag = f'"{config.get("version", 1)}"'
+    headers = {'ETag': etag, 'Cache-Control': 'public, no-cache'}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    
+    header, _, data = config['logo_base64'].partition(',')
+    media_type = header[len('data:'):].split(';')[0] or 'application/octet-stream'
+    return Response(content=base64.b64decode(data), media_type=media_type, headers=headers)
+
+@router.get("/bootstrap")
+async def get_bootstrap(if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user)):
+    """Everything the SPA's first screen needs, in one round trip."""
+    dashboard, sla_alerts = await asyncio.gather(
+        get_dashboard_stats(current_user=current_user),
+        get_sla_alerts(current_user=current_user)
+    )
+    
+    body = jsonable_encoder({
+        'user': current_user,
+        'dashboard': dashboard,
+        'sla_alerts': sla_alerts
+    })
+    # The SLA hours are part of the digest, so a 304 never leaves the browser with stale clocks
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+    etag = f'W/"{digest[:32]}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
@@ -0,0 +1,307 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+import asyncio
+from typing import Optional, List
+from datetime import datetime, timezone
+from audit import field_diff
+from dedup import signature, ticket_text
+
+from core import db, AUTO_ASSIGN_TICKETS, loaders, bump_data_version
+from models import User, Company, Asset, Ticket, TicketCreate, TicketUpdate, TicketNote, TicketNoteCreate
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, bumped_version, raise_update_failed, set_etag
+from stats import ticket_stats_delta, bump_stats
+from routers.assignment import assignment_engine
+from routers.attachments import delete_attachments
+from routers.audit import audit_log
+from routers.duplicates import duplicate_candidates, register_ticket, reindex_ticket, unindex_ticket
+from routers.resolutions import index_resolution, forget_resolution
+from routers.archive import archive_may_hold, raise_if_archived
+from routers.sync import record_deletions
+from routers.webhooks import webhook_dispatcher
+
+
+router = APIRouter()
+
+@router.post("/tickets", response_model=Ticket)
+async def create_ticket(ticket_data: TicketCreate, current_user: User = Depends(get_current_user)):
+    ticket = Ticket(**ticket_data.model_dump(), created_by=current_user.id, status='open')
+    if AUTO_ASSIGN_TICKETS and not ticket.assigned_to:
+        ticket.assigned_to = assignment_engine.pick(ticket.company_id)
+    sig = signature(ticket_text(ticket_data.model_dump()))
+    duplicates = duplicate_candidates(ticket.company_id, sig)
+    if duplicates:
+        # Link to the original ticket, not to another duplicate of it
+        ticket.duplicate_of = duplicates[0]['duplicate_of'] or duplicates[0]['id']
+        ticket.duplicate_score = duplicates[0]['similarity']
+    doc = ticket.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    if doc['resolved_at']:
+        doc['resolved_at'] = doc['resolved_at'].isoformat()
+    
+    await db.tickets.insert_one(doc)
+    assignment_engine.track(None, doc)
+    register_ticket(ticket.id, ticket.company_id, sig, ticket.title, ticket.duplicate_of)
+    await bump_stats(doc['company_id'], ticket_stats_delta(doc, 1))
+    await bump_data_version('tickets')
+    audit_log.record('ticket', ticket.id, 'create', current_user.id, company_id=ticket.company_id)
+    await webhook_dispatcher.emit('ticket.created', {'ticket': ticket.model_dump(mode='json')}, ticket.company_id)
+    return ticket
+
+@router.get("/tickets", response_model=List[Ticket])
+async def get_tickets(
+    company_id: Optional[str] = None,
+    status: Optional[str] = None,
+    ticket_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    query = {}
+    if current_user.role == 'client':
+        query['company_id'] = current_user.company_id
+    elif current_user.role == 'technician':
+        query['$or'] = [
+            {'assigned_to': current_user.id},
+            {'assigned_to': None}
+        ]
+    
+    if company_id:
+        query['company_id'] = company_id
+    if status:
+        query['status'] = status
+    if ticket_type:
+        query['ticket_type'] = ticket_type
+    if start_date or end_date:
+        query['created_at'] = {}
+        if start_date:
+            query['created_at']['$gte'] = start_date
+        if end_date:
+            query['created_at']['$lte'] = end_date
+    
+    tickets = await db.tickets.find(query, {"_id": 0}).to_list(1000)
+    # Finished tickets from the archive only when asked for, or when the date range reaches it
+    if (include_archived or query.get('created_at')) and len(tickets) < 1000 and archive_may_hold(start_date):
+        hot_ids = {ticket['id'] for ticket in tickets}
+        # A batch being archived is in both collections until the archiver deletes it
+        tickets += [
+            ticket for ticket in await db.tickets_archive.find(query, {"_id": 0}).to_list(1000 - len(tickets))
+            if ticket['id'] not in hot_ids
+        ]
+    
+    for ticket in tickets:
+        if isinstance(ticket['created_at'], str):
+            ticket['created_at'] = datetime.fromisoformat(ticket['created_at'])
+        if isinstance(ticket['updated_at'], str):
+            ticket['updated_at'] = datetime.fromisoformat(ticket['updated_at'])
+        if ticket.get('resolved_at') and isinstance(ticket['resolved_at'], str):
+            ticket['resolved_at'] = datetime.fromisoformat(ticket['resolved_at'])
+        if ticket.get('archived_at') and isinstance(ticket['archived_at'], str):
+            ticket['archived_at'] = datetime.fromisoformat(ticket['archived_at'])
+    
+    return tickets
+
+@router.get("/tickets/{ticket_id}", response_model=Ticket)
+async def get_ticket(ticket_id: str, response: Response, current_user: User = Depends(get_current_user)):
+    ticket = await db.tickets.find_one({"id": ticket_id}, {"_id": 0})
+    if not ticket:
+        ticket = await db.tickets_archive.find_one({"id": ticket_id}, {"_id": 0})
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    if isinstance(ticket['created_at'], str):
+        ticket['created_at'] = datetime.fromisoformat(ticket['created_at'])
+    if isinstance(ticket['updated_at'], str):
+        ticket['updated_at'] = datetime.fromisoformat(ticket['updated_at'])
+    if ticket.get('resolved_at') and isinstance(ticket['resolved_at'], str):
+        ticket['resolved_at'] = datetime.fromisoformat(ticket['resolved_at'])
+    if ticket.get('archived_at') and isinstance(ticket['archived_at'], str):
+        ticket['archived_at'] = datetime.fromisoformat(ticket['archived_at'])
+    
+    ticket = Ticket(**ticket)
+    set_etag(response, ticket.version)
+    return ticket
+
+@router.get("/tickets/{ticket_id}/full")
+async def get_ticket_full(
+    ticket_id: str,
+    notes_skip: int = 0,
+    notes_limit: int = 50,
+    current_user: User = Depends(get_current_user)
+):
+    # Everything the ticket detail view needs in one request: ticket, a page of notes,
+    # asset, company and the users referenced by the ticket and its notes
+    ticket = await db.tickets.find_one({"id": ticket_id}, {"_id": 0})
+    notes_collection = db.ticket_notes
+    if not ticket:
+        ticket = await db.tickets_archive.find_one({"id": ticket_id}, {"_id": 0})
+        notes_collection = db.ticket_notes_archive
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if current_user.role == 'client' and ticket['company_id'] != current_user.company_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this ticket")
+    
+    notes_skip = max(notes_skip, 0)
+    notes_limit = min(max(notes_limit, 1), 200)
+    user_projection = {"_id": 0, "password_hash": 0}
+    ticket_user_ids = list({uid for uid in (ticket.get('assigned_to'), ticket.get('created_by')) if uid})
+    
+    async def find_none():
+        return None
+    
+    notes, notes_total, asset, company, users = await asyncio.gather(
+        notes_collection.find({"ticket_id": ticket_id}, {"_id": 0})
+            .sort('created_at', 1).skip(notes_skip).limit(notes_limit).to_list(notes_limit),
+        notes_collection.count_documents({"ticket_id": ticket_id}),
+        loaders['assets'].load(ticket['asset_id']) if ticket.get('asset_id') else find_none(),
+        loaders['companies'].load(ticket['company_id']),
+        db.users.find({"id": {"$in": ticket_user_ids}}, user_projection).to_list(len(ticket_user_ids)),
+    )
+    
+    # Note authors not already resolved cost one extra query, only when needed
+    users_by_id = {user['id']: user for user in users}
+    missing_ids = list({note['user_id'] for note in notes} - users_by_id.keys())
+    if missing_ids:
+        for user in await db.users.find({"id": {"$in": missing_ids}}, user_projection).to_list(len(missing_ids)):
+            users_by_id[user['id']] = user
+    
+    for note in notes:
+        if isinstance(note['created_at'], str):
+            note['created_at'] = datetime.fromisoformat(note['created_at'])
+    for user in users_by_id.values():
+        if isinstance(user.get('created_at'), str):
+            user['created_at'] = datetime.fromisoformat(user['created_at'])
+    for doc in (asset, company):
+        if doc and isinstance(doc.get('created_at'), str):
+            doc['created_at'] = datetime.fromisoformat(doc['created_at'])
+    if isinstance(ticket['created_at'], str):
+        ticket['created_at'] = datetime.fromisoformat(ticket['created_at'])
+    if isinstance(ticket['updated_at'], str):
+        ticket['updated_at'] = datetime.fromisoformat(ticket['updated_at'])
+    if ticket.get('resolved_at') and isinstance(ticket['resolved_at'], str):
+        ticket['resolved_at'] = datetime.fromisoformat(ticket['resolved_at'])
+    if ticket.get('archived_at') and isinstance(ticket['archived_at'], str):
+        ticket['archived_at'] = datetime.fromisoformat(ticket['archived_at'])
+    
+    return {
+        'ticket': Ticket(**ticket),
+        'notes': {
+            'items': [TicketNote(**note) for note in notes],
+            'total': notes_total,
+            'skip': notes_skip,
+            'limit': notes_limit
+        },
+        'asset': Asset(**asset) if asset else None,
+        'company': Company(**company) if company else None,
+        'assigned_user': User(**users_by_id[ticket['assigned_to']]) if ticket.get('assigned_to') in users_by_id else None,
+        'created_by_user': User(**users_by_id[ticket['created_by']]) if ticket.get('created_by') in users_by_id else None,
+        'users': {uid: User(**user) for uid, user in users_by_id.items()}
+    }
+
+@router.put("/tickets/{ticket_id}", response_model=Ticket)
+async def update_ticket(
+    ticket_id: str,
+    ticket_data: TicketUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ['admin', 'technician']:
+        raise HTTPException(status_code=403, detail="Only admins and technicians can update tickets")
+    
+    update_data = ticket_data.model_dump(exclude_unset=True)
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    
+    if update_data.get('status') in ['resolved', 'closed']:
+        update_data['resolved_at'] = datetime.now(timezone.utc).isoformat()
+    
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(ticket_id, expected, {"$set": update_data})
+    previous = await db.tickets.find_one_and_update(query, update, projection={"_id": 0})
+    
+    if not previous:
+        await raise_if_archived(ticket_id)
+        await raise_update_failed(db.tickets, ticket_id, expected, "Ticket")
+    current = {**previous, **update_data}
+    assignment_engine.track(previous, current)
+    if update_data.keys() & {'status', 'title', 'description', 'duplicate_of'}:
+        reindex_ticket(current)
+    if update_data.keys() & {'status', 'title', 'description', 'final_resolution', 'maintenance_log'}:
+        index_resolution(current)
+    
+    if 'status' in update_data and update_data['status'] != previous.get('status'):
+        await bump_stats(previous['company_id'], {
+            f"tickets.{previous.get('status')}": -1,
+            f"tickets.{update_data['status']}": 1
+        })
+    await bump_data_version('tickets')
+    changes = field_diff(previous, update_data, ticket_data.model_fields_set)
+    audit_log.record('ticket', ticket_id, 'update', current_user.id, changes, company_id=previous['company_id'])
+    
+    updated = {**previous, **update_data, 'version': bumped_version(previous, expected)}
+    if isinstance(updated['created_at'], str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    if isinstance(updated['updated_at'], str):
+        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    if updated.get('resolved_at') and isinstance(updated['resolved_at'], str):
+        updated['resolved_at'] = datetime.fromisoformat(updated['resolved_at'])
+    
+    ticket = Ticket(**updated)
+    if changes:
+        await webhook_dispatcher.emit('ticket.updated', {'ticket': ticket.model_dump(mode='json'), 'changes': changes},
+                                      ticket.company_id)
+    set_etag(response, updated['version'])
+    return ticket
+
+@router.delete("/tickets/{ticket_id}")
+async def delete_ticket(ticket_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete tickets")
+    
+    deleted = await db.tickets.find_one_and_delete(
+        {"id": ticket_id},
+        projection={"_id": 0, "company_id": 1, "status": 1, "ticket_type": 1, "assigned_to": 1, "priority": 1}
+    )
+    if not deleted:
+        await raise_if_archived(ticket_id)
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    await record_deletions('tickets', deleted['company_id'], [ticket_id])
+    assignment_engine.track(deleted, None)
+    unindex_ticket(ticket_id)
+    forget_resolution(ticket_id)
+    await bump_stats(deleted['company_id'], ticket_stats_delta(deleted, -1))
+    await bump_data_version('tickets')
+    audit_log.record('ticket', ticket_id, 'delete', current_user.id, company_id=deleted['company_id'])
+    await delete_attachments({"ticket_id": ticket_id})
+    await webhook_dispatcher.emit('ticket.deleted', {'ticket': {'id': ticket_id, 'company_id': deleted['company_id']}},
+                                  deleted['company_id'])
+    
+    return {"message": "Ticket deleted successfully"}
+
+@router.post("/ticket-notes", response_model=TicketNote)
+async def create_ticket_note(note_data: TicketNoteCreate, current_user: User = Depends(get_current_user)):
+    await raise_if_archived(note_data.ticket_id)
+    note = TicketNote(**note_data.model_dump(), user_id=current_user.id)
+    doc = note.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    
+    await db.ticket_notes.insert_one(doc)
+    return note
+
+@router.get("/ticket-notes/{ticket_id}", response_model=List[TicketNote])
+async def get_ticket_notes(ticket_id: str, current_user: User = Depends(get_current_user)):
+    # Notes of a ticket being archived can be in either collection, or both for a moment
+    hot, archived = await asyncio.gather(
+        db.ticket_notes.find({"ticket_id": ticket_id}, {"_id": 0}).to_list(1000),
+        db.ticket_notes_archive.find({"ticket_id": ticket_id}, {"_id": 0}).to_list(1000),
+    )
+    notes = list({note['id']: note for note in archived + hot}.values())
+    notes.sort(key=lambda note: str(note['created_at']))
+    
+    for note in notes:
+        if isinstance(note['created_at'], str):
+            note['created_at'] = datetime.fromisoformat(note['created_at'])
+    
+    return notes
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from datetime import datetime
+
+from core import db
+from models import User
+from security import get_current_user
+from routers.assignment import assignment_engine
+
+
+router = APIRouter()
+
+@router.get("/users", response_model=List[User])
+async def get_users(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view all users")
+    
+    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
+    
+    for user in users:
+        if isinstance(user['created_at'], str):
+            user['created_at'] = datetime.fromisoformat(user['created_at'])
+    
+    return users
+
+@router.delete("/users/{user_id}")
+async def delete_user(user_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete users")
+    
+    result = await db.users.delete_one({"id": user_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    assignment_engine.remove_technician(user_id)
+    
+    return {"message": "User deleted successfully"}
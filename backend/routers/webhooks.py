@@ -0,0 +1,175 @@
+from fastapi import APIRouter, Depends, Response, Header, HTTPException
+from pymongo import ReturnDocument
+from typing import Optional, List
+import secrets
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from webhooks import EVENT_TYPES, WebhookDispatcher
+
+from core import (
+    db,
+    WEBHOOK_WORKERS,
+    WEBHOOK_MAX_PER_TARGET,
+    WEBHOOK_TIMEOUT_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_BACKOFF_SECONDS,
+    WEBHOOK_BACKOFF_MAX_SECONDS,
+    WEBHOOK_POLL_SECONDS,
+    WEBHOOK_RETENTION_DAYS,
+    WEBHOOK_MAX_BATCH_SIZE,
+)
+from models import User, WebhookSubscription, WebhookSubscriptionCreate, WebhookDelivery
+from security import get_current_user
+from concurrency import parse_if_match, versioned_update, raise_update_failed, set_etag
+
+
+router = APIRouter()
+
+webhook_dispatcher = WebhookDispatcher(
+    db.webhook_subscriptions, db.webhook_outbox,
+    workers=WEBHOOK_WORKERS, max_per_target=WEBHOOK_MAX_PER_TARGET, timeout_seconds=WEBHOOK_TIMEOUT_SECONDS,
+    max_attempts=WEBHOOK_MAX_ATTEMPTS, backoff_seconds=WEBHOOK_BACKOFF_SECONDS,
+    backoff_max_seconds=WEBHOOK_BACKOFF_MAX_SECONDS, poll_seconds=WEBHOOK_POLL_SECONDS,
+    retention_days=WEBHOOK_RETENTION_DAYS
+)
+
+def validate_subscription(subscription_data: WebhookSubscriptionCreate):
+    url = urlsplit(subscription_data.url)
+    if url.scheme not in ('http', 'https') or not url.netloc:
+        raise HTTPException(status_code=400, detail="url must be an absolute http or https URL")
+    unknown = set(subscription_data.events) - set(EVENT_TYPES)
+    if not subscription_data.events or unknown:
+        raise HTTPException(status_code=400, detail=f"events must be among {', '.join(EVENT_TYPES)}")
+    if not 1 <= subscription_data.batch_size <= WEBHOOK_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"batch_size must be between 1 and {WEBHOOK_MAX_BATCH_SIZE}")
+
+def parse_subscription(doc: dict) -> WebhookSubscription:
+    for field in ('created_at', 'updated_at'):
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return WebhookSubscription(**doc)
+
+@router.post("/webhooks", response_model=WebhookSubscription)
+async def create_webhook(subscription_data: WebhookSubscriptionCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can create webhooks")
+
+    validate_subscription(subscription_data)
+    subscription = WebhookSubscription(**subscription_data.model_dump(), secret=secrets.token_hex(32),
+                                       created_by=current_user.id)
+    doc = subscription.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+
+    await db.webhook_subscriptions.insert_one(doc)
+    await webhook_dispatcher.load_subscriptions()
+    # The secret is only shown here; receivers need it to check X-Webhook-Signature
+    return subscription
+
+@router.get("/webhooks", response_model=List[WebhookSubscription])
+async def get_webhooks(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view webhooks")
+
+    subscriptions = await db.webhook_subscriptions.find({}, {"_id": 0, "secret": 0}).to_list(1000)
+    return [parse_subscription(doc) for doc in subscriptions]
+
+@router.get("/webhooks/stats")
+async def get_webhook_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view webhook stats")
+
+    counts = await db.webhook_outbox.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {
+        'outbox': {group['_id']: group['count'] for group in counts},
+        'dispatcher': webhook_dispatcher.stats(),
+    }
+
+@router.put("/webhooks/{subscription_id}", response_model=WebhookSubscription)
+async def update_webhook(
+    subscription_id: str,
+    subscription_data: WebhookSubscriptionCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can update webhooks")
+
+    validate_subscription(subscription_data)
+    update_data = subscription_data.model_dump()
+    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    expected = parse_if_match(if_match)
+    query, update = versioned_update(subscription_id, expected, {"$set": update_data})
+    updated = await db.webhook_subscriptions.find_one_and_update(
+        query, update, projection={"_id": 0, "secret": 0}, return_document=ReturnDocument.AFTER
+    )
+
+    if not updated:
+        await raise_update_failed(db.webhook_subscriptions, subscription_id, expected, "Webhook")
+    await webhook_dispatcher.load_subscriptions()
+
+    set_etag(response, updated['version'])
+    return parse_subscription(updated)
+
+@router.delete("/webhooks/{subscription_id}")
+async def delete_webhook(subscription_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can delete webhooks")
+
+    result = await db.webhook_subscriptions.delete_one({"id": subscription_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    await db.webhook_outbox.delete_many({"subscription_id": subscription_id})
+    await webhook_dispatcher.load_subscriptions()
+
+    return {"message": "Webhook deleted successfully"}
+
+@router.post("/webhooks/{subscription_id}/ping")
+async def ping_webhook(subscription_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can ping webhooks")
+
+    subscription = await db.webhook_subscriptions.find_one({"id": subscription_id}, {"_id": 0})
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    if not subscription.get('active'):
+        raise HTTPException(status_code=400, detail="Webhook is not active")
+
+    await webhook_dispatcher.emit('ping', {'subscription_id': subscription_id}, subscriptions=[subscription])
+    return {"message": "Ping queued"}
+
+@router.get("/webhooks/{subscription_id}/deliveries", response_model=List[WebhookDelivery])
+async def get_webhook_deliveries(
+    subscription_id: str,
+    status: Optional[str] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view webhook deliveries")
+
+    query = {"subscription_id": subscription_id}
+    if status:
+        query['status'] = status
+    limit = min(max(limit, 1), 1000)
+    return await db.webhook_outbox.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+
+@router.post("/webhook-deliveries/{delivery_id}/retry", response_model=WebhookDelivery)
+async def retry_webhook_delivery(delivery_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can retry webhook deliveries")
+
+    delivery = await db.webhook_outbox.find_one_and_update(
+        {"id": delivery_id, "status": "failed"},
+        {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": datetime.now(timezone.utc).isoformat()},
+         "$unset": {"purge_at": ""}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not delivery:
+        raise HTTPException(status_code=404, detail="No failed delivery with that id")
+
+    return delivery
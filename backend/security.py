@@ -0,0 +1,51 @@
+from fastapi import Header, HTTPException
+from typing import Optional
+from datetime import timedelta, datetime, timezone
+import bcrypt
+import jwt
+
+from core import db, JWT_SECRET, JWT_ALGORITHM, loaders
+from models import User
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def create_token(user_id: str, role: str) -> str:
+    payload = {
+        'user_id': user_id,
+        'role': role,
+        'exp': datetime.now(timezone.utc) + timedelta(days=7)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+async def get_current_user(authorization: Optional[str] = Header(None)):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    try:
+        token = authorization.replace('Bearer ', '')
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        user = await loaders['users'].load(payload['user_id'])
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        return User(**user)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_visible_ticket(ticket_id: str, current_user: User, include_archived: bool = False,
+                             projection: Optional[dict] = None) -> dict:
+    projection = {"_id": 0, "id": 1, "company_id": 1, **(projection or {})}
+    ticket = await db.tickets.find_one({"id": ticket_id}, projection)
+    if not ticket and include_archived:
+        ticket = await db.tickets_archive.find_one({"id": ticket_id}, projection)
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if current_user.role == 'client' and ticket['company_id'] != current_user.company_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this ticket")
+    return ticket
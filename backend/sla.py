@@ -0,0 +1,144 @@
+"""
+Business-hours SLA clock.
+
+A ``WorkingCalendar`` expands weekly working hours in a timezone, minus
+holidays, into a sorted table of working intervals (UTC timestamps) with the
+running total of working seconds before each one. Elapsed working time and
+deadlines are then a ``bisect`` into that table instead of a walk through the
+clock. The table covers a few years around the dates it is asked about and
+grows on demand.
+"""
+
+import bisect
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+TABLE_MARGIN_YEARS = 2
+MAX_TABLE_YEARS = 50
+
+
+def parse_clock(value: str) -> int:
+    hours, minutes = value.strip().split(':')
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= 24 * 60 or not 0 <= int(minutes) < 60:
+        raise ValueError(value)
+    return minute
+
+
+def parse_working_hours(spec: Dict[str, List[str]]) -> List[List[Tuple[int, int]]]:
+    """``{'mon': ['09:00-14:00', '15:00-18:00'], ...}`` -> minute ranges per weekday, Monday first."""
+    unknown = set(spec) - set(WEEKDAYS)
+    if unknown:
+        raise ValueError(f"Unknown weekdays: {', '.join(sorted(unknown))}")
+    week = []
+    for weekday in WEEKDAYS:
+        ranges = []
+        for item in spec.get(weekday) or []:
+            try:
+                start, end = (parse_clock(part) for part in item.split('-'))
+            except ValueError:
+                raise ValueError(f"Invalid range {item!r} for {weekday}; expected HH:MM-HH:MM")
+            if start >= end:
+                raise ValueError(f"Range {item!r} for {weekday} ends before it starts")
+            ranges.append((start, end))
+        ranges.sort()
+        for (_, previous_end), (start, _) in zip(ranges, ranges[1:]):
+            if start < previous_end:
+                raise ValueError(f"Overlapping ranges for {weekday}")
+        week.append(ranges)
+    if not any(week):
+        raise ValueError("working_hours has no working time")
+    return week
+
+
+def parse_holidays(values: Iterable[str]) -> set:
+    try:
+        return {date.fromisoformat(value) for value in values}
+    except ValueError as error:
+        raise ValueError(f"Invalid holiday date: {error}")
+
+
+class WorkingCalendar:
+    def __init__(self, tz: str = 'UTC', working_hours: Optional[Dict[str, List[str]]] = None,
+                 holidays: Iterable[str] = ()):
+        """``working_hours=None`` is a 24x7 calendar: the SLA runs on wall-clock time."""
+        try:
+            self.tz = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone {tz!r}")
+        self.week = parse_working_hours(working_hours) if working_hours is not None else None
+        self.holidays = parse_holidays(holidays)
+        self._years: Optional[Tuple[int, int]] = None
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        # Working seconds before each interval and up to its end
+        self._before: List[float] = []
+        self._through: List[float] = []
+
+    @property
+    def always_open(self) -> bool:
+        return self.week is None
+
+    def _timestamp(self, day: date, minute: int) -> float:
+        local = datetime.combine(day, time()) + timedelta(minutes=minute)
+        return local.replace(tzinfo=self.tz).timestamp()
+
+    def _build(self, first_year: int, last_year: int):
+        starts, ends = [], []
+        day, last = date(first_year, 1, 1), date(last_year, 12, 31)
+        while day <= last:
+            if day not in self.holidays:
+                for start_minute, end_minute in self.week[day.weekday()]:
+                    start, end = self._timestamp(day, start_minute), self._timestamp(day, end_minute)
+                    if ends and start <= ends[-1]:
+                        # Ranges touching across midnight (e.g. 24h days) become one interval
+                        ends[-1] = max(ends[-1], end)
+                    else:
+                        starts.append(start)
+                        ends.append(end)
+            day += timedelta(days=1)
+
+        before, through, total = [], [], 0.0
+        for start, end in zip(starts, ends):
+            before.append(total)
+            total += end - start
+            through.append(total)
+        self._years = (first_year, last_year)
+        self._starts, self._ends, self._before, self._through = starts, ends, before, through
+
+    def _cover(self, *moments: datetime):
+        years = [moment.astimezone(self.tz).year for moment in moments]
+        low, high = min(years) - TABLE_MARGIN_YEARS, max(years) + TABLE_MARGIN_YEARS
+        if self._years is None:
+            self._build(low, high)
+        elif low < self._years[0] or high > self._years[1]:
+            self._build(min(low, self._years[0]), max(high, self._years[1]))
+
+    def _working_seconds_at(self, ts: float) -> float:
+        i = bisect.bisect_right(self._starts, ts) - 1
+        if i < 0:
+            return 0.0
+        return self._before[i] + min(ts, self._ends[i]) - self._starts[i]
+
+    def elapsed(self, start: datetime, end: datetime) -> timedelta:
+        """Working time between two instants (negative if ``end`` comes first)."""
+        if self.always_open:
+            return end - start
+        self._cover(start, end)
+        return timedelta(seconds=self._working_seconds_at(end.timestamp()) - self._working_seconds_at(start.timestamp()))
+
+    def deadline(self, start: datetime, budget: timedelta) -> datetime:
+        """Instant at which ``budget`` of working time has passed since ``start``."""
+        if self.always_open or budget <= timedelta(0):
+            return start + budget
+        self._cover(start)
+        target = self._working_seconds_at(start.timestamp()) + budget.total_seconds()
+        while not self._through or target > self._through[-1]:
+            first_year, last_year = self._years
+            if last_year - first_year > MAX_TABLE_YEARS:
+                raise ValueError("SLA deadline is too far in the future")
+            self._build(first_year, last_year + TABLE_MARGIN_YEARS)
+        i = bisect.bisect_left(self._through, target)
+        return datetime.fromtimestamp(self._starts[i] + target - self._before[i], timezone.utc)
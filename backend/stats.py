@@ -0,0 +1,112 @@
+from pymongo import UpdateOne
+import asyncio
+from typing import Dict
+from datetime import datetime, timezone
+
+from core import db, STATS_RECONCILE_INTERVAL_SECONDS, logger
+
+
+# One document per company plus a global one, kept current with $inc by the ticket and
+# asset handlers and periodically checked against the source collections to repair drift
+STATS_GLOBAL_ID = '__all__'
+
+def ticket_stats_delta(ticket: dict, sign: int) -> Dict[str, int]:
+    delta = {"tickets.total": sign, f"tickets.{ticket.get('status')}": sign}
+    if ticket.get('ticket_type'):
+        delta[f"tickets_by_type.{ticket['ticket_type']}"] = sign
+    return delta
+
+def asset_stats_delta(asset: dict, sign: int) -> Dict[str, int]:
+    return {"assets.total": sign, f"assets.{asset.get('status')}": sign}
+
+async def bump_stats(company_id: str, delta: Dict[str, int]):
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+    await db.stats.bulk_write([
+        UpdateOne({"company_id": cid}, {"$inc": delta}, upsert=True)
+        for cid in (company_id, STATS_GLOBAL_ID)
+    ], ordered=False)
+
+async def drop_company_stats(company_id: str):
+    stats = await db.stats.find_one_and_delete({"company_id": company_id}, projection={"_id": 0})
+    if not stats:
+        return
+    delta = {}
+    for group in ('tickets', 'tickets_by_type', 'assets'):
+        for key, value in stats.get(group, {}).items():
+            delta[f"{group}.{key}"] = -value
+    if delta:
+        await db.stats.update_one({"company_id": STATS_GLOBAL_ID}, {"$inc": delta}, upsert=True)
+
+async def reconcile_stats():
+    ticket_fields = {"_id": 0, "id": 1, "company_id": 1, "status": 1, "ticket_type": 1}
+    # Archived tickets still count; archiving moves them without touching the counters. Hot tickets
+    # are read first and the archiver copies before it deletes, so a ticket archived meanwhile is
+    # seen at least once, and grouping by id counts one that is in both collections only once.
+    ticket_groups = await db.tickets.aggregate([
+        {"$project": ticket_fields},
+        {"$unionWith": {"coll": db.tickets_archive.name, "pipeline": [{"$project": ticket_fields}]}},
+        {"$group": {
+            "_id": "$id",
+            "company_id": {"$first": "$company_id"},
+            "status": {"$first": "$status"},
+            "ticket_type": {"$first": "$ticket_type"}
+        }},
+        {"$group": {
+            "_id": {"company_id": "$company_id", "status": "$status", "ticket_type": "$ticket_type"},
+            "count": {"$sum": 1}
+        }}
+    ], allowDiskUse=True).to_list(None)
+    asset_groups = await db.assets.aggregate([
+        {"$group": {"_id": {"company_id": "$company_id", "status": "$status"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    
+    counts: Dict[str, Dict[str, int]] = {STATS_GLOBAL_ID: {}}
+    def add(company_id, group, key, count):
+        for cid in (company_id, STATS_GLOBAL_ID):
+            fields = counts.setdefault(cid, {})
+            fields[f"{group}.{key}"] = fields.get(f"{group}.{key}", 0) + count
+    
+    for row in ticket_groups:
+        company_id = row['_id'].get('company_id')
+        add(company_id, 'tickets', 'total', row['count'])
+        add(company_id, 'tickets', str(row['_id'].get('status')), row['count'])
+        if row['_id'].get('ticket_type'):
+            add(company_id, 'tickets_by_type', row['_id']['ticket_type'], row['count'])
+    for row in asset_groups:
+        company_id = row['_id'].get('company_id')
+        add(company_id, 'assets', 'total', row['count'])
+        add(company_id, 'assets', str(row['_id'].get('status')), row['count'])
+    
+    # Correct the counters by the drift with $inc rather than replacing them, so bump_stats calls
+    # that land after the counters are read are kept. One that lands between the aggregations and
+    # that read is undone here; the drift it leaves is repaired by the next run.
+    current = await db.stats.find({}, {"_id": 0}).to_list(None)
+    now = datetime.now(timezone.utc).isoformat()
+    updates = []
+    for doc in current:
+        fields = counts.setdefault(doc['company_id'], {})
+        for group in ('tickets', 'tickets_by_type', 'assets'):
+            for key, value in doc.get(group, {}).items():
+                fields[f"{group}.{key}"] = fields.get(f"{group}.{key}", 0) - value
+    for cid, delta in counts.items():
+        delta = {key: value for key, value in delta.items() if value}
+        update = {"$set": {"reconciled_at": now}}
+        if delta:
+            update["$inc"] = delta
+        updates.append(UpdateOne({"company_id": cid}, update, upsert=True))
+    await db.stats.bulk_write(updates, ordered=False)
+    return len(counts)
+
+async def reconcile_stats_periodically():
+    # Counters are built right away on a fresh database; otherwise the first run waits an interval
+    first = True
+    while True:
+        try:
+            if not first or not await db.stats.find_one({"company_id": STATS_GLOBAL_ID}, {"_id": 1}):
+                await reconcile_stats()
+        except Exception:
+            logger.exception("Stats reconciliation failed")
+        first = False
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL_SECONDS)
@@ -0,0 +1,143 @@
+"""
+Incremental change feed for integrations and offline clients.
+
+Every synced collection keeps ``updated_at`` (UTC ISO string) on each write,
+and deletions leave a tombstone. A sync session reads everything updated in
+``(since, until]`` source by source, ordered by ``(updated_at, id)`` so each
+page is a range scan on the matching index and resumes exactly where the
+previous one stopped. ``until`` is fixed when the session starts, a few
+seconds in the past, so writes still in flight are picked up by the next
+session instead of being skipped. The last page hands out a token whose
+``since`` is this session's ``until``.
+
+Tokens are opaque to clients: base64url-encoded JSON of the session state.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+TOMBSTONES = 'deleted'
+
+
+def encode_token(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_token(token: str) -> dict:
+    """Session state of a token; ValueError if it wasn't issued by ``encode_token``."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("malformed sync token")
+    if not isinstance(state, dict) or not isinstance(state.get('source'), int):
+        raise ValueError("malformed sync token")
+    if any(state.get(key) is not None and not isinstance(state[key], str) for key in ('since', 'until')):
+        raise ValueError("malformed sync token")
+    after = state.get('after')
+    if after is not None and not (isinstance(after, list) and len(after) == 2 and all(isinstance(v, str) for v in after)):
+        raise ValueError("malformed sync token")
+    return state
+
+
+def tombstone(collection: str, doc_id: str, company_id: Optional[str], retention_days: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        'id': str(uuid.uuid4()),
+        'collection': collection,
+        'doc_id': doc_id,
+        'company_id': company_id,
+        'updated_at': now.isoformat(),
+        # BSON date for the TTL index
+        'purge_at': now + timedelta(days=retention_days),
+    }
+
+
+class ChangeFeed:
+    """Pages through ``sources``: (name, collection, scope field) tuples, tombstones last.
+
+    Several sources may share a name (hot and archived tickets); they are
+    reported together. The scope field is what a client's company id is
+    matched against, or None for collections clients never see.
+    """
+
+    def __init__(self, sources: List[Tuple[str, object, Optional[str]]], tombstones, settle_seconds: float = 5,
+                 retention_days: int = 90):
+        self.sources = sources + [(TOMBSTONES, tombstones, 'company_id')]
+        self.tombstones = tombstones
+        self.settle_seconds = settle_seconds
+        self.retention_days = retention_days
+
+    async def ensure_indexes(self):
+        for _, collection, scope_field in self.sources:
+            await collection.create_index([("updated_at", 1), ("id", 1)])
+            if scope_field:
+                await collection.create_index([(scope_field, 1), ("updated_at", 1), ("id", 1)])
+        await self.tombstones.create_index("purge_at", expireAfterSeconds=0)
+
+    def start(self, since: Optional[str] = None) -> dict:
+        until = (datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)).isoformat()
+        return {'since': since, 'until': until, 'source': 0, 'after': None}
+
+    def resume(self, token: Optional[str]) -> dict:
+        """Session state for ``token``: a page in progress, or a new session after a finished one."""
+        if token is None:
+            return self.start()
+        state = decode_token(token)
+        if not 0 <= state['source'] <= len(self.sources):
+            raise ValueError("malformed sync token")
+        if state.get('until') is None:
+            return self.start(state.get('since'))
+        return {'since': state.get('since'), 'until': state['until'], 'source': state['source'],
+                'after': state.get('after')}
+
+    def expired(self, state: dict) -> bool:
+        """Whether deletions since the session start may already have been purged."""
+        horizon = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).isoformat()
+        return state['since'] is not None and state['since'] < horizon
+
+    @staticmethod
+    def page_query(state: dict, scope: dict) -> dict:
+        bounds = {"$lte": state['until']}
+        if state['since'] is not None:
+            bounds["$gt"] = state['since']
+        query = {**scope, "updated_at": bounds}
+        if state['after']:
+            updated_at, doc_id = state['after']
+            # Written as a bound on updated_at plus a tie-break so the index range stays tight
+            bounds["$gte"] = updated_at
+            query["$or"] = [{"updated_at": {"$gt": updated_at}}, {"id": {"$gt": doc_id}}]
+        return query
+
+    async def page(self, state: dict, limit: int, company_id: Optional[str] = None) -> Tuple[List[Tuple[str, dict]], dict]:
+        """Up to ``limit`` changed documents as (source name, document), and the state to resume from.
+
+        With ``company_id`` only that company's documents are read, and
+        sources without a scope field are skipped.
+        """
+        state = dict(state)
+        changes = []
+        while len(changes) < limit and state['source'] < len(self.sources):
+            name, collection, scope_field = self.sources[state['source']]
+            if company_id is not None and not scope_field:
+                state.update(source=state['source'] + 1, after=None)
+                continue
+            scope = {scope_field: company_id} if company_id is not None else {}
+            wanted = limit - len(changes)
+            docs = await collection.find(self.page_query(state, scope), {"_id": 0}) \
+                .sort([("updated_at", 1), ("id", 1)]).limit(wanted).to_list(wanted)
+            changes.extend((name, doc) for doc in docs)
+            if len(docs) < wanted:
+                state.update(source=state['source'] + 1, after=None)
+            else:
+                state['after'] = [docs[-1]['updated_at'], docs[-1]['id']]
+        return changes, state
+
+    def finished(self, state: dict) -> bool:
+        return state['source'] >= len(self.sources)
+
+    def next_session(self, state: dict) -> dict:
+        # `until` is set when the token is used, so the next session reaches up to that moment
+        return {'since': state['until'], 'until': None, 'source': 0, 'after': None}
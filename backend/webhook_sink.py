@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a webhook receiver.
+
+Prints every delivery it gets, checks ``X-Webhook-Signature`` when given the
+subscription secret, and can be told to fail or answer slowly so retries,
+backoff and per-target limits can be watched against a running API.
+
+Usage:
+    python webhook_sink.py --port 9000
+    python webhook_sink.py --secret <secret> --fail-rate 0.3 --delay 2
+    # then POST /api/webhooks with {"url": "http://localhost:9000/hook", "events": ["ticket.created"]}
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from webhooks import sign
+
+
+def make_handler(args):
+    lock = threading.Lock()
+    state = {'received': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            try:
+                if args.delay:
+                    time.sleep(args.delay)
+                signature_ok = None
+                if args.secret is not None:
+                    signature_ok = self.headers.get('X-Webhook-Signature') == sign(args.secret, body)
+                fail = random.random() < args.fail_rate
+                payload = json.loads(body or b'{}')
+                events = payload.get('events', [payload])
+                with lock:
+                    state['received'] += len(events)
+                    summary = dict(state)
+                for event in events:
+                    print(f"{event.get('type')} {event.get('id')} signature={signature_ok} "
+                          f"{'-> 503' if fail else '-> 200'} {summary}", flush=True)
+                if fail:
+                    self.send_response(503)
+                    self.send_header('Retry-After', str(args.retry_after))
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            finally:
+                with lock:
+                    state['in_flight'] -= 1
+
+        def log_message(self, format, *log_args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print webhook deliveries sent to this machine")
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--secret', help="Subscription secret to verify X-Webhook-Signature with")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with failures")
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args))
+    print(f"Listening on http://127.0.0.1:{args.port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
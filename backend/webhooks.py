@@ -0,0 +1,302 @@
+"""
+Outbound webhooks through a persistent outbox.
+
+Handlers call ``WebhookDispatcher.emit``, which only inserts one outbox
+document per matching subscription (nothing when no subscription wants the
+event), so a slow or unreachable receiver never adds latency to the request.
+A background task claims due deliveries with a lease, so several API workers
+can share one outbox. It hands them to a pool of sender tasks that share a
+single HTTP client and its connection pool.
+
+* Each target host gets at most ``max_per_target`` requests in flight.
+* Subscriptions with ``batch_size`` above 1 get up to that many pending
+  events in one request, as ``{"events": [...]}``.
+* Failed deliveries are retried with exponential backoff plus jitter, and a
+  ``Retry-After`` header is respected. After ``max_attempts`` they are marked
+  ``failed``.
+
+Bodies are signed with the subscription secret in ``X-Webhook-Signature``
+(``sha256=<hex HMAC of the raw body>``). Pass an httpx ``transport`` to test
+against a stand-in, or run ``webhook_sink.py`` as a local receiver.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('ticket.created', 'ticket.updated', 'ticket.deleted', 'sla.warning', 'sla.breached', 'ping')
+
+
+def sign(secret: str, body: bytes) -> str:
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    # Half fixed, half random, so receivers coming back up aren't hit by every retry at once
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(float(value), 0) if value else None
+    except ValueError:
+        return None  # HTTP dates are rare from webhook receivers; fall back to backoff
+
+
+def target_key(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class WebhookDispatcher:
+    def __init__(self, subscriptions, outbox, workers: int = 4, max_per_target: int = 2,
+                 timeout_seconds: float = 10, max_attempts: int = 8, backoff_seconds: float = 5,
+                 backoff_max_seconds: float = 3600, poll_seconds: float = 2, lease_seconds: int = 60,
+                 retention_days: int = 14, transport=None):
+        self.subscriptions = subscriptions
+        self.outbox = outbox
+        self.workers = workers
+        self.max_per_target = max_per_target
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.retention_days = retention_days
+        self.transport = transport
+        self.active: List[dict] = []
+        self.in_flight: Dict[str, int] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup = asyncio.Event()
+        self._client = None
+        self._http_error = Exception
+        self.counters = {'enqueued': 0, 'requests': 0, 'delivered': 0, 'retried': 0, 'failed': 0}
+
+    async def ensure_indexes(self):
+        await self.subscriptions.create_index("id", unique=True)
+        await self.outbox.create_index("id", unique=True)
+        await self.outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        await self.outbox.create_index([("status", 1), ("lease_until", 1)])
+        await self.outbox.create_index([("subscription_id", 1), ("created_at", -1)])
+        await self.outbox.create_index("claim")
+        await self.outbox.create_index("purge_at", expireAfterSeconds=0)
+
+    async def load_subscriptions(self):
+        self.active = await self.subscriptions.find({"active": True}, {"_id": 0}).to_list(None)
+
+    def matching(self, event_type: str, company_id: Optional[str]) -> List[dict]:
+        return [
+            subscription for subscription in self.active
+            if event_type in subscription['events']
+            and (not subscription.get('company_id') or subscription['company_id'] == company_id)
+        ]
+
+    def wants(self, event_type: str) -> bool:
+        return any(event_type in subscription['events'] for subscription in self.active)
+
+    async def emit(self, event_type: str, data: dict, company_id: Optional[str] = None,
+                   subscriptions: Optional[List[dict]] = None) -> int:
+        """Queue ``event_type`` for every matching subscription (or just ``subscriptions``).
+
+        Never raises: the change that triggered the event is already written.
+        """
+        return await self.emit_many(event_type, [(data, company_id)], subscriptions)
+
+    async def emit_many(self, event_type: str, events: List[Tuple[dict, Optional[str]]],
+                        subscriptions: Optional[List[dict]] = None) -> int:
+        """Queue one ``event_type`` event per ``(data, company_id)`` with a single insert."""
+        now = datetime.now(timezone.utc).isoformat()
+        deliveries = []
+        for data, company_id in events:
+            targets = self.matching(event_type, company_id) if subscriptions is None else subscriptions
+            if not targets:
+                continue
+            event = {'id': str(uuid.uuid4()), 'type': event_type, 'occurred_at': now, 'company_id': company_id,
+                     'data': data}
+            deliveries += [{
+                'id': str(uuid.uuid4()),
+                'subscription_id': subscription['id'],
+                'event': event,
+                'status': 'pending',
+                'attempts': 0,
+                'next_attempt_at': now,
+                'created_at': now,
+                'claim': None,
+                'lease_until': None,
+                'last_error': None,
+            } for subscription in targets]
+        if not deliveries:
+            return 0
+        try:
+            await self.outbox.insert_many(deliveries, ordered=False)
+        except Exception:
+            logger.exception("Could not queue %s webhook events", event_type)
+            return 0
+        self.counters['enqueued'] += len(deliveries)
+        self._wakeup.set()
+        return len(deliveries)
+
+    @staticmethod
+    def due(now: str) -> dict:
+        # Pending and due, or claimed by a worker whose lease ran out
+        return {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "lease_until": {"$lt": now}},
+        ]}
+
+    async def claim(self, ids: List[str]) -> List[dict]:
+        token = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        await self.outbox.update_many(
+            {"id": {"$in": ids}, **self.due(now.isoformat())},
+            {"$set": {"status": "sending", "claim": token,
+                      "lease_until": (now + timedelta(seconds=self.lease_seconds)).isoformat()}}
+        )
+        return await self.outbox.find({"claim": token}, {"_id": 0}).sort("created_at", 1).to_list(None)
+
+    async def dispatch_due(self):
+        by_id = {subscription['id']: subscription for subscription in self.active}
+        if not by_id:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        scan_limit = self.workers * self.max_per_target * 100
+        due = await self.outbox.find(
+            {"subscription_id": {"$in": list(by_id)}, **self.due(now)}, {"_id": 0, "id": 1, "subscription_id": 1}
+        ).sort("next_attempt_at", 1).limit(scan_limit).to_list(scan_limit)
+        pending: Dict[str, List[str]] = {}
+        for delivery in due:
+            pending.setdefault(delivery['subscription_id'], []).append(delivery['id'])
+
+        for subscription_id, ids in pending.items():
+            subscription = by_id[subscription_id]
+            target = target_key(subscription['url'])
+            batch_size = max(subscription.get('batch_size') or 1, 1)
+            while ids and self.in_flight.get(target, 0) < self.max_per_target:
+                chunk, ids = ids[:batch_size], ids[batch_size:]
+                deliveries = await self.claim(chunk)
+                if not deliveries:
+                    continue
+                self.in_flight[target] = self.in_flight.get(target, 0) + 1
+                await self._queue.put((subscription, deliveries))
+
+    async def deliver(self, subscription: dict, deliveries: List[dict]):
+        events = [delivery['event'] for delivery in deliveries]
+        batched = (subscription.get('batch_size') or 1) > 1
+        body = json.dumps({'events': events} if batched else events[0], default=str).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'ITSM-Webhooks/1.0',
+            'X-Webhook-Id': deliveries[0]['id'],
+            'X-Webhook-Signature': sign(subscription.get('secret') or '', body),
+        }
+        if not batched:
+            headers['X-Webhook-Event'] = events[0]['type']
+
+        status_code, retry_after, error = None, None, None
+        self.counters['requests'] += 1
+        try:
+            response = await self._client.post(subscription['url'], content=body, headers=headers)
+            status_code = response.status_code
+            if not 200 <= status_code < 300:
+                error = f"HTTP {status_code}"
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        except self._http_error as e:
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+        now = datetime.now(timezone.utc)
+        purge_at = now + timedelta(days=self.retention_days)
+        if error is None:
+            await self.outbox.update_many(
+                {"id": {"$in": [delivery['id'] for delivery in deliveries]}, "claim": deliveries[0]['claim']},
+                {"$set": {"status": "delivered", "delivered_at": now.isoformat(), "last_status_code": status_code,
+                          "last_error": None, "claim": None, "lease_until": None, "purge_at": purge_at},
+                 "$inc": {"attempts": 1}}
+            )
+            self.counters['delivered'] += len(deliveries)
+            return
+
+        updates = []
+        for delivery in deliveries:
+            attempts = delivery['attempts'] + 1
+            fields = {"attempts": attempts, "last_error": error, "last_status_code": status_code,
+                      "claim": None, "lease_until": None}
+            if attempts >= self.max_attempts:
+                fields.update(status="failed", purge_at=purge_at)
+                self.counters['failed'] += 1
+            else:
+                delay = max(backoff_seconds(attempts, self.backoff_seconds, self.backoff_max_seconds), retry_after or 0)
+                fields.update(status="pending", next_attempt_at=(now + timedelta(seconds=delay)).isoformat())
+                self.counters['retried'] += 1
+            updates.append(UpdateOne({"id": delivery['id'], "claim": delivery['claim']}, {"$set": fields}))
+        await self.outbox.bulk_write(updates, ordered=False)
+
+    async def _sender(self):
+        while True:
+            subscription, deliveries = await self._queue.get()
+            try:
+                await self.deliver(subscription, deliveries)
+            except Exception:
+                # The lease expires and the deliveries are picked up again
+                logger.exception("Webhook delivery to %s failed", subscription['url'])
+            finally:
+                target = target_key(subscription['url'])
+                self.in_flight[target] -= 1
+                self._wakeup.set()
+
+    async def run(self, refresh_seconds: float = 30):
+        import httpx
+
+        self._http_error = httpx.HTTPError
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(max_connections=self.workers * self.max_per_target,
+                                max_keepalive_connections=self.workers * self.max_per_target),
+            transport=self.transport,
+        )
+        self._queue = asyncio.Queue(maxsize=self.workers)
+        senders = [asyncio.create_task(self._sender()) for _ in range(self.workers)]
+        loop = asyncio.get_running_loop()
+        refreshed = None
+        try:
+            while True:
+                # Other API workers change subscriptions too
+                if refreshed is None or loop.time() - refreshed >= refresh_seconds:
+                    try:
+                        await self.load_subscriptions()
+                        refreshed = loop.time()
+                    except Exception:
+                        # Keep delivering to the subscriptions already loaded; retried next poll
+                        logger.exception("Webhook subscription refresh failed")
+                try:
+                    await self.dispatch_due()
+                except Exception:
+                    logger.exception("Webhook dispatch failed")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            for sender in senders:
+                sender.cancel()
+            await asyncio.gather(*senders, return_exceptions=True)
+            await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'subscriptions': len(self.active),
+            'in_flight': {target: count for target, count in self.in_flight.items() if count},
+        }
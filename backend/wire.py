@@ -0,0 +1,142 @@
+"""
+Response wire-format negotiation.
+
+``WireFormatMiddleware`` re-encodes JSON responses as MessagePack when the
+client sends ``Accept: application/msgpack`` and compresses JSON/MessagePack
+bodies with brotli or gzip (per ``Accept-Encoding``) once they reach
+``minimum_size`` bytes. Other responses (PDFs, files, streams) pass through
+untouched. ``msgpack`` and ``brotli`` are optional: without them the
+middleware serves JSON and falls back to gzip.
+"""
+
+import gzip
+import json
+from typing import Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+ENCODABLE_TYPES = ('application/json',) + MSGPACK_TYPES
+
+
+def accepted_tokens(header: str) -> dict:
+    """Map each token of an Accept/Accept-Encoding header to its q-value."""
+    tokens = {}
+    for part in header.split(','):
+        fields = [field.strip() for field in part.split(';')]
+        if not fields[0]:
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        tokens[fields[0].lower()] = quality
+    return tokens
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    tokens = accepted_tokens(accept_encoding)
+    if brotli is not None and tokens.get('br', 0) > 0:
+        return 'br'
+    if tokens.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def wants_msgpack(accept: str) -> bool:
+    if msgpack is None:
+        return False
+    tokens = accepted_tokens(accept)
+    return any(tokens.get(media_type, 0) > 0 for media_type in MSGPACK_TYPES)
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class WireFormatMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope['headers']}
+        use_msgpack = wants_msgpack(headers.get('accept', ''))
+        encoding = choose_encoding(headers.get('accept-encoding', ''))
+        if not use_msgpack and encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body_parts = []
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start_message, passthrough
+            if message['type'] == 'http.response.start':
+                response_headers = {key.decode('latin-1').lower(): value.decode('latin-1')
+                                    for key, value in message.get('headers', [])}
+                content_type = response_headers.get('content-type', '').split(';')[0].strip()
+                if content_type not in ENCODABLE_TYPES or 'content-encoding' in response_headers:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body_parts.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+            await self.send_encoded(send, start_message, b''.join(body_parts), use_msgpack, encoding)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def send_encoded(self, send, start_message, body, use_msgpack, encoding):
+        raw_headers = [(key, value) for key, value in start_message.get('headers', [])
+                       if key.lower() not in (b'content-length', b'content-type')]
+        content_type = dict((key.lower(), value) for key, value in start_message.get('headers', [])).get(
+            b'content-type', b'application/json')
+        vary = []
+
+        if use_msgpack and content_type.startswith(b'application/json') and body:
+            body = msgpack.packb(json.loads(body), use_bin_type=True)
+            content_type = b'application/msgpack'
+            vary.append(b'Accept')
+
+        if encoding is not None:
+            vary.append(b'Accept-Encoding')
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                raw_headers.append((b'content-encoding', encoding.encode('latin-1')))
+
+        raw_headers.append((b'content-type', content_type))
+        raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        if vary:
+            raw_headers.append((b'vary', b', '.join(vary)))
+
+        await send({**start_message, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -1,4 +1,4 @@
-import React, { createContext, useState, useContext, useEffect } from 'react';
+import React, { createContext, useState, useContext, useEffect, useRef } from 'react';
 import axios from 'axios';
 
 const AuthContext = createContext();
@@ -9,6 +9,8 @@ export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [token, setToken] = useState(localStorage.getItem('token'));
+  // Data for the first screen, loaded together with the user; each part is handed out once
+  const bootstrap = useRef({});
 
   useEffect(() => {
     if (token) {
@@ -20,20 +22,45 @@ export const AuthProvider = ({ children }) => {
 
   const fetchCurrentUser = async () => {
     try {
-      const response = await axios.get(`${API}/auth/me`, {
+      const response = await axios.get(`${API}/bootstrap`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setUser(response.data);
+      const { user: userData, ...rest } = response.data;
+      bootstrap.current = rest;
+      setUser(userData);
     } catch (error) {
       console.error('Error fetching user:', error);
-      localStorage.removeItem('token');
-      setToken(null);
-      setUser(null);
+      if (error.response?.status === 401) {
+        clearSession();
+      } else {
+        // Only the first-screen data failed; pages load their own data, so keep the session
+        await fetchUserOnly();
+      }
     } finally {
       setLoading(false);
     }
   };
 
+  const fetchUserOnly = async () => {
+    try {
+      const response = await axios.get(`${API}/auth/me`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setUser(response.data);
+    } catch (error) {
+      console.error('Error fetching user:', error);
+      if (error.response?.status === 401) {
+        clearSession();
+      }
+    }
+  };
+
+  const clearSession = () => {
+    localStorage.removeItem('token');
+    setToken(null);
+    setUser(null);
+  };
+
   const login = async (email, password) => {
     const response = await axios.post(`${API}/auth/login`, { email, password });
     const { token: newToken, user: userData } = response.data;
@@ -52,7 +79,14 @@ export const AuthProvider = ({ children }) => {
     return newUser;
   };
 
+  const consumeBootstrap = (key) => {
+    const value = bootstrap.current[key];
+    delete bootstrap.current[key];
+    return value;
+  };
+
   const logout = () => {
+    bootstrap.current = {};
     localStorage.removeItem('token');
     setToken(null);
     setUser(null);
@@ -63,7 +97,7 @@ export const AuthProvider = ({ children }) => {
   });
 
   return (
-    <AuthContext.Provider value={{ user, loading, login, register, logout, getAuthHeader }}>
+    <AuthContext.Provider value={{ user, loading, login, register, logout, getAuthHeader, consumeBootstrap }}>
       {children}
     </AuthContext.Provider>
   );
@@ -22,7 +22,7 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const DashboardLayout = () => {
-  const { user, logout, getAuthHeader } = useAuth();
+  const { user, logout, getAuthHeader, consumeBootstrap } = useAuth();
   const location = useLocation();
   const navigate = useNavigate();
   const [sidebarOpen, setSidebarOpen] = useState(false);
@@ -30,7 +30,12 @@ const DashboardLayout = () => {
   const [showAlerts, setShowAlerts] = useState(false);
 
   React.useEffect(() => {
-    fetchAlerts();
+    const initialAlerts = consumeBootstrap('sla_alerts');
+    if (initialAlerts) {
+      setAlerts(initialAlerts);
+    } else {
+      fetchAlerts();
+    }
     const interval = setInterval(fetchAlerts, 300000); // Check every 5 minutes
     return () => clearInterval(interval);
   }, []);
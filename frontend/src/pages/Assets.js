@@ -85,7 +85,7 @@ const Assets = () => {
     try {
       if (editingAsset) {
         await axios.put(`${API}/assets/${editingAsset.id}`, formData, {
-          headers: getAuthHeader()
+          headers: { ...getAuthHeader(), 'If-Match': `"${editingAsset.version}"` }
         });
         toast.success('Activo actualizado exitosamente');
       } else {
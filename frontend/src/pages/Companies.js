@@ -47,7 +47,7 @@ const Companies = () => {
     try {
       if (editingCompany) {
         await axios.put(`${API}/companies/${editingCompany.id}`, formData, {
-          headers: getAuthHeader()
+          headers: { ...getAuthHeader(), 'If-Match': `"${editingCompany.version}"` }
         });
         toast.success('Empresa actualizada exitosamente');
       } else {
@@ -77,7 +77,7 @@ const Contracts = () => {
     try {
       if (editingContract) {
         await axios.put(`${API}/contracts/${editingContract.id}`, formData, {
-          headers: getAuthHeader()
+          headers: { ...getAuthHeader(), 'If-Match': `"${editingContract.version}"` }
         });
         toast.success('Contrato actualizado exitosamente');
       } else {
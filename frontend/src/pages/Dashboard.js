@@ -30,12 +30,18 @@ const API = `${BACKEND_URL}/api`;
 const COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444'];
 
 const Dashboard = () => {
-  const { getAuthHeader } = useAuth();
+  const { getAuthHeader, consumeBootstrap } = useAuth();
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetchStats();
+    const initialStats = consumeBootstrap('dashboard');
+    if (initialStats) {
+      setStats(initialStats);
+      setLoading(false);
+    } else {
+      fetchStats();
+    }
   }, []);
 
   const fetchStats = async () => {
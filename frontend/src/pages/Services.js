@@ -70,7 +70,7 @@ const Services = () => {
     try {
       if (editingService) {
         await axios.put(`${API}/services/${editingService.id}`, formData, {
-          headers: getAuthHeader()
+          headers: { ...getAuthHeader(), 'If-Match': `"${editingService.version}"` }
         });
         toast.success('Servicio actualizado exitosamente');
       } else {
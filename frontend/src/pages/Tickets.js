@@ -38,6 +38,7 @@ const Tickets = () => {
     maintenance_log: ''
   });
   const [filterType, setFilterType] = useState('all');
+  const [includeArchived, setIncludeArchived] = useState(false);
   const [pdfDialogOpen, setPdfDialogOpen] = useState(false);
   const [pdfFilters, setPdfFilters] = useState({
     company_id: '',
@@ -47,7 +48,6 @@ const Tickets = () => {
   });
 
   useEffect(() => {
-    fetchTickets();
     if (user?.role !== 'client') {
       fetchCompanies();
       fetchUsers();
@@ -56,10 +56,15 @@ const Tickets = () => {
     fetchServices();
   }, []);
 
+  useEffect(() => {
+    fetchTickets();
+  }, [includeArchived]);
+
   const fetchTickets = async () => {
     try {
       const response = await axios.get(`${API}/tickets`, {
-        headers: getAuthHeader()
+        headers: getAuthHeader(),
+        params: includeArchived ? { include_archived: true } : {}
       });
       setTickets(response.data);
     } catch (error) {
@@ -546,14 +551,24 @@ const Tickets = () => {
         </div>
       </div>
 
-      <Tabs value={filterType} onValueChange={setFilterType}>
-        <TabsList>
-          <TabsTrigger value="all">Todos</TabsTrigger>
-          <TabsTrigger value="open">Abiertos</TabsTrigger>
-          <TabsTrigger value="in_progress">En Progreso</TabsTrigger>
-          <TabsTrigger value="resolved">Resueltos</TabsTrigger>
-        </TabsList>
-      </Tabs>
+      <div className="flex items-center justify-between">
+        <Tabs value={filterType} onValueChange={setFilterType}>
+          <TabsList>
+            <TabsTrigger value="all">Todos</TabsTrigger>
+            <TabsTrigger value="open">Abiertos</TabsTrigger>
+            <TabsTrigger value="in_progress">En Progreso</TabsTrigger>
+            <TabsTrigger value="resolved">Resueltos</TabsTrigger>
+          </TabsList>
+        </Tabs>
+        <label className="flex items-center space-x-2 text-sm text-slate-600">
+          <input
+            type="checkbox"
+            checked={includeArchived}
+            onChange={(e) => setIncludeArchived(e.target.checked)}
+          />
+          <span>Incluir archivados</span>
+        </label>
+      </div>
 
       {filteredTickets.length === 0 ? (
         <div className="bg-white rounded-xl shadow-sm border border-slate-200 p-12 text-center">
@@ -590,6 +605,19 @@ const Tickets = () => {
                         {ticket.category}
                       </span>
                     )}
+                    {ticket.duplicate_of && (
+                      <span
+                        className="px-3 py-1 rounded-full text-xs font-medium bg-amber-100 text-amber-800"
+                        title={`Similar al ticket ${ticket.duplicate_of.substring(0, 8)}`}
+                      >
+                        Posible duplicado
+                      </span>
+                    )}
+                    {ticket.archived_at && (
+                      <span className="px-3 py-1 rounded-full text-xs font-medium bg-slate-100 text-slate-600">
+                        Archivado
+                      </span>
+                    )}
                   </div>
                   <p className="text-slate-600 text-sm mb-3">{ticket.description}</p>
                   <div className="flex items-center space-x-4 text-xs text-slate-500">
@@ -0,0 +1,41 @@
+import asyncio
+
+from gridfs.errors import FileExists
+
+from attachments import GridFSAttachmentStore, LocalAttachmentStore
+
+
+def test_local_store_concurrent_writes_of_one_key_keep_a_whole_copy(tmp_path):
+    store = LocalAttachmentStore(tmp_path)
+    copies = [bytes([i]) * 200_000 for i in range(4)]
+
+    async def scenario():
+        await asyncio.gather(*(store.put_bytes('abc-thumb-256', data) for data in copies))
+        return await store.read('abc-thumb-256')
+
+    assert asyncio.run(scenario()) in copies
+    assert [path.name for path in (tmp_path / 'ab').iterdir()] == ['abc-thumb-256']
+
+
+class StoredOnceBucket:
+    """upload_from_stream_with_id as GridFS does it: a second upload of an id raises FileExists."""
+
+    def __init__(self):
+        self.files = {}
+
+    async def upload_from_stream_with_id(self, file_id, filename, source):
+        if file_id in self.files:
+            raise FileExists(f"file with _id {file_id!r} already exists")
+        self.files[file_id] = source
+
+
+def test_gridfs_store_treats_an_existing_key_as_written():
+    bucket = StoredOnceBucket()
+    store = GridFSAttachmentStore(bucket)
+
+    async def scenario():
+        await store.put_bytes('abc-thumb-256', b'first')
+        await store.put_bytes('abc-thumb-256', b'second')
+
+    asyncio.run(scenario())
+    assert bucket.files == {'abc-thumb-256': b'first'}
@@ -0,0 +1,76 @@
+import asyncio
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from audit import AuditLog, field_diff
+
+
+class FlakyCollection:
+    """insert_many over a dict keyed by _id, with the partial failures a replica set can give."""
+
+    def __init__(self):
+        self.docs = {}
+        self.fail_after = None
+        self.error = None
+
+    async def insert_many(self, docs, ordered=True):
+        errors = []
+        for index, doc in enumerate(docs):
+            doc.setdefault('_id', ObjectId())
+            if self.fail_after is not None and index >= self.fail_after:
+                if self.error == 'network':
+                    raise AutoReconnect("connection reset")
+                errors.append({'index': index, 'code': 91, 'errmsg': 'shutdown in progress'})
+            elif doc['_id'] in self.docs:
+                errors.append({'index': index, 'code': 11000, 'errmsg': 'duplicate key'})
+            else:
+                self.docs[doc['_id']] = dict(doc)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+
+
+def record_events(audit_log, count):
+    for i in range(count):
+        audit_log.record('ticket', f't{i}', 'create', 'u1')
+
+
+def test_partial_write_error_requeues_only_unwritten_events():
+    collection = FlakyCollection()
+    audit_log = AuditLog(collection, batch_size=10)
+    record_events(audit_log, 10)
+
+    async def scenario():
+        collection.fail_after = 6
+        await audit_log.flush()
+        assert len(collection.docs) == 6 and audit_log.stats()['queued'] == 4
+        collection.fail_after = None
+        await audit_log.flush()
+
+    asyncio.run(scenario())
+    assert len(collection.docs) == 10
+    assert audit_log.stats()['queued'] == 0
+    assert audit_log.stats()['written'] == 10
+
+
+def test_retry_after_network_error_skips_events_already_written():
+    collection = FlakyCollection()
+    audit_log = AuditLog(collection, batch_size=10)
+    record_events(audit_log, 10)
+
+    async def scenario():
+        collection.fail_after, collection.error = 4, 'network'
+        await audit_log.flush()
+        assert audit_log.stats()['queued'] == 10
+        collection.fail_after = None
+        await audit_log.flush()
+
+    asyncio.run(scenario())
+    assert sorted(doc['entity_id'] for doc in collection.docs.values()) == sorted(f't{i}' for i in range(10))
+    assert audit_log.stats()['queued'] == 0
+
+
+def test_field_diff_masks_secrets():
+    changes = field_diff({'status': 'open', 'windows_password': 'a'}, {'status': 'closed', 'windows_password': 'b'},
+                         ['status', 'windows_password'])
+    assert changes == {'status': {'from': 'open', 'to': 'closed'}, 'windows_password': {'from': '***', 'to': '***'}}
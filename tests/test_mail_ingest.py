@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+from mail_ingest import SMTPServer, watch_maildir
+
+
+class RecordingIngestor:
+    """Stands in for Ingestor: records submitted messages and how many were in flight at once."""
+
+    batch_size = 2
+    concurrency = 1
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.received = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def submit(self, raw: bytes):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            self.received.append(raw)
+        finally:
+            self.in_flight -= 1
+
+
+async def smtp_session(server: SMTPServer, lines):
+    """Send each chunk of `lines` after reading the server's reply and return the reply codes."""
+    listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    codes = []
+
+    async def read_reply():
+        while True:
+            line = await reader.readline()
+            if line[3:4] != b'-':
+                codes.append(int(line[:3]))
+                return
+
+    try:
+        await read_reply()
+        for chunk in lines:
+            writer.write(chunk)
+            await writer.drain()
+            await read_reply()
+    finally:
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+    return codes
+
+
+def test_smtp_session_submits_message_without_dot_stuffing():
+    ingestor = RecordingIngestor()
+    codes = asyncio.run(smtp_session(SMTPServer(ingestor), [
+        b'EHLO client\r\n', b'MAIL FROM:<a@example.com>\r\n', b'RCPT TO:<help@itsm.test>\r\n', b'DATA\r\n',
+        b'Subject: Printer\r\n\r\nIt jams.\r\n..signature\r\n.\r\n', b'QUIT\r\n',
+    ]))
+    assert codes == [220, 250, 250, 250, 354, 250, 221]
+    assert ingestor.received == [b'Subject: Printer\r\n\r\nIt jams.\r\n.signature\r\n']
+
+
+def test_smtp_rejects_over_long_lines_and_keeps_the_session():
+    ingestor = RecordingIngestor()
+    long_line = b'x' * (100 * 1024) + b'\r\n'
+    codes = asyncio.run(smtp_session(SMTPServer(ingestor), [
+        b'HELO client\r\n', long_line, b'MAIL FROM:<a@example.com>\r\n', b'RCPT TO:<help@itsm.test>\r\n',
+        b'DATA\r\n', b'Subject: Long\r\n\r\n' + long_line + b'.\r\n', b'NOOP\r\n',
+    ]))
+    assert codes == [220, 250, 500, 250, 250, 354, 552, 250]
+    assert ingestor.received == []
+
+
+def test_smtp_rejects_messages_over_the_size_limit():
+    ingestor = RecordingIngestor()
+    codes = asyncio.run(smtp_session(SMTPServer(ingestor, max_message_bytes=10), [
+        b'HELO client\r\n', b'MAIL FROM:<a@example.com>\r\n', b'RCPT TO:<help@itsm.test>\r\n', b'DATA\r\n',
+        b'Subject: Too big\r\n\r\nBody\r\n.\r\n',
+    ]))
+    assert codes[-1] == 552
+    assert ingestor.received == []
+
+
+def test_maildir_ingests_with_bounded_concurrency(tmp_path):
+    (tmp_path / 'new').mkdir()
+    for i in range(12):
+        (tmp_path / 'new' / f'msg{i}').write_bytes(f'Subject: {i}\r\n\r\nbody\r\n'.encode())
+    ingestor = RecordingIngestor(delay=0.01)
+
+    async def scenario():
+        task = asyncio.create_task(watch_maildir(ingestor, tmp_path, poll_seconds=0.01, concurrency=3))
+
+        async def wait():
+            while len(os.listdir(tmp_path / 'cur')) < 12:
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(wait(), 5)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert os.listdir(tmp_path / 'new') == []
+    assert sorted(os.listdir(tmp_path / 'cur')) == sorted(f'msg{i}:2,S' for i in range(12))
+    assert len(ingestor.received) == 12
+    assert ingestor.peak <= 3
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from normalize import parse_decimal, parse_loose_date, parse_size_gb
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('16', 16.0),
+    ('8 GB DDR4', 8.0),
+    ('512MB', 0.5),
+    ('1,5 TB', 1536.0),
+    ('SSD 512GB + HDD 1TB', 1536.0),
+    # Bare numbers next to sized ones are not sizes
+    ('Disco duro 500 GB, 7200 rpm', 500.0),
+    ('2 discos de 1TB', 1024.0),
+    # NxSIZE multiplies; the parenthesised breakdown is not counted again
+    ('2x8GB', 16.0),
+    ('16GB (2x8GB)', 16.0),
+    ('(2x8GB)', 16.0),
+    ('sin dato', None),
+    (None, None),
+])
+def test_parse_size_gb(value, expected):
+    assert parse_size_gb(value) == expected
+
+
+def test_parse_size_gb_first_only():
+    assert parse_size_gb('SSD 512GB + HDD 1TB', add_all=False) == 512.0
+    assert parse_size_gb('16GB (2x8GB)', add_all=False) == 16.0
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2025-03-01', (2025, 3, 1)),
+    ('01/03/2025', (2025, 3, 1)),
+    ('1.3.2025', (2025, 3, 1)),
+    # Partial dates are the end of the period, never a part of today
+    ('2026', (2026, 12, 31)),
+    ('3/2027', (2027, 3, 31)),
+    ('2/2028', (2028, 2, 29)),
+    ('12', None),
+    ('March', None),
+    ('sin fecha', None),
+    ('', None),
+])
+def test_parse_loose_date(value, expected):
+    parsed = parse_loose_date(value)
+    assert parsed == (datetime(*expected, tzinfo=timezone.utc) if expected else None)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1500', 1500.0),
+    ('$1,234.50', 1234.5),
+    ('1.234,50 €', 1234.5),
+    ('-300', -300.0),
+    ('USD -300', -300.0),
+    ('-$1,234.50', -1234.5),
+    # A hyphen inside a word is not a sign
+    ('Lenovo-300', 300.0),
+    ('n/a', None),
+])
+def test_parse_decimal(value, expected):
+    assert parse_decimal(value) == expected
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from sla import WorkingCalendar
+
+MADRID = ZoneInfo('Europe/Madrid')
+OFFICE_HOURS = {day: ['09:00-14:00', '15:00-18:00'] for day in ('mon', 'tue', 'wed', 'thu', 'fri')}
+
+
+def local(*args) -> datetime:
+    return datetime(*args, tzinfo=MADRID)
+
+
+@pytest.fixture
+def office():
+    return WorkingCalendar('Europe/Madrid', OFFICE_HOURS, holidays=['2025-03-04'])
+
+
+def test_lunch_break_is_not_counted(office):
+    assert office.elapsed(local(2025, 3, 3, 13), local(2025, 3, 3, 15, 30)) == timedelta(hours=1, minutes=30)
+    assert office.deadline(local(2025, 3, 3, 13), timedelta(hours=2)) == local(2025, 3, 3, 16)
+
+
+def test_ticket_opened_during_lunch_starts_at_the_afternoon(office):
+    assert office.deadline(local(2025, 3, 3, 14, 20), timedelta(hours=1)) == local(2025, 3, 3, 16)
+
+
+def test_holidays_and_weekends_are_skipped(office):
+    # Tuesday 4 March is a holiday
+    assert office.deadline(local(2025, 3, 3, 17), timedelta(hours=2)) == local(2025, 3, 5, 10)
+    assert office.elapsed(local(2025, 3, 3, 17), local(2025, 3, 5, 10)) == timedelta(hours=2)
+    assert office.deadline(local(2025, 3, 7, 17), timedelta(hours=2)) == local(2025, 3, 10, 10)
+
+
+def test_working_hours_follow_local_time_across_dst(office):
+    # Clocks go forward on Sunday 30 March: 17:00 CET is 16:00 UTC, 10:00 CEST is 08:00 UTC
+    deadline = office.deadline(local(2025, 3, 28, 17), timedelta(hours=2))
+    assert deadline == datetime(2025, 3, 31, 8, tzinfo=timezone.utc)
+    assert office.elapsed(local(2025, 3, 28, 17), deadline) == timedelta(hours=2)
+
+
+def test_short_dst_day_has_23_working_hours():
+    calendar = WorkingCalendar('Europe/Madrid', {'sun': ['00:00-24:00']})
+    assert calendar.elapsed(local(2025, 3, 30), local(2025, 3, 31)) == timedelta(hours=23)
+    assert calendar.elapsed(local(2025, 10, 26), local(2025, 10, 27)) == timedelta(hours=25)
+
+
+def test_always_open_calendar_uses_wall_clock_time():
+    calendar = WorkingCalendar()
+    start = datetime(2025, 3, 29, 12, tzinfo=timezone.utc)
+    assert calendar.elapsed(start, start + timedelta(hours=30)) == timedelta(hours=30)
+    assert calendar.deadline(start, timedelta(hours=8)) == start + timedelta(hours=8)
+
+
+def test_deadline_beyond_the_table_limit_raises():
+    sparse = WorkingCalendar('UTC', {'mon': ['09:00-10:00']})
+    with pytest.raises(ValueError):
+        sparse.deadline(datetime(2025, 1, 1, tzinfo=timezone.utc), timedelta(hours=100_000))
+
+
+@pytest.mark.parametrize('working_hours', [
+    {'mon': ['09:00-14:00', '13:00-18:00']},
+    {'mon': ['18:00-09:00']},
+    {'funday': ['09:00-10:00']},
+    {},
+])
+def test_invalid_working_hours_are_rejected(working_hours):
+    with pytest.raises(ValueError):
+        WorkingCalendar('UTC', working_hours)
@@ -0,0 +1,255 @@
+import asyncio
+import copy
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from webhooks import WebhookDispatcher, sign
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(doc, option) for option in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator == '$in' and value not in operand:
+                    return False
+                if operator == '$lt' and not (value is not None and value < operand):
+                    return False
+                if operator == '$lte' and not (value is not None and value <= operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc.get(key) or '', reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs if length is None else self.docs[:length]
+
+
+class FakeCollection:
+    """The few collection methods the dispatcher uses, over a list of dicts."""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+
+    def find(self, query, projection=None):
+        return Cursor([copy.deepcopy(doc) for doc in self.docs if matches(doc, query)])
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs += [copy.deepcopy(doc) for doc in docs]
+
+    async def update_many(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(update.get('$set', {}))
+                for key, amount in update.get('$inc', {}).items():
+                    doc[key] = doc.get(key, 0) + amount
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            await self.update_many(request._filter, request._doc)
+
+
+def make_dispatcher(subscriptions, handler, **options):
+    options = {'workers': 4, 'max_per_target': 2, 'poll_seconds': 0.01, 'backoff_seconds': 5, **options}
+    outbox = FakeCollection()
+    dispatcher = WebhookDispatcher(FakeCollection(subscriptions), outbox, transport=httpx.MockTransport(handler),
+                                   **options)
+    return dispatcher, outbox
+
+
+def subscription(subscription_id, url='http://receiver.test/hook', batch_size=1):
+    return {'id': subscription_id, 'url': url, 'events': ['ticket.created'], 'active': True,
+            'company_id': None, 'secret': f'secret-{subscription_id}', 'batch_size': batch_size}
+
+
+async def run_until(dispatcher, outbox, done, timeout=5):
+    await dispatcher.load_subscriptions()
+    task = asyncio.create_task(dispatcher.run())
+
+    async def wait():
+        while not done(outbox.docs):
+            await asyncio.sleep(0.01)
+
+    try:
+        await asyncio.wait_for(wait(), timeout)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def all_delivered(docs):
+    return docs and all(doc['status'] == 'delivered' for doc in docs)
+
+
+def test_delivers_signed_single_events():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def scenario():
+        dispatcher, outbox = make_dispatcher([subscription('s1')], handler)
+        await dispatcher.load_subscriptions()
+        assert await dispatcher.emit('ticket.created', {'ticket': {'id': 't1'}}, 'c1') == 1
+        await run_until(dispatcher, outbox, all_delivered)
+
+    asyncio.run(scenario())
+    assert len(requests) == 1
+    request = requests[0]
+    assert request.headers['X-Webhook-Event'] == 'ticket.created'
+    assert request.headers['X-Webhook-Signature'] == sign('secret-s1', request.content)
+    assert json.loads(request.content)['data'] == {'ticket': {'id': 't1'}}
+
+
+def test_batches_pending_events_per_subscription():
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(204)
+
+    async def scenario():
+        dispatcher, outbox = make_dispatcher([subscription('s1', batch_size=2)], handler, max_per_target=1)
+        await dispatcher.load_subscriptions()
+        await dispatcher.emit_many('ticket.created', [({'ticket': {'id': f't{i}'}}, 'c1') for i in range(5)])
+        await run_until(dispatcher, outbox, all_delivered)
+        return outbox.docs
+
+    docs = asyncio.run(scenario())
+    assert sorted(len(body['events']) for body in bodies) == [1, 2, 2]
+    delivered = [event['data']['ticket']['id'] for body in bodies for event in body['events']]
+    assert sorted(delivered) == [f't{i}' for i in range(5)]
+    assert all(doc['attempts'] == 1 for doc in docs)
+
+
+def test_failures_back_off_and_respect_retry_after():
+    def handler(request):
+        if request.url.host == 'throttled.test':
+            return httpx.Response(503, headers={'Retry-After': '600'})
+        return httpx.Response(500)
+
+    async def scenario():
+        dispatcher, outbox = make_dispatcher(
+            [subscription('s1', url='http://throttled.test/hook'), subscription('s2', url='http://broken.test/hook')],
+            handler, backoff_seconds=5
+        )
+        await dispatcher.load_subscriptions()
+        await dispatcher.emit('ticket.created', {'ticket': {'id': 't1'}}, 'c1')
+        started = datetime.now(timezone.utc)
+        await run_until(dispatcher, outbox, lambda docs: all(doc['attempts'] == 1 for doc in docs))
+        return started, {doc['subscription_id']: doc for doc in outbox.docs}
+
+    started, docs = asyncio.run(scenario())
+    throttled, broken = docs['s1'], docs['s2']
+    assert throttled['status'] == broken['status'] == 'pending'
+    assert throttled['last_error'] == 'HTTP 503' and broken['last_error'] == 'HTTP 500'
+    # Retry-After wins over the shorter backoff; the backoff is half fixed, half jitter
+    assert datetime.fromisoformat(throttled['next_attempt_at']) >= started + timedelta(seconds=600)
+    retry_in = datetime.fromisoformat(broken['next_attempt_at']) - started
+    assert timedelta(seconds=2.5) <= retry_in <= timedelta(seconds=6)
+
+
+def test_gives_up_after_max_attempts():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    async def scenario():
+        dispatcher, outbox = make_dispatcher([subscription('s1')], handler, max_attempts=1)
+        await dispatcher.load_subscriptions()
+        await dispatcher.emit('ticket.created', {'ticket': {'id': 't1'}}, 'c1')
+        await run_until(dispatcher, outbox, lambda docs: docs[0]['status'] == 'failed')
+        return outbox.docs[0], dispatcher.stats()
+
+    delivery, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert delivery['purge_at'] > datetime.now(timezone.utc)
+    assert stats['failed'] == 1
+
+
+class FailingSubscriptions(FakeCollection):
+    """A subscriptions collection whose reads fail while `down` is set."""
+
+    down = False
+
+    def find(self, query, projection=None):
+        if self.down:
+            raise RuntimeError("primary stepped down")
+        return super().find(query, projection)
+
+
+def test_keeps_delivering_when_a_subscription_refresh_fails():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200)
+
+    async def scenario():
+        dispatcher, outbox = make_dispatcher([], handler)
+        dispatcher.subscriptions = FailingSubscriptions([subscription('s1')])
+        await dispatcher.load_subscriptions()
+        await dispatcher.emit('ticket.created', {'ticket': {'id': 't1'}}, 'c1')
+        dispatcher.subscriptions.down = True
+        task = asyncio.create_task(dispatcher.run())
+
+        async def wait():
+            while not all_delivered(outbox.docs):
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(wait(), 5)
+            assert not task.done()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_limits_requests_in_flight_per_target():
+    in_flight = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.02)
+        in_flight[host] -= 1
+        return httpx.Response(200)
+
+    async def scenario():
+        subscriptions = [subscription('a1', url='http://a.test/one'), subscription('a2', url='http://a.test/two'),
+                         subscription('b1', url='http://b.test/hook')]
+        dispatcher, outbox = make_dispatcher(subscriptions, handler, workers=4, max_per_target=1)
+        await dispatcher.load_subscriptions()
+        await dispatcher.emit_many('ticket.created', [({'ticket': {'id': f't{i}'}}, 'c1') for i in range(4)])
+        await run_until(dispatcher, outbox, all_delivered)
+
+    asyncio.run(scenario())
+    # Two subscriptions on a.test still share its single slot; b.test runs alongside
+    assert peak == {'a.test': 1, 'b.test': 1}